@@ -0,0 +1,566 @@
+"""
+Analítica de interacción sobre las salidas acumuladas de las extracciones.
+
+Los archivos por cuenta ({cuenta}_{fecha}.csv / .jsonl) y el dataset Parquet de
+output_dir se cargan una sola vez en arreglos columnares de numpy, que se
+guardan en {output_dir}/.analitica/columnas.npz. Cada update() lee solo los
+archivos nuevos o modificados (y descarta las filas de los que se borraron),
+así que las ejecuciones nuevas se suman sin releer el historial. Sobre esos
+arreglos se calculan, con operaciones vectorizadas (bincount, lexsort), los
+agregados por cuenta y por cuenta y periodo (día, semana o mes):
+
+- tweets y total de cada métrica;
+- interacciones (comentarios + retweets + me_gusta + compartidos): total,
+  tasa_interaccion (interacciones por tweet; los seguidores no se extraen)
+  y mediana;
+- efecto_media: interacción media de los tweets con medios dividida por la de
+  los tweets sin medios;
+- ritmo de publicación: tweets por semana y mediana de horas entre tweets;
+- los tweets con más interacciones de cada cuenta.
+
+Un tweet visto en varias ejecuciones cuenta una vez, con las métricas de la
+extracción más reciente.
+
+    analytics = EngagementAnalytics('twitter_data')
+    analytics.update()
+    analytics.write_reports(period='semana')
+
+Requiere numpy (pip install numpy); leer el dataset Parquet requiere además pyarrow.
+"""
+import os
+import csv
+import json
+import argparse
+import datetime
+
+import numpy as np
+
+from sinks import INT_FIELDS
+from tweet_index import status_id_from_url
+
+CACHE_DIRNAME = '.analitica'
+COLUMNS_FILE = 'columnas.npz'
+
+# Se incrementa si cambia el formato de columnas.npz (la caché se reconstruye)
+CACHE_VERSION = 1
+
+# Archivos CSV/JSONL de output_dir que no son salidas de tweets
+NON_TWEET_PREFIXES = ('resumen_extraccion_', 'analitica_', 'refresco_', '.')
+
+PERIODS = ('dia', 'semana', 'mes')
+
+# Tweets con más interacciones que se informan por cuenta
+TOP_TWEETS = 5
+
+COLUMN_TYPES = {
+    'cuenta': np.int32,
+    'status_id': np.int64,
+    'fecha': 'datetime64[ms]',
+    'comentarios': np.int64,
+    'retweets': np.int64,
+    'me_gusta': np.int64,
+    'compartidos': np.int64,
+    'tiene_media': np.bool_,
+    'extraido': 'datetime64[ms]',
+    'fuente': np.int32
+}
+
+# Campos de los CSV/JSONL que se cargan
+READ_FIELDS = ('cuenta', 'url', 'texto', 'fecha', 'tiene_media') + INT_FIELDS
+
+MS_PER_HOUR = 3600 * 1000
+MS_PER_DAY = 24 * MS_PER_HOUR
+
+def _empty_columns():
+    columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+    # Textos como un solo búfer UTF-8 con desplazamientos (fila i = bytes[offsets[i]:offsets[i + 1]])
+    columns['texto_offsets'] = np.zeros(1, dtype=np.int64)
+    columns['texto_bytes'] = np.empty(0, dtype=np.uint8)
+    return columns
+
+def _encode_texts(texts):
+    encoded = [(text or "").encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+def _concat(parts):
+    """Unir varios bloques de columnas, desplazando los offsets de texto."""
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in COLUMN_TYPES}
+    offsets = [parts[0]['texto_offsets']]
+    shift = parts[0]['texto_offsets'][-1]
+    for part in parts[1:]:
+        offsets.append(part['texto_offsets'][1:] + shift)
+        shift += part['texto_offsets'][-1]
+    columns['texto_offsets'] = np.concatenate(offsets)
+    columns['texto_bytes'] = np.concatenate([part['texto_bytes'] for part in parts])
+    return columns
+
+def _take(columns, rows):
+    """Quedarse con las filas indicadas (en orden), incluido el búfer de textos."""
+    taken = {name: columns[name][rows] for name in COLUMN_TYPES}
+    starts = columns['texto_offsets'][rows]
+    lengths = columns['texto_offsets'][rows + 1] - starts
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    # Posición de origen de cada byte: inicio de su fila + posición dentro de la fila
+    source = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1], dtype=np.int64)
+    taken['texto_offsets'] = offsets
+    taken['texto_bytes'] = columns['texto_bytes'][source]
+    return taken
+
+def _text(columns, row):
+    start, end = columns['texto_offsets'][row], columns['texto_offsets'][row + 1]
+    return columns['texto_bytes'][start:end].tobytes().decode('utf-8', errors='replace')
+
+def _parse_dates(values):
+    """Fechas ISO del DOM ('2024-05-01T12:00:00.000Z') como datetime64[ms] UTC; NaT si no se pueden leer."""
+    cleaned = [value[:-1] if value.endswith('Z') else value for value in values]
+    try:
+        return np.array(cleaned, dtype='datetime64[ms]')
+    except ValueError:
+        pass
+    dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ms]')
+    for i, value in enumerate(values):
+        try:
+            parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        dates[i] = np.datetime64(parsed, 'ms')
+    return dates
+
+def _int_array(values):
+    try:
+        return np.array([value or 0 for value in values], dtype=np.int64)
+    except (TypeError, ValueError):
+        pass
+    result = np.zeros(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        try:
+            result[i] = int(float(value or 0))
+        except (TypeError, ValueError):
+            pass
+    return result
+
+def _bool_array(values):
+    return np.array([value if isinstance(value, bool) else str(value).lower() in ('true', '1') for value in values],
+                    dtype=np.bool_)
+
+def _group_bounds(sorted_groups, n_groups):
+    counts = np.bincount(sorted_groups, minlength=n_groups)
+    ends = np.cumsum(counts)
+    return counts, ends - counts, ends
+
+def _group_median(groups, values, n_groups):
+    """Mediana de values por grupo (NaN en los grupos vacíos)."""
+    order = np.lexsort((values, groups))
+    counts, starts, _ = _group_bounds(groups[order], n_groups)
+    sorted_values = values[order].astype(np.float64)
+    medians = np.full(n_groups, np.nan)
+    has = counts > 0
+    low = starts[has] + (counts[has] - 1) // 2
+    high = starts[has] + counts[has] // 2
+    medians[has] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+def _period_start(fecha, period):
+    """Inicio del periodo de cada fecha (sin NaT): día, semana (lunes) o mes."""
+    days = fecha.astype('datetime64[D]')
+    if period == 'dia':
+        return days
+    if period == 'semana':
+        day_numbers = days.view(np.int64)
+        # El 1970-01-01 fue jueves: (días + 3) % 7 es el día de la semana con lunes = 0
+        return (day_numbers - (day_numbers + 3) % 7).view('datetime64[D]')
+    if period == 'mes':
+        return fecha.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Periodo no válido: {period} (use {', '.join(PERIODS)})")
+
+def _aggregate(columns, rows, groups, n_groups):
+    """Agregados de interacción y ritmo de las filas rows agrupadas por groups (0..n_groups-1)."""
+    metrics = {field: columns[field][rows] for field in INT_FIELDS}
+    interactions = sum(metrics.values())
+    media = columns['tiene_media'][rows]
+    tweets = np.bincount(groups, minlength=n_groups)
+    result = {'tweets': tweets}
+    for field, values in metrics.items():
+        result[field] = np.bincount(groups, weights=values, minlength=n_groups).astype(np.int64)
+    total = np.bincount(groups, weights=interactions, minlength=n_groups)
+    result['interacciones'] = total.astype(np.int64)
+    with_media = np.bincount(groups[media], minlength=n_groups)
+    without_media = tweets - with_media
+    interactions_media = np.bincount(groups[media], weights=interactions[media], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result['tasa_interaccion'] = total / tweets
+        result['mediana_interacciones'] = _group_median(groups, interactions, n_groups)
+        result['mediana_me_gusta'] = _group_median(groups, metrics['me_gusta'], n_groups)
+        result['tweets_con_media'] = with_media
+        result['efecto_media'] = (interactions_media / with_media) / ((total - interactions_media) / without_media)
+
+    # Ritmo: primeras y últimas fechas y separación entre tweets consecutivos del grupo
+    fecha = columns['fecha'][rows]
+    dated = ~np.isnat(fecha)
+    dated_groups = groups[dated]
+    ms = fecha[dated].view(np.int64)
+    order = np.lexsort((ms, dated_groups))
+    sorted_groups, sorted_ms = dated_groups[order], ms[order]
+    counts, starts, ends = _group_bounds(sorted_groups, n_groups)
+    has = counts > 0
+    first = np.full(n_groups, np.datetime64('NaT'), dtype='datetime64[ms]')
+    last = first.copy()
+    first[has] = sorted_ms[starts[has]].view('datetime64[ms]')
+    last[has] = sorted_ms[ends[has] - 1].view('datetime64[ms]')
+    result['primer_tweet'] = first
+    result['ultimo_tweet'] = last
+    span_days = np.maximum((last - first).view(np.int64) / MS_PER_DAY, 1.0)
+    with np.errstate(invalid='ignore'):
+        result['tweets_por_semana'] = np.where(has, counts / span_days * 7, np.nan)
+    same_group = sorted_groups[1:] == sorted_groups[:-1]
+    gaps = np.diff(sorted_ms)[same_group] / MS_PER_HOUR
+    result['mediana_horas_entre_tweets'] = _group_median(sorted_groups[1:][same_group], gaps, n_groups)
+    return result
+
+class EngagementAnalytics:
+    """
+    Columnas de todos los tweets de output_dir con caché incremental en disco.
+    update() incorpora los archivos nuevos; account_summary(), period_summary()
+    y top_tweets() devuelven tablas como dict de columna -> arreglo numpy.
+    """
+
+    def __init__(self, output_dir='twitter_data', cache_dir=None):
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir or os.path.join(output_dir, CACHE_DIRNAME)
+        self.accounts = []
+        self._account_codes = {}
+        self.sources = {}
+        self._next_source = 0
+        self.columns = _empty_columns()
+        self._latest = None
+        self._load_cache()
+
+    # Caché
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.cache_dir, COLUMNS_FILE)
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with np.load(self.cache_path) as data:
+                manifest = json.loads(str(data['manifiesto']))
+                if manifest.get('version') != CACHE_VERSION:
+                    print("La caché de analítica es de otra versión; se reconstruye")
+                    return
+                columns = {name: data[name] for name in list(COLUMN_TYPES) + ['texto_offsets', 'texto_bytes']}
+                accounts = data['cuentas'].tolist()
+        except Exception as e:
+            print(f"No se pudo leer la caché de analítica {self.cache_path}: {e}")
+            return
+        self.columns = columns
+        self.accounts = accounts
+        self._account_codes = {account: code for code, account in enumerate(accounts)}
+        self.sources = manifest['fuentes']
+        self._next_source = manifest['siguiente']
+
+    def _save_cache(self):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        manifest = {'version': CACHE_VERSION, 'fuentes': self.sources, 'siguiente': self._next_source}
+        # El manifiesto va dentro del mismo archivo: columnas y archivos leídos se reemplazan juntos
+        tmp_path = os.path.join(self.cache_dir, f".{COLUMNS_FILE}.tmp.npz")
+        np.savez(tmp_path, cuentas=np.array(self.accounts, dtype=str), manifiesto=np.array(json.dumps(manifest)),
+                 **self.columns)
+        os.replace(tmp_path, self.cache_path)
+
+    # Lectura de las salidas
+
+    def _scan_sources(self):
+        """Archivos de tweets de output_dir: {ruta relativa: [mtime_ns, tamaño]}."""
+        sources = {}
+        if not os.path.isdir(self.output_dir):
+            return sources
+        for entry in os.scandir(self.output_dir):
+            if (entry.is_file() and entry.name.endswith(('.csv', '.jsonl'))
+                    and not entry.name.startswith(NON_TWEET_PREFIXES)):
+                stat = entry.stat()
+                sources[entry.name] = [stat.st_mtime_ns, stat.st_size]
+        from_dataset = os.path.join(self.output_dir, 'dataset')
+        for directory, _, names in os.walk(from_dataset):
+            for name in names:
+                if name.endswith('.parquet') and not name.startswith('.'):
+                    path = os.path.join(directory, name)
+                    stat = os.stat(path)
+                    sources[os.path.relpath(path, self.output_dir)] = [stat.st_mtime_ns, stat.st_size]
+        return sources
+
+    def _account_code(self, account):
+        code = self._account_codes.get(account)
+        if code is None:
+            code = self._account_codes[account] = len(self.accounts)
+            self.accounts.append(account)
+        return code
+
+    def _build_columns(self, accounts, urls, texts, dates, media, metrics, extraido, source_id):
+        columns = {
+            'cuenta': np.array([self._account_code(account) for account in accounts], dtype=np.int32),
+            'status_id': np.array([int(status_id_from_url(url) or -1) for url in urls], dtype=np.int64),
+            'fecha': dates,
+            'tiene_media': media,
+            'extraido': np.full(len(urls), extraido, dtype='datetime64[ms]'),
+            'fuente': np.full(len(urls), source_id, dtype=np.int32)
+        }
+        columns.update(metrics)
+        columns['texto_offsets'], columns['texto_bytes'] = _encode_texts(texts)
+        return columns
+
+    def _read_columns(self, values, extraido, source_id):
+        """Bloque de columnas a partir de listas de valores por campo (como vienen del CSV o JSONL)."""
+        keep = [i for i, url in enumerate(values['url']) if url]
+        if not keep:
+            return _empty_columns()
+        if len(keep) < len(values['url']):
+            values = {name: [column[i] for i in keep] for name, column in values.items()}
+        urls = values['url']
+        accounts = [account or url.rstrip('/').split('/')[-3] for account, url in zip(values['cuenta'], urls)]
+        return self._build_columns(
+            accounts, urls, values['texto'], _parse_dates([str(fecha or "") for fecha in values['fecha']]),
+            _bool_array(values['tiene_media']), {field: _int_array(values[field]) for field in INT_FIELDS},
+            extraido, source_id)
+
+    def _read_csv(self, path, extraido, source_id):
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header or 'url' not in header:
+                return _empty_columns()
+            # Transponer a columnas: zip es mucho más rápido que un dict por fila
+            rows = [row for row in reader if len(row) == len(header)]
+        columns = dict(zip(header, zip(*rows))) if rows else {}
+        return self._read_columns({name: list(columns.get(name, [""] * len(rows))) for name in READ_FIELDS},
+                                  extraido, source_id)
+
+    def _read_jsonl(self, path, extraido, source_id):
+        records = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Línea cortada por una interrupción
+        return self._read_columns({name: [record.get(name) for record in records] for name in READ_FIELDS},
+                                  extraido, source_id)
+
+    def _read_parquet(self, path, source_id):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from tweet_dataset import FILE_SCHEMA
+
+        account = next((part[len('cuenta='):] for part in path.split(os.sep) if part.startswith('cuenta=')), 'unknown')
+        table = pq.read_table(path, schema=FILE_SCHEMA)
+        n = table.num_rows
+
+        def timestamps(name):
+            return table.column(name).cast(pa.timestamp('ms')).to_numpy(zero_copy_only=False).astype('datetime64[ms]')
+
+        columns = {
+            'cuenta': np.full(n, self._account_code(account), dtype=np.int32),
+            'status_id': table.column('status_id').fill_null(-1).to_numpy().astype(np.int64),
+            'fecha': timestamps('fecha'),
+            'tiene_media': table.column('tiene_media').fill_null(False).to_numpy(zero_copy_only=False).astype(np.bool_),
+            'extraido': timestamps('extraido'),
+            'fuente': np.full(n, source_id, dtype=np.int32)
+        }
+        for field in INT_FIELDS:
+            columns[field] = table.column(field).fill_null(0).to_numpy().astype(np.int64)
+        columns['texto_offsets'], columns['texto_bytes'] = _encode_texts(table.column('texto').to_pylist())
+        return columns
+
+    def _read_source(self, name, source_id, mtime_ns):
+        path = os.path.join(self.output_dir, name)
+        if name.endswith('.parquet'):
+            return self._read_parquet(path, source_id)
+        # En CSV y JSONL la fecha de extracción es la del archivo
+        extraido = np.datetime64(mtime_ns // 1000000, 'ms')
+        if name.endswith('.jsonl'):
+            return self._read_jsonl(path, extraido, source_id)
+        return self._read_csv(path, extraido, source_id)
+
+    def update(self):
+        """
+        Incorporar los archivos nuevos o modificados y quitar los borrados.
+        Devuelve cuántos archivos se leyeron y descartaron y cuántas filas hay.
+        """
+        current = self._scan_sources()
+        changed = [name for name, signature in current.items()
+                   if name not in self.sources or self.sources[name]['firma'] != signature]
+        removed = [name for name in self.sources if name not in current or name in changed]
+        if removed:
+            stale = np.array([self.sources[name]['id'] for name in removed], dtype=np.int32)
+            self.columns = _take(self.columns, np.flatnonzero(~np.isin(self.columns['fuente'], stale)))
+            for name in removed:
+                del self.sources[name]
+        parts = []
+        for name in sorted(changed):
+            source_id = self._next_source
+            self._next_source += 1
+            try:
+                part = self._read_source(name, source_id, current[name][0])
+            except Exception as e:
+                # Se reintenta en el próximo update()
+                print(f"No se pudo leer {name}: {e}")
+                continue
+            self.sources[name] = {'id': source_id, 'firma': current[name], 'filas': len(part['fuente'])}
+            parts.append(part)
+        if parts:
+            self.columns = _concat([self.columns] + parts)
+        if removed or parts:
+            self._save_cache()
+            self._latest = None
+        return {
+            'archivos_leidos': len(parts),
+            'archivos_descartados': len([name for name in removed if name not in changed]),
+            'filas': len(self.columns['fuente']),
+            'tweets': len(self.latest_rows())
+        }
+
+    # Análisis
+
+    def latest_rows(self):
+        """Índices de las filas vigentes: la extracción más reciente de cada (cuenta, status_id)."""
+        if self._latest is None:
+            columns = self.columns
+            order = np.lexsort((columns['extraido'].view(np.int64), columns['status_id'], columns['cuenta']))
+            status_ids, accounts = columns['status_id'][order], columns['cuenta'][order]
+            last = np.ones(len(order), dtype=np.bool_)
+            last[:-1] = (status_ids[1:] != status_ids[:-1]) | (accounts[1:] != accounts[:-1])
+            # Las filas sin status id no se pueden deduplicar
+            self._latest = np.sort(order[last | (status_ids < 0)])
+        return self._latest
+
+    def _rows(self, since=None, until=None):
+        rows = self.latest_rows()
+        fecha = self.columns['fecha'][rows]
+        if since is not None:
+            rows = rows[fecha >= np.datetime64(since, 'ms')]
+            fecha = self.columns['fecha'][rows]
+        if until is not None:
+            rows = rows[fecha < np.datetime64(until, 'ms')]
+        return rows
+
+    def account_summary(self, since=None, until=None):
+        """Agregados por cuenta (since <= fecha < until si se indican)."""
+        rows = self._rows(since, until)
+        codes, groups = np.unique(self.columns['cuenta'][rows], return_inverse=True)
+        table = {'cuenta': np.array([self.accounts[code] for code in codes], dtype=object)}
+        table.update(_aggregate(self.columns, rows, groups, len(codes)))
+        return table
+
+    def period_summary(self, period='mes', since=None, until=None):
+        """Agregados por cuenta y periodo ('dia', 'semana' o 'mes'); los tweets sin fecha se omiten."""
+        rows = self._rows(since, until)
+        rows = rows[~np.isnat(self.columns['fecha'][rows])]
+        starts = _period_start(self.columns['fecha'][rows], period)
+        keys = (self.columns['cuenta'][rows].astype(np.int64) << 32) + (starts.view(np.int64) + 2 ** 31)
+        unique_keys, groups = np.unique(keys, return_inverse=True)
+        table = {
+            'cuenta': np.array([self.accounts[code] for code in unique_keys >> 32], dtype=object),
+            'periodo': ((unique_keys & (2 ** 32 - 1)) - 2 ** 31).view('datetime64[D]')
+        }
+        table.update(_aggregate(self.columns, rows, groups, len(unique_keys)))
+        return table
+
+    def top_tweets(self, n=TOP_TWEETS, since=None, until=None):
+        """Los n tweets con más interacciones de cada cuenta (empates por me_gusta)."""
+        rows = self._rows(since, until)
+        columns = self.columns
+        accounts = columns['cuenta'][rows]
+        interactions = sum(columns[field][rows] for field in INT_FIELDS)
+        order = np.lexsort((-columns['me_gusta'][rows], -interactions, accounts))
+        sorted_accounts = accounts[order]
+        _, starts, _ = _group_bounds(sorted_accounts, len(self.accounts))
+        rank = np.arange(len(order)) - starts[sorted_accounts]
+        keep = order[rank < n]
+        selected = rows[keep]
+        table = {
+            'cuenta': np.array([self.accounts[code] for code in columns['cuenta'][selected]], dtype=object),
+            'posicion': rank[rank < n] + 1,
+            'status_id': columns['status_id'][selected],
+            'fecha': columns['fecha'][selected],
+            'interacciones': interactions[keep]
+        }
+        for field in INT_FIELDS:
+            table[field] = columns[field][selected]
+        table['tiene_media'] = columns['tiene_media'][selected]
+        table['url'] = np.array([f"https://x.com/{account}/status/{status_id}" if status_id >= 0 else ""
+                                 for account, status_id in zip(table['cuenta'], table['status_id'])], dtype=object)
+        table['texto'] = np.array([_text(columns, row) for row in selected], dtype=object)
+        return table
+
+    # Informes
+
+    def write_reports(self, period='mes', top=TOP_TWEETS, since=None, until=None):
+        """Escribir analitica_cuentas.csv, analitica_{periodo}.csv y analitica_top.csv en output_dir."""
+        paths = [
+            write_table(os.path.join(self.output_dir, 'analitica_cuentas.csv'), self.account_summary(since, until)),
+            write_table(os.path.join(self.output_dir, f"analitica_{period}.csv"),
+                        self.period_summary(period, since, until)),
+            write_table(os.path.join(self.output_dir, 'analitica_top.csv'), self.top_tweets(top, since, until))
+        ]
+        print(f"Analítica guardada en {', '.join(paths)}")
+        return paths
+
+    def print_summary(self, since=None, until=None):
+        table = self.account_summary(since, until)
+        print(f"{'cuenta':<24} {'tweets':>8} {'interacc.':>12} {'por tweet':>10} {'mediana':>9} "
+              f"{'efecto media':>13} {'tweets/sem':>11}")
+        for i in np.argsort(-table['interacciones'], kind='stable'):
+            print(f"{table['cuenta'][i]:<24} {table['tweets'][i]:>8} {table['interacciones'][i]:>12} "
+                  f"{_format(table['tasa_interaccion'][i]):>10} {_format(table['mediana_interacciones'][i]):>9} "
+                  f"{_format(table['efecto_media'][i]):>13} {_format(table['tweets_por_semana'][i]):>11}")
+
+def _format(value):
+    if isinstance(value, (float, np.floating)):
+        return "" if np.isnan(value) else f"{value:.2f}"
+    if isinstance(value, np.datetime64):
+        return "" if np.isnat(value) else str(value)
+    if isinstance(value, np.bool_):
+        return str(bool(value))
+    return str(value)
+
+def write_table(path, table):
+    """Guardar una tabla (dict de columna -> arreglo) como CSV, de forma atómica."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(table))
+        for values in zip(*table.values()):
+            writer.writerow([_format(value) for value in values])
+    os.replace(tmp_path, path)
+    return path
+
+def summarize(output_dir='twitter_data', period='mes', top=TOP_TWEETS, since=None, until=None):
+    """Actualizar la caché de output_dir, imprimir el resumen por cuenta y escribir los informes."""
+    analytics = EngagementAnalytics(output_dir)
+    update = analytics.update()
+    print(f"Analítica: {update['archivos_leidos']} archivos nuevos, {update['tweets']} tweets distintos "
+          f"({update['filas']} filas)")
+    analytics.print_summary(since, until)
+    analytics.write_reports(period, top, since, until)
+    return analytics
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados de interacción de las extracciones guardadas")
+    parser.add_argument('output_dir', nargs='?', default='twitter_data')
+    parser.add_argument('--periodo', default='mes', choices=PERIODS)
+    parser.add_argument('--top', type=int, default=TOP_TWEETS)
+    parser.add_argument('--since', help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Fecha final, excluida (YYYY-MM-DD)")
+    args = parser.parse_args()
+    summarize(args.output_dir, args.periodo, args.top, args.since, args.until)
+
+if __name__ == "__main__":
+    main()
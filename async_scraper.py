@@ -0,0 +1,429 @@
+"""
+API asyncio para raspar varias cuentas con varias sesiones de navegador a la vez.
+
+Cada sesión es un chromedriver propio manejado con async_webdriver.AsyncWebDriver,
+un cliente WebDriver asíncrono: cada comando es una petición HTTP que espera el
+bucle de eventos, así que las cargas de página y los scrolls de todas las
+sesiones avanzan a la vez sin un hilo por navegador. La lógica de extracción
+(filtros de fecha, índice de tweets, instrumentación) es la de un
+TwitterScraper creado sin navegador, y el timeline se recorre con la
+extracción por lotes (o por instantánea con extraction_mode='snapshot'). Las
+pausas fijas entre cuentas se reemplazan por un limitador de tasa por host
+compartido por todas las sesiones, y los tweets se entregan como un iterador
+asíncrono a medida que se extraen:
+
+    async with AsyncTwitterScraper(sessions=3, headless=True) as scraper:
+        async for tweet in scraper.scrape(urls, num_tweets=50):
+            await guardar(tweet)
+
+El modo red, el historial profundo y el ritmo adaptativo (pacer) dependen del
+cliente bloqueante de Selenium y no se admiten aquí.
+"""
+import time
+import random
+import asyncio
+from collections import deque
+from urllib.parse import urlparse
+
+from async_webdriver import AsyncWebDriver
+from rate_limit import HostRateLimiter
+from sinks import TweetSink
+from tab_multiplexer import PAGE_CHECK_SCRIPT, POLL_INTERVAL
+from twitter_scraper import (TwitterScraper, AccountScrapeError, BATCH_EXTRACT_SCRIPT, SCROLL_AND_WAIT_SCRIPT,
+                             LOGIN_POPUP_CLOSE_SELECTOR, PAGE_READY_SELECTORS, MAX_STALE_SCROLLS,
+                             MAX_ACCOUNT_RETRIES, resolve_date_range)
+
+# Registros en tránsito entre las sesiones y el consumidor antes de frenar a las sesiones
+QUEUE_SIZE = 200
+
+_DONE = object()
+
+CLOSE_LOGIN_POPUP_SCRIPT = """
+const button = document.querySelector(arguments[0]);
+if (!button) return false;
+button.click();
+return true;
+"""
+
+POPUP_GONE_SCRIPT = "return !document.querySelector(arguments[0]);"
+
+class QueueSink(TweetSink):
+    """
+    Sink que pasa los tweets de una sesión a una asyncio.Queue. write() los
+    aparta y drain() los encola, esperando si la cola está llena
+    (contrapresión). Cuando el consumidor deja de leer (stop_event) los tweets
+    se descartan.
+    """
+
+    def __init__(self, queue, stop_event):
+        super().__init__()
+        self.path = "<asyncio.Queue>"
+        self._queue = queue
+        self._stop_event = stop_event
+        self._pending = deque()
+
+    def _write(self, record):
+        if self._stop_event.is_set():
+            return
+        self._pending.append(record)
+
+    async def drain(self):
+        """Encolar los tweets apartados. Devuelve cuántos llegaron a la cola."""
+        delivered = 0
+        while self._pending and not self._stop_event.is_set():
+            await self._queue.put(self._pending.popleft())
+            delivered += 1
+        self._pending.clear()
+        return delivered
+
+class _AsyncSession:
+    """Un navegador: un AsyncWebDriver y un TwitterScraper sin navegador para la lógica de extracción."""
+
+    def __init__(self, number, scraper, chromedriver=None):
+        self.number = number
+        self.scraper = scraper
+        self.chromedriver = chromedriver
+        self.driver = None
+        self.mode = None
+
+    def _count_command(self):
+        self.scraper.command_count += 1
+
+    async def start(self):
+        scraper = self.scraper
+        driver = AsyncWebDriver(executable=self.chromedriver, on_command=self._count_command)
+        await driver.start()
+        try:
+            await driver.new_session(scraper._chrome_options().to_capabilities())
+            # Las esperas asíncronas necesitan un margen sobre su propio tiempo máximo
+            await driver.set_script_timeout(scraper.wait_timeout + 5)
+        except Exception:
+            await driver.quit()
+            raise
+        try:
+            for command, params in scraper._cdp_setup_commands():
+                await driver.execute_cdp_cmd(command, params)
+        except Exception as e:
+            print(f"[Sesión {self.number}] No se pudo configurar el bloqueo de recursos: {e}")
+        self.driver = driver
+        return self
+
+    async def close(self):
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            await driver.quit()
+        self.scraper.close()
+
+    async def restart(self):
+        print(f"[Sesión {self.number}] Reiniciando el navegador")
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            await driver.quit()
+        await self.start()
+
+    async def is_alive(self):
+        if self.driver is None:
+            return False
+        try:
+            await self.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    async def _throttle(self, url):
+        """Esperar una ficha del limitador de tasa del host sin bloquear el bucle de eventos."""
+        if self.scraper.rate_limiter is None:
+            return
+        waited = await self.scraper.rate_limiter.acquire_async(url)
+        if waited > 0:
+            self.scraper._record_wait('limite_tasa', waited)
+
+    async def _wait_for(self, script, args, timeout):
+        """Repetir un script de comprobación hasta que devuelva algo o venza timeout. Devuelve su valor."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                value = await self.driver.execute_script(script, *args)
+            except Exception as e:
+                self.scraper._log(f"[Sesión {self.number}] Error al comprobar la página: {e}")
+                value = None
+            if value or time.monotonic() >= deadline:
+                return value
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _close_login_popup(self):
+        """Cerrar la ventana emergente de inicio de sesión si aparece y esperar a que desaparezca."""
+        try:
+            if not await self.driver.execute_script(CLOSE_LOGIN_POPUP_SCRIPT, LOGIN_POPUP_CLOSE_SELECTOR):
+                return False
+        except Exception:
+            return False
+        self.scraper._log(f"[Sesión {self.number}] Ventana emergente cerrada")
+        if not await self._wait_for(POPUP_GONE_SCRIPT, (LOGIN_POPUP_CLOSE_SELECTOR,), self.scraper.wait_timeout):
+            print(f"[Sesión {self.number}] La ventana emergente sigue visible")
+        return True
+
+    async def _load_timeline(self, url):
+        """Cargar una página de timeline y esperar a que aparezcan tweets. Devuelve si se cargó."""
+        scraper = self.scraper
+        scraper._current_url = url
+        await self._throttle(url)
+        expected_path = urlparse(url).path.rstrip('/').lower()
+        with scraper.instrumentation.timer('carga_pagina'):
+            started = time.perf_counter()
+            await self.driver.get(url)
+            print(f"[Sesión {self.number}] Accediendo a: {url}")
+            ready = await self._wait_for(PAGE_CHECK_SCRIPT, (PAGE_READY_SELECTORS, expected_path),
+                                         scraper.wait_timeout * len(PAGE_READY_SELECTORS))
+            scraper._record_wait('carga_pagina', time.perf_counter() - started)
+        if not ready or ready.get('login'):
+            print(f"[Sesión {self.number}] No se pudo cargar {url}{' (X pide iniciar sesión)' if ready else ''}")
+            return False
+        await self._close_login_popup()
+        return True
+
+    async def _harvest_raw_records(self, account_handle):
+        """Registros crudos de los tweets renderizados ahora en el DOM."""
+        scraper = self.scraper
+        if self.mode == "lotes":
+            try:
+                records = await self.driver.execute_script(BATCH_EXTRACT_SCRIPT)
+                if isinstance(records, list):
+                    return records
+            except Exception as e:
+                print(f"[Sesión {self.number}] Error en la extracción por lotes: {e}")
+            # Sin Selenium no hay ruta por elemento: el respaldo es parsear el HTML
+            print(f"[Sesión {self.number}] La extracción por lotes falló, usando la instantánea de la página")
+            self.mode = "instantánea"
+        from snapshot_parser import extract_raw_records
+
+        page_source = await self.driver.page_source()
+        if scraper.snapshot_dir:
+            scraper.save_snapshot(page_source, account_handle)
+        return extract_raw_records(page_source)
+
+    async def _scroll(self):
+        """Scroll hasta el final y esperar celdas nuevas; después, la pausa de cortesía."""
+        scraper = self.scraper
+        await self._throttle(scraper._current_url)
+        started = time.perf_counter()
+        try:
+            result = await self.driver.execute_async_script(SCROLL_AND_WAIT_SCRIPT, int(scraper.wait_timeout * 1000))
+            changed = bool(result and result.get('changed'))
+        except Exception as e:
+            print(f"[Sesión {self.number}] Error en la espera scroll: {e}")
+            changed = False
+        scraper._record_wait('scroll', time.perf_counter() - started)
+        await self._close_login_popup()
+        if scraper.polite_floor > 0:
+            await asyncio.sleep(random.uniform(scraper.polite_floor * 0.8, scraper.polite_floor * 1.2))
+        return changed
+
+    async def _emit_tweets(self, sink, new_tweets, stop_event):
+        """
+        Como TwitterScraper._emit_tweets, pero solo guarda en el índice los
+        tweets que llegaron a la cola. Devuelve cuántos fueron.
+        """
+        if not new_tweets or stop_event.is_set():
+            return 0
+        sink.write_many(new_tweets)
+        delivered = new_tweets[:await sink.drain()]
+        if delivered and self.scraper.tweet_index is not None:
+            self.scraper.tweet_index.upsert_tweets(delivered)
+        return len(delivered)
+
+    async def _harvest_account(self, url, account_handle, sink, num_tweets, date_range, max_scrolls, stop_event):
+        scraper = self.scraper
+        scraper._prepare_harvest_context(url, account_handle, None)
+        if not await self._load_timeline(url):
+            raise AccountScrapeError(url, 0, "no se pudo cargar la página")
+
+        collected = 0
+        seen_ids = set()
+        stale_scrolls = 0
+        for scroll in range(max_scrolls + 1):
+            if stop_event.is_set():
+                return collected
+            records = await self._harvest_raw_records(account_handle)
+            new_tweets, new_records, reached_cutoff = scraper._process_raw_records(
+                records, seen_ids, account_handle, date_range, num_tweets - collected)
+            collected += await self._emit_tweets(sink, new_tweets, stop_event)
+            scraper._log(f"[Sesión {self.number}] {account_handle}, scroll {scroll}/{max_scrolls}: "
+                         f"{collected}/{num_tweets} recolectados")
+            if reached_cutoff:
+                scraper._harvest_context['complete'] = True
+                break
+            if collected >= num_tweets:
+                break
+            stale_scrolls = stale_scrolls + 1 if new_records == 0 else 0
+            if stale_scrolls >= MAX_STALE_SCROLLS:
+                print(f"[Sesión {self.number}] No aparecen tweets nuevos en {account_handle}, fin del timeline")
+                scraper._harvest_context['complete'] = True
+                break
+            if scroll == max_scrolls:
+                break
+            await self._scroll()
+
+        # Una cuenta abandonada por el consumidor no mueve la marca de agua
+        if scraper.tweet_index is not None and not stop_event.is_set():
+            scraper._complete_indexed_account(url, account_handle, None)
+        return collected
+
+    async def scrape_account_to_sink(self, url, sink, num_tweets, date_range, max_scrolls, stop_event):
+        """
+        Raspar una cuenta enviando los tweets al sink. Devuelve cuántos se
+        enviaron; si la página no carga o la extracción falla lanza
+        AccountScrapeError. Si stop_event se activa, termina en el siguiente paso.
+        """
+        scraper = self.scraper
+        account_handle = scraper.get_account_name(url)
+        scraper.instrumentation.begin_account(account_handle)
+        scraper.wait_timings = {}
+        self.mode = "instantánea" if scraper.extraction_mode == 'snapshot' or not scraper.batch_extraction else "lotes"
+        count_before = sink.count
+        collected = 0
+        try:
+            collected = await self._harvest_account(url, account_handle, sink, num_tweets, date_range, max_scrolls,
+                                                    stop_event)
+            return collected
+        except AccountScrapeError as e:
+            collected = e.tweets
+            raise
+        except Exception as e:
+            collected = sink.count - count_before
+            print(f"[Sesión {self.number}] Error global al raspar cuenta {url}: {e}")
+            raise AccountScrapeError(url, collected, e) from e
+        finally:
+            scraper.instrumentation.end_account(collected, self.mode)
+
+class AsyncTwitterScraper:
+    """
+    Orquestador asíncrono de sessions navegadores. Los parámetros extra
+    (headless, extraction_mode, lean, index_path...) configuran el
+    TwitterScraper sin navegador de cada sesión. chromedriver es la ruta del
+    ejecutable (por defecto, el del PATH). rate_limiter se comparte entre
+    sesiones; si no se indica se crea uno con rate cargas/scrolls por segundo y
+    ráfagas de burst por host.
+    """
+
+    def __init__(self, sessions=2, rate_limiter=None, rate=0.5, burst=2, chromedriver=None, **scraper_kwargs):
+        if scraper_kwargs.get('extraction_mode') == 'network':
+            raise ValueError("El modo red lee el log de rendimiento de Selenium y no admite sesiones asíncronas")
+        if scraper_kwargs.get('deep_history'):
+            raise ValueError("El historial profundo reinicia el navegador con Selenium y no admite sesiones asíncronas")
+        if scraper_kwargs.get('pacer') is not None:
+            raise ValueError("El ritmo adaptativo espera con time.sleep; con sesiones asíncronas se usa rate_limiter")
+        self.sessions = sessions
+        self.rate_limiter = rate_limiter or HostRateLimiter(rate, burst)
+        self.chromedriver = chromedriver
+        scraper_kwargs.setdefault('verbose', False)
+        # El limitador reemplaza la pausa fija entre cuentas
+        scraper_kwargs['account_pause'] = (0, 0)
+        scraper_kwargs['rate_limiter'] = self.rate_limiter
+        self.scraper_kwargs = scraper_kwargs
+        self.browsers = []
+
+    def _new_session(self, number):
+        scraper = TwitterScraper(start_driver=False, **self.scraper_kwargs)
+        if scraper.profile_dir:
+            # Chrome no comparte un perfil entre procesos
+            scraper.profile_dir = f"{scraper.profile_dir}_{number}"
+        return _AsyncSession(number, scraper, self.chromedriver)
+
+    async def start(self):
+        """Abrir las sesiones de navegador a la vez."""
+        first = len(self.browsers) + 1
+        sessions = [self._new_session(number) for number in range(first, self.sessions + 1)]
+        results = await asyncio.gather(*[session.start() for session in sessions], return_exceptions=True)
+        for session, result in zip(sessions, results):
+            if isinstance(result, Exception):
+                print(f"No se pudo iniciar una sesión de navegador: {result}")
+                session.scraper.close()
+            else:
+                self.browsers.append(session)
+        if not self.browsers:
+            raise RuntimeError("No se pudo iniciar ninguna sesión de navegador")
+        return self
+
+    async def close(self):
+        """Cerrar todas las sesiones."""
+        browsers, self.browsers = self.browsers, []
+        await asyncio.gather(*[session.close() for session in browsers], return_exceptions=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _session_loop(self, session, accounts, sink, stop_event, num_tweets, date_range, max_scrolls):
+        while not stop_event.is_set():
+            try:
+                url, attempt = accounts.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await session.scrape_account_to_sink(url, sink, num_tweets, date_range, max_scrolls, stop_event)
+            except Exception as e:
+                print(f"[Sesión {session.number}] Fallo al raspar {url}: {e}")
+                if attempt < MAX_ACCOUNT_RETRIES:
+                    accounts.put_nowait((url, attempt + 1))
+                else:
+                    print(f"[Sesión {session.number}] Se descarta {url} tras {attempt + 1} intentos")
+            if stop_event.is_set():
+                return
+            if not await session.is_alive():
+                try:
+                    await session.restart()
+                except Exception as restart_error:
+                    print(f"[Sesión {session.number}] No se pudo reiniciar el navegador: {restart_error}")
+                    return
+
+    async def scrape(self, account_urls, num_tweets=20, since=None, until=None, max_scrolls=None):
+        """
+        Iterador asíncrono de los tweets (mismos diccionarios que scrape_account)
+        de todas las cuentas, en el orden en que se extraen.
+        """
+        if not self.browsers:
+            await self.start()
+        date_range = resolve_date_range(since, until)
+        if max_scrolls is None:
+            max_scrolls = max(7, num_tweets)
+
+        accounts = asyncio.Queue()
+        for url in account_urls:
+            accounts.put_nowait((url, 0))
+        records = asyncio.Queue(maxsize=QUEUE_SIZE)
+        stop_event = asyncio.Event()
+
+        async def run_sessions():
+            try:
+                await asyncio.gather(*[
+                    self._session_loop(session, accounts, QueueSink(records, stop_event), stop_event, num_tweets,
+                                       date_range, max_scrolls)
+                    for session in self.browsers])
+            finally:
+                await records.put(_DONE)
+
+        runner = asyncio.create_task(run_sessions())
+        try:
+            while True:
+                record = await records.get()
+                if record is _DONE:
+                    break
+                yield record
+        finally:
+            # Si el consumidor deja de leer, las sesiones terminan la cuenta en curso en su siguiente paso
+            stop_event.set()
+            while not runner.done():
+                try:
+                    records.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.05)
+            await runner
+
+async def scrape_accounts_async(account_urls, num_tweets=20, since=None, until=None, sessions=2, **kwargs):
+    """Atajo: abrir las sesiones, entregar los tweets de todas las cuentas y cerrarlas."""
+    async with AsyncTwitterScraper(sessions=sessions, **kwargs) as scraper:
+        async for record in scraper.scrape(account_urls, num_tweets, since, until):
+            yield record
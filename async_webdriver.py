@@ -0,0 +1,218 @@
+"""
+Cliente WebDriver (protocolo W3C) sobre asyncio para una sesión de chromedriver.
+
+El cliente de Selenium es bloqueante: cada comando ocupa el hilo que lo envía
+hasta que llega la respuesta. AsyncWebDriver envía los mismos comandos HTTP
+con los streams de asyncio por una conexión persistente, así que mientras el
+navegador carga una página o espera un scroll el bucle de eventos atiende a
+las demás sesiones, sin un hilo por navegador. Solo implementa los comandos
+que usa async_scraper (navegar, ejecutar scripts, CDP, código fuente).
+
+    driver = AsyncWebDriver()                    # lanza chromedriver del PATH
+    await driver.start()
+    await driver.new_session(options.to_capabilities())
+    await driver.get('https://x.com/BurgerKingMX')
+    cells = await driver.execute_script("return document.querySelectorAll('article').length;")
+    await driver.quit()
+
+Con url se usa un chromedriver (o un servidor WebDriver) ya en marcha en lugar
+de lanzar uno.
+"""
+import json
+import time
+import shutil
+import socket
+import asyncio
+from urllib.parse import urlparse
+
+# Segundos que se espera a que chromedriver acepte conexiones
+STARTUP_TIMEOUT = 20
+
+class WebDriverError(Exception):
+    """Respuesta de error del servidor WebDriver (error y message del protocolo W3C)."""
+
+    def __init__(self, error, message="", status=None):
+        super().__init__(f"{error}: {message}" if message else error)
+        self.error = error
+        self.message = message
+        self.status = status
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class AsyncWebDriver:
+    """
+    Una sesión WebDriver. executable es la ruta de chromedriver (por defecto,
+    el del PATH); on_command se llama con cada comando enviado, para contar
+    los viajes de ida y vuelta como TwitterScraper.command_count.
+    """
+
+    def __init__(self, url=None, executable=None, on_command=None, startup_timeout=STARTUP_TIMEOUT):
+        self.url = url
+        self.executable = executable
+        self.on_command = on_command
+        self.startup_timeout = startup_timeout
+        self.session_id = None
+        self.capabilities = {}
+        self.process = None
+        self.command_count = 0
+        self._reader = None
+        self._writer = None
+        # Una conexión HTTP atiende una petición a la vez
+        self._lock = asyncio.Lock()
+
+    @property
+    def pid(self):
+        """PID del chromedriver lanzado por este cliente (None si se usa url)."""
+        return self.process.pid if self.process is not None else None
+
+    async def start(self):
+        """Lanzar chromedriver en un puerto libre (salvo que se indicara url) y esperar a que responda."""
+        if self.url is None:
+            executable = self.executable or shutil.which('chromedriver')
+            if not executable:
+                raise RuntimeError("No se encontró chromedriver; indique su ruta o agréguelo al PATH")
+            port = _free_port()
+            self.process = await asyncio.create_subprocess_exec(
+                executable, f"--port={port}",
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                status = await self._request('GET', '/status')
+                if (status or {}).get('ready', True):
+                    return self
+            except (OSError, WebDriverError):
+                pass
+            if time.monotonic() >= deadline:
+                await self.quit()
+                raise RuntimeError(f"chromedriver no respondió en {self.startup_timeout}s")
+            await asyncio.sleep(0.1)
+
+    async def _connect(self):
+        parsed = urlparse(self.url)
+        self._reader, self._writer = await asyncio.open_connection(parsed.hostname, parsed.port or 80)
+
+    async def _disconnect(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _read_response(self):
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("el servidor WebDriver cerró la conexión")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self._disconnect()
+        return status, body
+
+    async def _request(self, method, path, payload=None):
+        """Enviar una petición y devolver el campo value de la respuesta."""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        parsed = urlparse(self.url)
+        request = (f"{method} {path} HTTP/1.1\r\nHost: {parsed.netloc}\r\n"
+                   f"Content-Type: application/json;charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+                   f"Connection: keep-alive\r\n\r\n").encode('latin-1') + body
+        async with self._lock:
+            while True:
+                # Una conexión reutilizada puede haberla cerrado el servidor: se reintenta una vez con una nueva
+                reused = self._writer is not None
+                if not reused:
+                    await self._connect()
+                try:
+                    self._writer.write(request)
+                    await self._writer.drain()
+                    status, data = await self._read_response()
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    await self._disconnect()
+                    if not reused:
+                        raise
+        try:
+            value = json.loads(data or b'{}').get('value')
+        except ValueError:
+            raise WebDriverError('respuesta inválida', data[:200].decode('utf-8', errors='replace'), status)
+        if status >= 400 or (isinstance(value, dict) and 'error' in value):
+            value = value if isinstance(value, dict) else {}
+            raise WebDriverError(value.get('error', f"HTTP {status}"), value.get('message', ""), status)
+        return value
+
+    async def command(self, method, path, payload=None):
+        """Comando de la sesión (path relativo a /session/{id})."""
+        if self.session_id is None:
+            raise WebDriverError('invalid session id', "no hay una sesión abierta")
+        self.command_count += 1
+        if self.on_command is not None:
+            self.on_command()
+        return await self._request(method, f"/session/{self.session_id}{path}", payload)
+
+    async def new_session(self, capabilities):
+        """Abrir el navegador con las capacidades indicadas (p. ej. Options.to_capabilities())."""
+        value = await self._request('POST', '/session', {'capabilities': {'alwaysMatch': capabilities}})
+        self.session_id = value['sessionId']
+        self.capabilities = value.get('capabilities', {})
+        return self.session_id
+
+    async def get(self, url):
+        """Navegar a url (la respuesta llega cuando termina la carga del documento)."""
+        await self.command('POST', '/url', {'url': url})
+
+    async def execute_script(self, script, *args):
+        return await self.command('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def execute_async_script(self, script, *args):
+        return await self.command('POST', '/execute/async', {'script': script, 'args': list(args)})
+
+    async def execute_cdp_cmd(self, cmd, params=None):
+        """Comando del protocolo DevTools a través de chromedriver."""
+        return await self.command('POST', '/goog/cdp/execute', {'cmd': cmd, 'params': params or {}})
+
+    async def set_script_timeout(self, seconds):
+        await self.command('POST', '/timeouts', {'script': int(seconds * 1000)})
+
+    async def page_source(self):
+        return await self.command('GET', '/source')
+
+    async def quit(self):
+        """Cerrar la sesión y, si lo lanzó este cliente, chromedriver (se puede llamar varias veces)."""
+        if self.session_id is not None:
+            try:
+                await self._request('DELETE', f"/session/{self.session_id}")
+            except Exception:
+                pass
+            self.session_id = None
+        await self._disconnect()
+        process, self.process = self.process, None
+        if process is not None and process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
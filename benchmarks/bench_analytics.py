@@ -0,0 +1,83 @@
+"""
+Benchmark de analytics.EngagementAnalytics con salidas sintéticas grandes.
+
+Genera archivos CSV por cuenta en un directorio temporal (por defecto 1 millón
+de tweets repartidos en 200 cuentas y 20 ejecuciones), y mide:
+- la primera carga (lectura de todos los CSV y escritura de la caché);
+- la apertura desde la caché sin archivos nuevos;
+- update() cuando llega una ejecución nueva (solo se leen sus archivos);
+- los agregados por cuenta, por cuenta y semana y los tweets principales.
+
+Uso: python benchmarks/bench_analytics.py [tweets] [cuentas]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import EngagementAnalytics
+from sinks import CsvSink
+
+RUNS = 20
+
+def write_run(output_dir, run, accounts, tweets_per_account, rng):
+    """Una ejecución: un CSV por cuenta, con ids que se solapan con la ejecución anterior."""
+    base = np.datetime64('2024-01-01T00:00:00', 's')
+    for account in accounts:
+        ids = np.arange(tweets_per_account) + run * tweets_per_account // 2
+        likes = rng.integers(0, 500, tweets_per_account)
+        with CsvSink(os.path.join(output_dir, f"{account}_{run:04d}.csv"), flush_every=5000, fsync=False) as sink:
+            for status_id, like in zip(ids.tolist(), likes.tolist()):
+                sink.write({
+                    'cuenta': account,
+                    'texto': f"Promoción {status_id} de {account} #combo",
+                    'fecha': str(base + np.timedelta64(status_id * 3600, 's')) + '.000Z',
+                    'url': f"https://x.com/{account}/status/{status_id}",
+                    'comentarios': like // 10,
+                    'retweets': like // 5,
+                    'me_gusta': like,
+                    'compartidos': like // 20,
+                    'tiene_media': status_id % 3 == 0
+                })
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<40} {time.perf_counter() - start:8.2f} s")
+    return result
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_accounts = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    accounts = [f"cuenta{i:04d}" for i in range(n_accounts)]
+    tweets_per_account = max(1, total // (n_accounts * RUNS))
+    rng = np.random.default_rng(0)
+    output_dir = tempfile.mkdtemp(prefix='bench_analitica_')
+    try:
+        start = time.perf_counter()
+        for run in range(RUNS):
+            write_run(output_dir, run, accounts, tweets_per_account, rng)
+        rows = RUNS * n_accounts * tweets_per_account
+        print(f"Generadas {rows} filas en {RUNS * n_accounts} archivos ({time.perf_counter() - start:.1f} s)\n")
+
+        analytics = EngagementAnalytics(output_dir)
+        stats = timed("Primera carga (todos los CSV)", analytics.update)
+        print(f"  {stats['filas']} filas, {stats['tweets']} tweets distintos")
+        analytics = timed("Apertura desde la caché", lambda: EngagementAnalytics(output_dir))
+        timed("update() sin archivos nuevos", analytics.update)
+        write_run(output_dir, RUNS, accounts, tweets_per_account, rng)
+        stats = timed("update() con una ejecución nueva", analytics.update)
+        print(f"  {stats['archivos_leidos']} archivos leídos")
+        timed("Agregados por cuenta", analytics.account_summary)
+        timed("Agregados por cuenta y semana", lambda: analytics.period_summary('semana'))
+        timed("Top 5 por cuenta", lambda: analytics.top_tweets(5))
+    finally:
+        shutil.rmtree(output_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark reproducible de TwitterScraper contra el timeline falso de fake_x_server.
+
+Mide scrape_account y scrape_multiple_accounts con timelines de 20, 200 y 2000
+tweets (virtualizados como en X): tiempo total, comandos WebDriver (viajes de
+ida y vuelta), memoria máxima del navegador y de Python, y tweets por segundo.
+Los resultados se comparan con una línea base guardada en JSON, que también
+registra la máquina y la versión de Chrome con las que se generó: una línea
+base sólo es comparable en el mismo entorno.
+
+Uso:
+    python benchmarks/bench_fake_timeline.py                     # comparar con la línea base
+    python benchmarks/bench_fake_timeline.py --save-baseline     # guardar una nueva línea base
+    python benchmarks/bench_fake_timeline.py --sizes 20 200 --mode network
+    python benchmarks/bench_fake_timeline.py --sizes 10000 --deep            # relleno de historial profundo
+
+La memoria del navegador se mide con TwitterScraper.browser_memory (psutil si
+está instalado, si no /proc y, como último recurso, el heap de JS vía CDP).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_x_server import FakeXServer
+from twitter_scraper import TwitterScraper, AccountScrapeError
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_SIZES = [20, 200, 2000]
+
+# Cuentas del escenario scrape_multiple_accounts
+MULTI_ACCOUNTS = ['BurgerKingMX', 'KFC_MEXICO', 'littlecaesarsmx']
+
+# Métricas comparadas con la línea base: (clave, mayor es mejor)
+COMPARED_METRICS = [
+    ('tiempo_s', False),
+    ('comandos_webdriver', False),
+    ('memoria_navegador_mb', False),
+    ('memoria_python_mb', False),
+    ('tweets_por_s', True)
+]
+
+class MemorySampler:
+    """Muestrear en segundo plano la memoria del navegador y quedarse con el máximo."""
+
+    def __init__(self, scraper, interval=0.25):
+        self.scraper = scraper
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.scraper.browser_memory())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+
+def run_scenario(name, scraper, action):
+    """Ejecutar action() midiendo tiempo, comandos y memoria. action devuelve los tweets extraídos."""
+    commands_before = scraper.command_count
+    tracemalloc.start()
+    with MemorySampler(scraper) as sampler:
+        started = time.perf_counter()
+        tweets = action()
+        elapsed = time.perf_counter() - started
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'tiempo_s': round(elapsed, 3),
+        'comandos_webdriver': scraper.command_count - commands_before,
+        'memoria_navegador_mb': round(sampler.peak / 2 ** 20, 1),
+        'memoria_python_mb': round(python_peak / 2 ** 20, 2),
+        'tweets': tweets,
+        'tweets_por_s': round(tweets / elapsed, 2) if elapsed > 0 else 0.0
+    }
+    print(f"{name}: {result}")
+    return result
+
+def describe_environment(scraper):
+    """Máquina y navegador con los que se ejecuta el benchmark."""
+    capabilities = scraper.driver.capabilities if scraper.driver else {}
+    return {
+        'maquina': platform.node(),
+        'sistema': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'navegador': capabilities.get('browserName'),
+        'version_navegador': capabilities.get('browserVersion'),
+        'version_chromedriver': (capabilities.get('chrome') or {}).get('chromedriverVersion', '').split(' ')[0] or None
+    }
+
+def run_suite(sizes, extraction_mode='live', headless=True, deep_history=False, environment=None):
+    """Ejecutar los escenarios. Si se pasa environment, se rellena con describe_environment."""
+    results = {}
+    # Los escenarios del modo profundo se comparan con su propia línea base
+    suffix = '_profundo' if deep_history else ''
+    for size in sizes:
+        # Un margen de tweets para que el timeline no se agote justo en el límite
+        with FakeXServer(tweets_per_account=size + 20) as server:
+            scraper = TwitterScraper(headless=headless, extraction_mode=extraction_mode, polite_floor=0,
+                                     verbose=False, account_pause=(0, 0), deep_history=deep_history)
+            output_dir = tempfile.mkdtemp(prefix='bench_x_')
+            if environment is not None and not environment:
+                environment.update(describe_environment(scraper))
+            try:
+                def single():
+                    try:
+                        return len(scraper.scrape_account(server.url_for('BurgerKingMX'), size))
+                    except AccountScrapeError as e:
+                        print(f"Extracción incompleta: {e}")
+                        return len(e.records)
+
+                results[f"scrape_account_{size}{suffix}"] = run_scenario(f"scrape_account ({size})", scraper, single)
+
+                urls = [server.url_for(handle) for handle in MULTI_ACCOUNTS]
+
+                def multi():
+                    scraper.scrape_multiple_accounts(urls, output_dir, size)
+                    return sum(account['tweets'] for account in scraper.instrumentation.accounts.values())
+
+                results[f"scrape_multiple_accounts_{size}{suffix}"] = run_scenario(
+                    f"scrape_multiple_accounts ({len(urls)} x {size})", scraper, multi)
+            finally:
+                scraper.close()
+                shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Imprimir la comparación con la línea base. Devuelve las regresiones encontradas."""
+    regressions = []
+    print(f"\n{'escenario':<32} {'métrica':<22} {'base':>10} {'actual':>10} {'cambio':>9}")
+    for scenario, current in results.items():
+        reference = baseline.get(scenario)
+        if not reference:
+            print(f"{scenario:<32} (sin línea base)")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            before, after = reference.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            flag = "  REGRESIÓN" if worse else ""
+            print(f"{scenario:<32} {metric:<22} {before:>10} {after:>10} {change:>+8.1%}{flag}")
+            if worse:
+                regressions.append((scenario, metric, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de TwitterScraper contra un timeline falso local")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--mode', default='live', choices=['live', 'snapshot', 'network'])
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar los resultados como línea base")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Cambio relativo tolerado (0.2 = 20%%)")
+    parser.add_argument('--show-browser', action='store_true')
+    parser.add_argument('--deep', action='store_true', help="Usar el modo de historial profundo")
+    args = parser.parse_args()
+
+    environment = {}
+    results = run_suite(args.sizes, args.mode, headless=not args.show_browser, deep_history=args.deep,
+                        environment=environment)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'entorno': environment, 'escenarios': results}, f, ensure_ascii=False, indent=2)
+        print(f"\nLínea base guardada en {args.baseline} ({environment.get('maquina')}, "
+              f"{environment.get('navegador')} {environment.get('version_navegador')})")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo hay línea base en {args.baseline}; use --save-baseline para crearla")
+        return 2
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    reference_environment = baseline.get('entorno', {})
+    print(f"\nLínea base: {reference_environment.get('maquina')}, "
+          f"{reference_environment.get('navegador')} {reference_environment.get('version_navegador')}")
+    differences = [key for key in ('maquina', 'version_navegador', 'version_chromedriver')
+                   if reference_environment.get(key) != environment.get(key)]
+    if differences:
+        print(f"AVISO: el entorno actual difiere de la línea base en {', '.join(differences)}; "
+              f"las diferencias de tiempo y memoria no son comparables")
+    regressions = compare(results, baseline.get('escenarios', {}), args.tolerance)
+    print(f"\n{len(regressions)} regresiones por encima del {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
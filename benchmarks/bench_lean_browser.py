@@ -0,0 +1,73 @@
+"""
+Comparación del modo ligero (lean=True) con el navegador completo: tiempo de
+carga, bytes transferidos y tweets por segundo raspando la misma cuenta.
+
+Por defecto usa el servidor local fake_x_server (cuyas imágenes /media/*.jpg
+el modo ligero bloquea); con --url se mide contra una cuenta real.
+
+Uso: python benchmarks/bench_lean_browser.py [--url URL] [--tweets N] [--headless]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_x_server import FakeXServer
+from twitter_scraper import TwitterScraper, AccountScrapeError
+
+def measure(url, num_tweets, headless, lean, profile_dir):
+    scraper = TwitterScraper(headless=headless, lean=lean, profile_dir=profile_dir, polite_floor=0)
+    try:
+        started = time.perf_counter()
+        try:
+            tweets = scraper.scrape_account(url, num_tweets)
+        except AccountScrapeError as e:
+            print(f"Extracción incompleta: {e}")
+            tweets = e.records
+        elapsed = time.perf_counter() - started
+        load = scraper.last_extraction_stats.get('carga') or {}
+    finally:
+        scraper.close()
+    return {
+        'modo': "ligero" if lean else "completo",
+        'carga_s': load.get('carga_s') or 0,
+        'kb': (load.get('bytes_transferidos') or 0) / 1024,
+        'recursos': load.get('recursos') or 0,
+        'tweets': len(tweets),
+        'total_s': elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar el modo ligero con el navegador completo")
+    parser.add_argument('--url', help="URL de la cuenta (por defecto, el servidor local)")
+    parser.add_argument('--tweets', type=int, default=60)
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = FakeXServer(tweets_per_account=max(200, args.tweets)).start()
+        url = server.url_for('BurgerKingMX')
+    profile_dir = tempfile.mkdtemp(prefix='perfil_ligero_')
+    try:
+        results = [measure(url, args.tweets, args.headless, False, None),
+                   # La primera pasada precalienta el perfil; la segunda es la que se compara
+                   measure(url, args.tweets, args.headless, True, profile_dir),
+                   measure(url, args.tweets, args.headless, True, profile_dir)]
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        if server:
+            server.stop()
+
+    print(f"\n{'modo':<10} {'carga (s)':>10} {'KB':>10} {'recursos':>9} {'tweets':>7} {'tweets/s':>9}")
+    for result in (results[0], results[2]):
+        print(f"{result['modo']:<10} {result['carga_s']:>10.2f} {result['kb']:>10.0f} {result['recursos']:>9} "
+              f"{result['tweets']:>7} {result['tweets'] / result['total_s']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark y tabla de corrección de metric_parser.extract_number frente a
+la versión anterior (varias re.search y .lower() por etiqueta). Los casos son
+los de tests/test_metric_parser.py.
+
+Uso: python benchmarks/bench_metric_parser.py [repeticiones]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metric_parser import extract_number, extract_numbers, cache_info
+# La tabla de casos vive en las pruebas; aquí se compara además con la versión anterior
+from tests.test_metric_parser import CASES
+
+def legacy_extract_number(text):
+    """Copia de la versión anterior de extract_number, solo para comparar."""
+    if not text:
+        return 0
+    k_pattern = re.search(r'(\d+(?:[.,]\d+)?)[kK]', text)
+    m_pattern = re.search(r'(\d+(?:[.,]\d+)?)[mM]', text)
+    if k_pattern:
+        return int(float(k_pattern.group(1).replace(',', '.')) * 1000)
+    if m_pattern:
+        return int(float(m_pattern.group(1).replace(',', '.')) * 1000000)
+    if 'mil' in text.lower():
+        mil_pattern = re.search(r'(\d+(?:[.,]\d+)?)\s*mil', text.lower())
+        if mil_pattern:
+            return int(float(mil_pattern.group(1).replace(',', '.')) * 1000)
+    if 'millon' in text.lower() or 'millones' in text.lower():
+        mill_pattern = re.search(r'(\d+(?:[.,]\d+)?)\s*millon(?:es)?', text.lower())
+        if mill_pattern:
+            return int(float(mill_pattern.group(1).replace(',', '.')) * 1000000)
+    number_pattern = re.search(r'(\d+(?:[.,]\d+)?)', text)
+    if number_pattern:
+        return int(float(number_pattern.group(1).replace(',', '.')))
+    return 0
+
+# Etiquetas típicas de un timeline: pocas cadenas distintas que se repiten mucho
+WORKLOAD = [label for label, _ in CASES if label] * 500
+
+def correctness_table():
+    print(f"{'etiqueta':<32} {'esperado':>12} {'anterior':>12} {'nuevo':>12}")
+    legacy_ok = new_ok = 0
+    for label, expected in CASES:
+        legacy = legacy_extract_number(label)
+        new = extract_number(label)
+        legacy_ok += legacy == expected
+        new_ok += new == expected
+        marks = ("" if legacy == expected else " (anterior incorrecto)") + ("" if new == expected else " (NUEVO INCORRECTO)")
+        print(f"{label!r:<32} {expected:>12} {legacy:>12} {new:>12}{marks}")
+    print(f"\nCorrectos: anterior {legacy_ok}/{len(CASES)}, nuevo {new_ok}/{len(CASES)}")
+    return new_ok == len(CASES)
+
+def benchmark(repeat):
+    legacy = min(timeit.repeat(lambda: [legacy_extract_number(t) for t in WORKLOAD], number=1, repeat=repeat))
+    single = min(timeit.repeat(lambda: [extract_number(t) for t in WORKLOAD], number=1, repeat=repeat))
+    batch = min(timeit.repeat(lambda: extract_numbers(WORKLOAD), number=1, repeat=repeat))
+    per_label = 1e6 / len(WORKLOAD)
+    print(f"\n{len(WORKLOAD)} etiquetas, mejor de {repeat} repeticiones:")
+    print(f"- anterior:            {legacy * per_label:.3f} µs/etiqueta")
+    print(f"- extract_number:      {single * per_label:.3f} µs/etiqueta ({legacy / single:.1f}x)")
+    print(f"- extract_numbers:     {batch * per_label:.3f} µs/etiqueta ({legacy / batch:.1f}x)")
+    print(f"- caché: {cache_info()}")
+
+if __name__ == "__main__":
+    ok = correctness_table()
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,58 @@
+"""
+Tiempo de arranque de la línea de comandos y de los módulos sin navegador.
+
+Ejecuta cada comando en un proceso nuevo varias veces y muestra el mejor
+tiempo, y comprueba que los subcomandos sin navegador no importan Selenium.
+
+Uso: python benchmarks/bench_startup.py [repeticiones]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK_SELENIUM = "import sys, {module}; print('selenium' in sys.modules)"
+
+# Módulos que no deben cargar Selenium al importarse
+SELENIUM_FREE_MODULES = ['cli', 'tweet_records', 'snapshot_parser', 'scheduler', 'sinks', 'analytics', 'enrichment',
+                         'work_queue', 'tweet_index', 'metric_parser']
+
+def best_time(command, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    empty_dir = tempfile.mkdtemp(prefix='bench_arranque_')
+    commands = [
+        ("python -c pass (referencia)", [sys.executable, '-c', 'pass']),
+        ("cli.py --help", [sys.executable, 'cli.py', '--help']),
+        ("cli.py scrape --help", [sys.executable, 'cli.py', 'scrape', '--help']),
+        ("cli.py summarize (directorio vacío)", [sys.executable, 'cli.py', 'summarize', empty_dir]),
+        ("import tweet_records", [sys.executable, '-c', 'import tweet_records']),
+        ("import twitter_scraper (con Selenium)", [sys.executable, '-c', 'import twitter_scraper'])
+    ]
+    print(f"{'comando':<42} {'mejor de ' + str(repeat):>12}")
+    for label, command in commands:
+        print(f"{label:<42} {best_time(command, repeat) * 1000:>9.0f} ms")
+
+    print("\nSelenium cargado al importar:")
+    ok = True
+    for module in SELENIUM_FREE_MODULES:
+        result = subprocess.run([sys.executable, '-c', CHECK_SELENIUM.format(module=module)], cwd=ROOT,
+                                capture_output=True, text=True)
+        loaded = result.stdout.strip()
+        ok = ok and loaded == 'False'
+        print(f"  {module:<20} {'error: ' + result.stderr.strip().splitlines()[-1] if result.returncode else loaded}")
+    print("\nCorrecto: ningún módulo sin navegador importa Selenium" if ok else "\nERROR: algún módulo importa Selenium")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
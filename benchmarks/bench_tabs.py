@@ -0,0 +1,82 @@
+"""
+Varias ventanas en un solo Chrome (TwitterScraper(tabs=N)) frente a una
+cuenta tras otra y frente a N navegadores, contra el servidor local fake_x_server.
+
+Mide el tiempo total, los tweets por minuto y la memoria del navegador: con
+ventanas, la máxima durante la ejecución; con N navegadores, la suma de los N
+procesos de Chrome con una cuenta cargada en cada uno.
+
+Uso: python benchmarks/bench_tabs.py [--cuentas 6] [--tweets 60] [--ventanas 3] [--headless]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_x_server import FakeXServer
+from twitter_scraper import TwitterScraper, AccountScrapeError
+
+def run_accounts(urls, num_tweets, headless, tabs):
+    output_dir = tempfile.mkdtemp(prefix='bench_ventanas_')
+    scraper = TwitterScraper(headless=headless, tabs=tabs, polite_floor=0, account_pause=(0, 0), verbose=False)
+    try:
+        started = time.perf_counter()
+        scraper.scrape_multiple_accounts(urls, output_dir, num_tweets)
+        elapsed = time.perf_counter() - started
+        tweets = scraper.instrumentation.report()['tweets']
+        if scraper.last_tab_report:
+            memory = scraper.last_tab_report['memoria_navegador_max_mb']
+        else:
+            memory = scraper.browser_memory() / 2 ** 20
+    finally:
+        scraper.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return {'modo': f"{tabs} ventana{'s' if tabs > 1 else ''}", 'total_s': elapsed, 'tweets': tweets,
+            'memoria_mb': memory}
+
+def browsers_memory(urls, headless):
+    """Memoria de un navegador por cuenta, con la página de cada cuenta cargada."""
+    scrapers = []
+    try:
+        for url in urls:
+            scraper = TwitterScraper(headless=headless, polite_floor=0, verbose=False)
+            scrapers.append(scraper)
+            try:
+                scraper.scrape_account(url, 1)
+            except AccountScrapeError as e:
+                # La memoria se mide igual con la página que haya quedado cargada
+                print(f"Extracción incompleta: {e}")
+        return sum(scraper.browser_memory() for scraper in scrapers) / 2 ** 20
+    finally:
+        for scraper in scrapers:
+            scraper.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar varias ventanas en un navegador con un navegador por cuenta")
+    parser.add_argument('--cuentas', type=int, default=6)
+    parser.add_argument('--tweets', type=int, default=60)
+    parser.add_argument('--ventanas', type=int, default=3)
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+
+    server = FakeXServer(tweets_per_account=max(200, args.tweets)).start()
+    try:
+        urls = [server.url_for(f"cuenta{i:02d}") for i in range(args.cuentas)]
+        results = [run_accounts(urls, args.tweets, args.headless, 1),
+                   run_accounts(urls, args.tweets, args.headless, args.ventanas)]
+        memory = browsers_memory(urls[:args.ventanas], args.headless)
+    finally:
+        server.stop()
+
+    print(f"\n{'modo':<12} {'total (s)':>10} {'tweets':>7} {'tweets/min':>11} {'memoria (MB)':>13}")
+    for result in results:
+        print(f"{result['modo']:<12} {result['total_s']:>10.1f} {result['tweets']:>7} "
+              f"{result['tweets'] * 60 / result['total_s']:>11.0f} {result['memoria_mb']:>13.0f}")
+    print(f"{args.ventanas} navegadores con una cuenta cargada cada uno: {memory:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Línea de comandos del scraper.
+
+    python cli.py scrape cuentas.txt --headless --tweets 50 --formato parquet --trabajadores 4
+    cat cuentas.txt | python cli.py scrape - --headless
+    python cli.py parse-snapshots twitter_data/snapshots --salida twitter_data
+    python cli.py summarize twitter_data --periodo semana
+    python cli.py refresh twitter_data --dias 7 --headless
+
+Las listas de cuentas tienen una por línea (URL o nombre de usuario, con o sin
+@); se ignoran las líneas vacías y lo que sigue a un #. Selenium, lxml y
+numpy se importan solo dentro del subcomando que los usa, así que summarize y
+--help no cargan el navegador.
+"""
+import os
+import sys
+import argparse
+import datetime
+
+DEFAULT_OUTPUT_DIR = 'twitter_data'
+ACCOUNT_BASE_URL = "https://x.com"
+
+def account_url(entry):
+    """URL de cuenta a partir de una URL o un nombre de usuario ('@KFC_MEXICO', 'KFC_MEXICO')."""
+    entry = entry.strip()
+    if entry.startswith(('http://', 'https://')):
+        return entry.rstrip('/')
+    return f"{ACCOUNT_BASE_URL}/{entry.lstrip('@').strip('/')}"
+
+def read_accounts(lines):
+    """URLs de cuenta de las líneas de un archivo, sin comentarios ni repetidas."""
+    urls = []
+    seen = set()
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        url = account_url(line)
+        if url.lower() not in seen:
+            seen.add(url.lower())
+            urls.append(url)
+    return urls
+
+def load_accounts(sources):
+    """
+    Cuentas de los argumentos: cada uno es una URL, un nombre de usuario, un
+    archivo con una cuenta por línea o '-' (entrada estándar). Sin argumentos
+    se lee la entrada estándar si no es una terminal.
+    """
+    if not sources and not sys.stdin.isatty():
+        sources = ['-']
+    lines = []
+    for source in sources:
+        if source == '-':
+            lines.extend(sys.stdin)
+        elif os.path.isfile(source):
+            with open(source, encoding='utf-8') as f:
+                lines.extend(f)
+        else:
+            lines.append(source)
+    return read_accounts(lines)
+
+def run_scrape(args):
+    accounts = load_accounts(args.cuentas)
+    if not accounts:
+        print("No se indicaron cuentas (argumentos, archivo o entrada estándar)")
+        return 1
+    print(f"{len(accounts)} cuentas a raspar")
+    # Selenium solo se carga al raspar
+    from twitter_scraper import TwitterScraper
+    from pacing import AdaptivePacer
+
+    pacer = AdaptivePacer() if args.ritmo_adaptativo else None
+    scraper = TwitterScraper(headless=args.headless, lean=args.ligero, index_path=args.indice,
+                             verbose=not args.silencioso, deep_history=args.profundo, pacer=pacer,
+                             tabs=args.ventanas)
+    try:
+        scraper.scrape_multiple_accounts(accounts, args.salida, args.tweets, since=args.since, until=args.until,
+                                         max_workers=args.trabajadores, resume=not args.no_reanudar,
+                                         output_format=args.formato, metrics_file=args.metricas,
+                                         download_media=args.medios, enrich=args.enriquecer,
+                                         update_analytics=args.analitica)
+    finally:
+        scraper.close()
+    return 0
+
+def run_parse_snapshots(args):
+    from snapshot_parser import parse_snapshot_directory
+    from sinks import open_sink
+
+    results = parse_snapshot_directory(args.directorio, args.patron, args.trabajadores)
+    if not results:
+        return 1
+    if not os.path.exists(args.salida):
+        os.makedirs(args.salida)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    if args.formato == 'parquet':
+        from tweet_dataset import ParquetDatasetSink, compact_dataset, DATASET_DIRNAME
+
+        dataset_dir = os.path.join(args.salida, DATASET_DIRNAME)
+        with ParquetDatasetSink(dataset_dir, run_id=timestamp) as sink:
+            for tweets in results.values():
+                sink.write_many(tweets)
+        compact_dataset(dataset_dir)
+        print(f"{sink.count} tweets guardados en {dataset_dir}")
+        return 0
+    # Un archivo por cuenta, aunque sus tweets vengan de varias instantáneas
+    sinks = {}
+    try:
+        for tweets in results.values():
+            for tweet in tweets:
+                account = tweet['cuenta']
+                if account not in sinks:
+                    sinks[account] = open_sink(args.formato, os.path.join(args.salida, f"{account}_{timestamp}"))
+                sinks[account].write(tweet)
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    for account, sink in sinks.items():
+        print(f"{account}: {sink.count} tweets en {sink.path}")
+    return 0
+
+def run_refresh(args):
+    from metrics_refresh import MetricsRefresher, load_known_tweets
+
+    tweets = load_known_tweets(args.directorio, args.dias)
+    if not tweets:
+        print(f"No hay tweets de los últimos {args.dias} días en {args.directorio}")
+        return 1
+    from twitter_scraper import TwitterScraper
+    from pacing import AdaptivePacer
+
+    pacer = AdaptivePacer() if args.ritmo_adaptativo else None
+    with TwitterScraper(headless=args.headless, lean=True, verbose=not args.silencioso, pacer=pacer) as scraper:
+        MetricsRefresher(scraper, args.dias, args.modo).refresh_to_file(tweets, args.directorio, args.formato)
+    return 0
+
+def run_summarize(args):
+    from analytics import summarize
+
+    summarize(args.directorio, args.periodo, args.top, args.since, args.until)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Scraper de cuentas de X (Twitter)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subparsers.add_parser('scrape', help="Raspar cuentas con el navegador")
+    scrape.add_argument('cuentas', nargs='*',
+                        help="URLs, nombres de usuario o archivos con una cuenta por línea ('-' para la entrada estándar)")
+    scrape.add_argument('--salida', default=DEFAULT_OUTPUT_DIR, help="Directorio de salida")
+    scrape.add_argument('--tweets', type=int, default=20, help="Tweets por cuenta")
+    scrape.add_argument('--formato', default='csv', choices=['csv', 'jsonl', 'parquet'])
+    scrape.add_argument('--trabajadores', type=int, default=1, help="Navegadores en paralelo")
+    scrape.add_argument('--ventanas', type=int, default=1,
+                        help="Cuentas intercaladas en ventanas de un solo navegador (en lugar de --trabajadores)")
+    scrape.add_argument('--headless', action='store_true', help="Ejecutar Chrome sin ventana")
+    scrape.add_argument('--since', help="Fecha inicial (YYYY-MM-DD; por defecto, hace dos años)")
+    scrape.add_argument('--until', help="Fecha final (YYYY-MM-DD)")
+    scrape.add_argument('--indice', help="Índice SQLite para ejecuciones incrementales y reanudables")
+    scrape.add_argument('--no-reanudar', action='store_true', help="No reanudar una ejecución interrumpida")
+    scrape.add_argument('--ligero', action='store_true', help="Perfil ligero (sin imágenes ni videos)")
+    scrape.add_argument('--profundo', action='store_true', help="Historial profundo (timelines muy largos)")
+    scrape.add_argument('--medios', action='store_true', help="Descargar fotos y videos")
+    scrape.add_argument('--enriquecer', action='store_true', help="Agregar hashtags, menciones, idioma y casi duplicados")
+    scrape.add_argument('--analitica', action='store_true', help="Actualizar los informes analitica_*.csv al terminar")
+    scrape.add_argument('--ritmo-adaptativo', action='store_true',
+                        help="Ajustar las pausas a las señales de bloqueo, con cortacircuitos (ver pacing.py)")
+    scrape.add_argument('--metricas', help="Archivo de métricas en formato de Prometheus")
+    scrape.add_argument('--silencioso', action='store_true', help="Menos mensajes por tweet")
+    scrape.set_defaults(run=run_scrape)
+
+    snapshots = subparsers.add_parser('parse-snapshots', help="Extraer tweets de instantáneas HTML guardadas")
+    snapshots.add_argument('directorio', help="Directorio con las instantáneas")
+    snapshots.add_argument('--patron', default='*.html')
+    snapshots.add_argument('--salida', default=DEFAULT_OUTPUT_DIR, help="Directorio de salida")
+    snapshots.add_argument('--formato', default='csv', choices=['csv', 'jsonl', 'parquet'])
+    snapshots.add_argument('--trabajadores', type=int, default=None, help="Procesos en paralelo")
+    snapshots.set_defaults(run=run_parse_snapshots)
+
+    refresh = subparsers.add_parser('refresh', help="Releer solo los contadores de los tweets ya extraídos")
+    refresh.add_argument('directorio', nargs='?', default=DEFAULT_OUTPUT_DIR)
+    refresh.add_argument('--dias', type=int, default=7, help="Omitir los tweets con más días que estos")
+    refresh.add_argument('--modo', default='auto', choices=['auto', 'timeline', 'estado'],
+                         help="Leer desde el timeline, desde la página de cada tweet o ambos")
+    refresh.add_argument('--formato', default='csv', choices=['csv', 'jsonl'])
+    refresh.add_argument('--headless', action='store_true', help="Ejecutar Chrome sin ventana")
+    refresh.add_argument('--ritmo-adaptativo', action='store_true', help="Ajustar las pausas a las señales de bloqueo")
+    refresh.add_argument('--silencioso', action='store_true', help="Menos mensajes por scroll")
+    refresh.set_defaults(run=run_refresh)
+
+    summary = subparsers.add_parser('summarize', help="Agregados de interacción de las extracciones guardadas")
+    summary.add_argument('directorio', nargs='?', default=DEFAULT_OUTPUT_DIR)
+    summary.add_argument('--periodo', default='mes', choices=['dia', 'semana', 'mes'])
+    summary.add_argument('--top', type=int, default=5, help="Tweets principales por cuenta")
+    summary.add_argument('--since', help="Fecha inicial (YYYY-MM-DD)")
+    summary.add_argument('--until', help="Fecha final, excluida (YYYY-MM-DD)")
+    summary.set_defaults(run=run_summarize)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""
+Enriquecimiento de los tweets por lotes y detección de casi duplicados.
+
+Agrega a cada registro (ver sinks.ENRICHMENT_FIELDS):
+- hashtags, menciones, enlaces, precios y codigos_promo, con expresiones
+  regulares compiladas una sola vez;
+- idioma ('es', 'en', 'pt' o 'und'), por palabras frecuentes y caracteres
+  propios de cada idioma (sin dependencias; basta para distinguir los idiomas
+  de las cuentas de restaurantes);
+- duplicado_de: status id del primer tweet casi idéntico visto antes, en
+  cualquier cuenta o ejecución (vacío si es original).
+
+Los casi duplicados se detectan con firmas MinHash de los trigramas de palabras
+del texto, calculadas con numpy para todo el lote, y un índice LSH por bandas:
+solo se comparan los tweets que coinciden en alguna banda, así que el costo no
+crece con el cuadrado del corpus. El índice se guarda en SQLite para reconocer
+las copias entre ejecuciones.
+
+Se puede usar en línea, delante de cualquier sink:
+
+    enricher = Enricher(NearDuplicateIndex('twitter_data/casi_duplicados.sqlite'))
+    sink = EnrichmentSink(CsvSink('salida.csv'), enricher)
+
+(scrape_multiple_accounts(enrich=True) lo hace por cuenta) o sobre archivos ya
+guardados: python enrichment.py twitter_data
+"""
+import os
+import re
+import csv
+import json
+import zlib
+import sqlite3
+import argparse
+import threading
+from itertools import chain
+
+import numpy as np
+
+from sinks import TweetSink, CsvSink, JsonlSink, ENRICHED_FIELDNAMES, normalize_record
+from tweet_index import status_id_from_url
+
+# Nombre del índice de casi duplicados dentro de output_dir
+DUPLICATE_INDEX_NAME = 'casi_duplicados.sqlite'
+
+# Tweets que se enriquecen juntos (en línea y sobre archivos ya guardados)
+BATCH_SIZE = 100
+OFFLINE_BATCH_SIZE = 2000
+
+# Firmas MinHash: NUM_PERM permutaciones en BANDS bandas de NUM_PERM / BANDS filas.
+# Con 16 bandas de 4 filas, dos textos con similitud 0.8 son candidatos con probabilidad > 0.999
+NUM_PERM = 64
+BANDS = 16
+
+# Similitud estimada (fracción de la firma que coincide) para considerar casi duplicado
+DUPLICATE_THRESHOLD = 0.8
+
+# Palabras por trigrama y mínimo de palabras para buscar duplicados (los textos muy cortos coinciden por azar)
+SHINGLE_SIZE = 3
+MIN_WORDS = 5
+
+# Primo mayor que 2^32 para las permutaciones (a * x + b) % PRIME
+PRIME = np.uint64(4294967311)
+EMPTY_HASH = np.uint64(2 ** 64 - 1)
+
+HASHTAG_RE = re.compile(r'(?<![\w&])[#＃](\w*[^\W\d]\w*)')
+MENTION_RE = re.compile(r'(?<![\w@])@(\w{1,15})\b')
+URL_RE = re.compile(r'https?://[^\s…]+|(?<![\w@.])(?:www\.)?[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}/[^\s…]*'
+                    r'|(?<![\w@.])www\.[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}', re.IGNORECASE)
+PRICE_RE = re.compile(r'(?:US|MXN|MX)?\$\s?(\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)'
+                      r'|(\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)\s?(?:pesos|mxn)\b', re.IGNORECASE)
+PROMO_CODE_RE = re.compile(r'\b(?:c[oó]digo|cup[oó]n|code|promo\s?code)\b\s*:?\s*["“]?([A-Za-z0-9]{4,20})\b',
+                           re.IGNORECASE)
+WORD_RE = re.compile(r'[^\W_]+')
+TRAILING_PUNCTUATION = '.,;:!?)]}"\'»”'
+
+# Palabras frecuentes por idioma; las que están en más de uno no cuentan
+LANGUAGE_WORDS = {
+    'es': """el la los las del que y en por para con una un es se lo al como más pero sus ya muy este esta
+             hoy aquí ahora también te tu nuestro nuestra nuevo nueva gratis solo sólo hasta desde pide disfruta
+             ven tus todos cada día hay ya qué porque""",
+    'en': """the and to of in is it you that for on with this are be at your we have our not from by all get
+             now new just can will more out only today free order try our day every what because""",
+    'pt': """o os um uma com do da dos das em na é você ele ela isso está muito também já hoje aqui agora
+             nosso nossa novo nova grátis só até peça aproveite vem seus todos cada dia há porque não"""
+}
+
+def _distinctive_words():
+    """Palabra -> idioma, solo para las palabras de un único idioma."""
+    counts = {}
+    for words in LANGUAGE_WORDS.values():
+        for word in set(words.split()):
+            counts[word] = counts.get(word, 0) + 1
+    return {word: language for language, words in LANGUAGE_WORDS.items() for word in words.split() if counts[word] == 1}
+
+WORD_LANGUAGE = _distinctive_words()
+LANGUAGE_CHARS = {'ñ': 'es', '¿': 'es', '¡': 'es', 'ã': 'pt', 'õ': 'pt', 'ç': 'pt'}
+
+# Coincidencias mínimas para asignar un idioma
+MIN_LANGUAGE_HITS = 2
+
+def _unique(items):
+    """Sin repetidos (sin distinguir mayúsculas), en el orden en que aparecen."""
+    seen = set()
+    unique = []
+    for item in items:
+        if item.lower() not in seen:
+            seen.add(item.lower())
+            unique.append(item)
+    return unique
+
+def parse_price(text):
+    """'1,299.50', '1.299,50', '99' o '99,90' como float (el último separador seguido de 1-2 dígitos es el decimal)."""
+    separators = [i for i, char in enumerate(text) if char in '.,']
+    if separators and len(text) - separators[-1] - 1 in (1, 2):
+        integer, decimals = text[:separators[-1]], text[separators[-1] + 1:]
+    else:
+        integer, decimals = text, '0'
+    return float(re.sub(r'[.,]', '', integer) + '.' + decimals)
+
+def extract_entities(text):
+    """Hashtags, menciones, enlaces, precios y códigos promocionales de un texto."""
+    text = text or ""
+    urls = [url.rstrip(TRAILING_PUNCTUATION) for url in URL_RE.findall(text)]
+    # Los enlaces se quitan antes de buscar precios y códigos (las rutas tienen números y letras)
+    without_urls = URL_RE.sub(' ', text)
+    codes = [code for code in PROMO_CODE_RE.findall(without_urls)
+             if code.isupper() or any(char.isdigit() for char in code)]
+    return {
+        'hashtags': _unique(HASHTAG_RE.findall(text)),
+        'menciones': _unique(MENTION_RE.findall(text)),
+        'enlaces': _unique(urls),
+        'precios': [parse_price(symbol or suffix) for symbol, suffix in PRICE_RE.findall(without_urls)],
+        'codigos_promo': _unique([code.upper() for code in codes])
+    }
+
+def _words(text):
+    """Palabras en minúsculas, sin enlaces, menciones ni hashtags."""
+    text = URL_RE.sub(' ', text or "")
+    text = MENTION_RE.sub(' ', HASHTAG_RE.sub(' ', text))
+    return WORD_RE.findall(text.lower())
+
+def detect_language(text, words=None):
+    """Idioma del texto ('es', 'en', 'pt') o 'und' si no hay suficientes indicios."""
+    scores = {language: 0 for language in LANGUAGE_WORDS}
+    for word in words if words is not None else _words(text):
+        language = WORD_LANGUAGE.get(word)
+        if language:
+            scores[language] += 1
+    for char in (text or "").lower():
+        language = LANGUAGE_CHARS.get(char)
+        if language:
+            scores[language] += 2
+    ranking = sorted(scores.items(), key=lambda item: -item[1])
+    best, second = ranking[0], ranking[1]
+    if best[1] < MIN_LANGUAGE_HITS or best[1] == second[1]:
+        return 'und'
+    return best[0]
+
+def shingles(words):
+    """Hashes (32 bits, estables entre ejecuciones) de los trigramas de palabras."""
+    if len(words) < MIN_WORDS:
+        return set()
+    return {zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+            for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+class MinHasher:
+    """Firmas MinHash de NUM_PERM valores, calculadas para un lote entero con numpy."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^31 y hashes < 2^32: a * x + b no desborda uint64
+        self.a = rng.integers(1, 2 ** 31, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 31, num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets):
+        """Matriz (tweets, num_perm); las filas de los tweets sin trigramas quedan en EMPTY_HASH."""
+        lengths = np.array([len(shingle_set) for shingle_set in shingle_sets], dtype=np.int64)
+        signatures = np.full((len(shingle_sets), len(self.a)), EMPTY_HASH, dtype=np.uint64)
+        if not lengths.sum():
+            return signatures
+        hashes = np.fromiter(chain.from_iterable(shingle_sets), dtype=np.uint64, count=int(lengths.sum()))
+        permuted = (hashes[:, None] * self.a + self.b) % PRIME
+        nonempty = lengths > 0
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        # Los tweets vacíos no ocupan filas, así que cada tramo va de un inicio al siguiente
+        signatures[nonempty] = np.minimum.reduceat(permuted, starts, axis=0)
+        return signatures
+
+DUPLICATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS firmas (
+    status_id TEXT PRIMARY KEY,
+    firma BLOB NOT NULL,
+    duplicado_de TEXT
+);
+CREATE TABLE IF NOT EXISTS bandas (
+    banda INTEGER NOT NULL,
+    clave INTEGER NOT NULL,
+    status_id TEXT NOT NULL,
+    PRIMARY KEY (banda, clave, status_id)
+) WITHOUT ROWID;
+"""
+
+class NearDuplicateIndex:
+    """
+    Índice LSH de firmas MinHash en SQLite (en memoria si path es None). Cada
+    firma se divide en bandas; dos tweets son candidatos si coinciden en
+    alguna banda completa, y casi duplicados si además su similitud estimada
+    llega a threshold.
+    """
+
+    def __init__(self, path=None, threshold=DUPLICATE_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+        if path:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._band_mix = np.random.default_rng(2).integers(1, 2 ** 63, self.rows, dtype=np.uint64) | np.uint64(1)
+        self.conn = sqlite3.connect(path or ':memory:', timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(DUPLICATE_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _band_keys(self, signatures):
+        """Clave de cada banda (tweets, bandas): combinación de sus filas, con desborde intencional."""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows)
+        with np.errstate(over='ignore'):
+            return (banded * self._band_mix).sum(axis=2, dtype=np.uint64).view(np.int64)
+
+    def _select_in(self, query, values, *params):
+        """Ejecutar query con un IN (...) de values, en tandas que SQLite acepte."""
+        values = list(values)
+        rows = []
+        for i in range(0, len(values), 500):
+            chunk = values[i:i + 500]
+            rows.extend(self.conn.execute(query.format(','.join('?' * len(chunk))), (*params, *chunk)))
+        return rows
+
+    def match(self, status_ids, signatures):
+        """
+        Buscar el original de cada tweet del lote y agregar las firmas al índice.
+        Devuelve, por tweet, el status id del original o "" (también para los
+        tweets sin status id o sin firma, que no se indexan).
+        """
+        result = [""] * len(status_ids)
+        valid = [i for i, status_id in enumerate(status_ids) if status_id and signatures[i, 0] != EMPTY_HASH]
+        if not valid:
+            return result
+        keys = self._band_keys(signatures)
+
+        # Tweets ya indexados (vistos en otra ejecución): se conserva su resultado
+        known = dict(self._select_in("SELECT status_id, duplicado_de FROM firmas WHERE status_id IN ({})",
+                                     {status_ids[i] for i in valid}))
+
+        # Candidatos del índice: los que comparten alguna banda
+        candidates = {i: set() for i in valid}
+        for band in range(self.bands):
+            by_key = {}
+            for i in valid:
+                by_key.setdefault(int(keys[i, band]), []).append(i)
+            for key, status_id in self._select_in("SELECT clave, status_id FROM bandas WHERE banda = ? AND clave IN ({})",
+                                                  by_key, band):
+                for i in by_key[key]:
+                    candidates[i].add(status_id)
+        stored = {status_id: (np.frombuffer(signature, dtype=np.uint64), original or "")
+                  for status_id, signature, original in self._select_in(
+                      "SELECT status_id, firma, duplicado_de FROM firmas WHERE status_id IN ({})",
+                      set(chain.from_iterable(candidates.values())))}
+
+        buckets = {}
+        new_signatures = []
+        new_bands = []
+        for i in valid:
+            status_id = status_ids[i]
+            if status_id in known:
+                result[i] = known[status_id] or ""
+                continue
+            options = [stored[candidate] + (candidate,) for candidate in candidates[i]
+                       if candidate in stored and candidate != status_id]
+            for band in range(self.bands):
+                for j in buckets.get((band, int(keys[i, band])), []):
+                    options.append((signatures[j], result[j], status_ids[j]))
+            if options:
+                similarity = (np.stack([option[0] for option in options]) == signatures[i]).mean(axis=1)
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.threshold:
+                    # Se apunta siempre al primer original, no a otra copia
+                    result[i] = options[best][1] or options[best][2]
+            known[status_id] = result[i]
+            for band in range(self.bands):
+                buckets.setdefault((band, int(keys[i, band])), []).append(i)
+                new_bands.append((band, int(keys[i, band]), status_id))
+            new_signatures.append((status_id, signatures[i].tobytes(), result[i] or None))
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO firmas (status_id, firma, duplicado_de) VALUES (?, ?, ?)",
+                                  new_signatures)
+            self.conn.executemany("INSERT OR IGNORE INTO bandas (banda, clave, status_id) VALUES (?, ?, ?)", new_bands)
+        return result
+
+class Enricher:
+    """
+    Enriquecimiento de lotes de registros; con duplicate_index también marca
+    los casi duplicados. Es seguro compartirlo entre hilos.
+    """
+
+    def __init__(self, duplicate_index=None):
+        self.index = duplicate_index
+        self.hasher = MinHasher()
+        self.stats = {'tweets': 0, 'casi_duplicados': 0, 'idiomas': {}}
+        self._lock = threading.Lock()
+
+    def enrich_batch(self, records):
+        """Agregar los campos del enriquecimiento a los registros (se modifican y se devuelven)."""
+        words = []
+        for record in records:
+            text = record.get('texto') or ""
+            record.update(extract_entities(text))
+            record_words = _words(text)
+            words.append(record_words)
+            if not record.get('idioma'):
+                record['idioma'] = detect_language(text, record_words)
+        if self.index is not None:
+            signatures = self.hasher.signatures([shingles(record_words) for record_words in words])
+            status_ids = [status_id_from_url(record.get('url')) for record in records]
+            with self._lock:
+                originals = self.index.match(status_ids, signatures)
+            for record, original in zip(records, originals):
+                record['duplicado_de'] = original
+        with self._lock:
+            self.stats['tweets'] += len(records)
+            for record in records:
+                self.stats['casi_duplicados'] += bool(record.get('duplicado_de'))
+                self.stats['idiomas'][record['idioma']] = self.stats['idiomas'].get(record['idioma'], 0) + 1
+        return records
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+
+class EnrichmentSink(TweetSink):
+    """Etapa de enriquecimiento delante de otro sink: junta batch_size registros, los enriquece y los pasa."""
+
+    fieldnames = ENRICHED_FIELDNAMES
+
+    def __init__(self, sink, enricher, batch_size=BATCH_SIZE):
+        super().__init__()
+        self.sink = sink
+        self.sink.fieldnames = ENRICHED_FIELDNAMES
+        self.enricher = enricher
+        self.batch_size = batch_size
+        self.path = sink.path
+        self._buffer = []
+
+    def _write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self._enrich_buffer()
+
+    def _enrich_buffer(self):
+        if self._buffer:
+            self.sink.write_many(self.enricher.enrich_batch(self._buffer))
+            self._buffer = []
+
+    def flush(self):
+        self._enrich_buffer()
+        self.sink.flush()
+
+    def close(self):
+        self._enrich_buffer()
+        self.sink.close()
+
+def _read_records(path):
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+def enrich_file(path, enricher, output_path=None, batch_size=OFFLINE_BATCH_SIZE):
+    """
+    Enriquecer un CSV o JSONL ya guardado. Sin output_path el archivo se
+    reemplaza (de forma atómica) por su versión enriquecida. Devuelve cuántos
+    registros se escribieron.
+    """
+    output_path = output_path or path
+    directory, name = os.path.split(output_path)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    sink_type = JsonlSink if path.endswith('.jsonl') else CsvSink
+    sink = EnrichmentSink(sink_type(tmp_path, flush_every=1000, fsync=False), enricher, batch_size)
+    try:
+        with sink:
+            for record in _read_records(path):
+                sink.write(normalize_record(record, ENRICHED_FIELDNAMES))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if os.path.exists(tmp_path):
+        os.replace(tmp_path, output_path)
+    return sink.count
+
+def tweet_files(paths):
+    """Archivos de tweets (CSV/JSONL) de una lista de archivos o directorios."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(('.csv', '.jsonl'))
+                         and not name.startswith(('resumen_extraccion_', 'analitica_', 'refresco_', '.')))
+        else:
+            files.append(path)
+    return files
+
+def enrich_files(paths, index_path=None, threshold=DUPLICATE_THRESHOLD):
+    """Enriquecer los archivos indicados (o los de los directorios) con un índice de duplicados común."""
+    files = tweet_files(paths)
+    if index_path is None and files:
+        index_path = os.path.join(os.path.dirname(files[0]), DUPLICATE_INDEX_NAME)
+    enricher = Enricher(NearDuplicateIndex(index_path, threshold))
+    try:
+        for path in files:
+            count = enrich_file(path, enricher)
+            print(f"{path}: {count} tweets enriquecidos")
+    finally:
+        enricher.close()
+    print_stats(enricher.stats)
+    return enricher.stats
+
+def print_stats(stats):
+    languages = ', '.join(f"{language}: {count}" for language, count in
+                          sorted(stats['idiomas'].items(), key=lambda item: -item[1]))
+    print(f"Enriquecimiento: {stats['tweets']} tweets, {stats['casi_duplicados']} casi duplicados ({languages})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Enriquecer archivos de tweets ya guardados")
+    parser.add_argument('paths', nargs='+', help="Archivos CSV/JSONL o directorios de salida")
+    parser.add_argument('--indice', help=f"Índice de casi duplicados (por defecto {DUPLICATE_INDEX_NAME} junto a los archivos)")
+    parser.add_argument('--umbral', type=float, default=DUPLICATE_THRESHOLD, help="Similitud mínima para casi duplicados")
+    args = parser.parse_args()
+    enrich_files(args.paths, args.indice, args.umbral)
+
+if __name__ == "__main__":
+    main()
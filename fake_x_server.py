@@ -0,0 +1,384 @@
+"""
+Servidor HTTP local que imita el timeline de X para probar el scraper sin tocar el sitio real.
+
+Sirve una página por cuenta (/{cuenta}) que, igual que el cliente web de X,
+pide el timeline a /i/api/graphql/{id}/UserTweets y dibuja cada tweet con el
+marcado article/cellInnerDiv/data-testid, cargando más páginas al hacer scroll.
+Las respuestas pueden ser grabaciones reales ({responses_dir}/{cuenta}/*.json,
+una por página) o sintéticas generadas con generate_tweets.
+
+/search?q=from:{cuenta} max_id:{id} sirve la misma página empezando en ese
+tweet, como la búsqueda de X que usa el modo de historial profundo para reanudar.
+
+Como X, la página virtualiza el timeline: con max_cells > 0 elimina del DOM las
+celdas que quedan muy por encima de la vista y las reemplaza por un espaciador
+de la misma altura, así que solo hay unas max_cells celdas a la vez.
+"""
+import os
+import re
+import json
+import glob
+import random
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+TIMELINE_PATH = '/i/api/graphql/fakeQueryId/UserTweets'
+
+TIMELINE_PAGE = """<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>__HANDLE__ / X</title></head>
+<body>
+<main><div aria-label="Timeline" id="timeline"><div id="spacer"></div></div></main>
+<script>
+const handle = __HANDLE_JSON__;
+const maxCells = __MAX_CELLS__;
+const maxId = __MAX_ID_JSON__;
+const timeline = document.getElementById('timeline');
+const spacer = document.getElementById('spacer');
+let removedHeight = 0;
+let cursor = 0;
+let hasMore = true;
+let loading = false;
+
+function compact(n) {
+    if (n >= 1000000) return (n / 1000000).toFixed(1).replace(/\\.0$/, '') + 'M';
+    if (n >= 1000) return (n / 1000).toFixed(1).replace(/\\.0$/, '') + 'K';
+    return String(n);
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+function unwrap(result) {
+    if (result && result.__typename === 'TweetWithVisibilityResults') return result.tweet;
+    return result;
+}
+
+function metric(testid, count, label) {
+    const aria = count + ' ' + label + '. ' + label;
+    return '<div><button data-testid="' + testid + '" role="button" aria-label="' + aria + '">' +
+        '<span>' + (count ? compact(count) : '') + '</span></button></div>';
+}
+
+function renderTweet(tweet, pinned) {
+    const legacy = tweet.legacy;
+    const user = tweet.core.user_results.result;
+    const name = (user.core && user.core.screen_name) || user.legacy.screen_name;
+    const iso = new Date(legacy.created_at).toISOString();
+    const media = ((legacy.extended_entities || legacy.entities || {}).media || []);
+    let html = '<article data-testid="tweet" role="article" tabindex="0">';
+    if (pinned) html += '<div data-testid="socialContext"><span>Pinned</span></div>';
+    html += '<div data-testid="User-Name"><a href="/' + name + '">@' + name + '</a>' +
+        '<a href="/' + name + '/status/' + tweet.rest_id + '"><time datetime="' + iso + '">' +
+        iso.slice(0, 10) + '</time></a></div>';
+    html += '<div data-testid="tweetText" lang="es" dir="auto"><span>' + escapeHtml(legacy.full_text) + '</span></div>';
+    for (const item of media) {
+        if (item.type === 'photo') {
+            html += '<div data-testid="tweetPhoto"><img alt="Imagen" src="' + item.media_url_https + '"></div>';
+        } else {
+            html += '<div data-testid="videoPlayer"><video poster="' + item.media_url_https + '"></video></div>';
+        }
+    }
+    html += '<div role="group" aria-label="' + legacy.reply_count + ' replies, ' + legacy.retweet_count +
+        ' reposts, ' + legacy.favorite_count + ' likes, ' + legacy.bookmark_count + ' bookmarks">';
+    html += metric('reply', legacy.reply_count, 'Replies');
+    html += metric('retweet', legacy.retweet_count, 'reposts');
+    html += metric('like', legacy.favorite_count, 'Likes');
+    html += metric('bookmark', legacy.bookmark_count, 'Bookmarks');
+    html += '</div></article>';
+    const cell = document.createElement('div');
+    cell.setAttribute('data-testid', 'cellInnerDiv');
+    cell.innerHTML = html;
+    timeline.appendChild(cell);
+}
+
+function render(payload) {
+    const instructions = payload.data.user.result.timeline.timeline.instructions;
+    for (const instruction of instructions) {
+        if (instruction.type === 'TimelinePinEntry') {
+            renderTweet(unwrap(instruction.entry.content.itemContent.tweet_results.result), true);
+        }
+    }
+    for (const instruction of instructions) {
+        if (instruction.type !== 'TimelineAddEntries') continue;
+        for (const entry of instruction.entries) {
+            const content = entry.content || {};
+            if (content.itemContent && content.itemContent.tweet_results) {
+                renderTweet(unwrap(content.itemContent.tweet_results.result), false);
+            }
+        }
+    }
+}
+
+async function loadMore() {
+    if (loading || !hasMore) return;
+    loading = true;
+    try {
+        let url = '__TIMELINE_PATH__?handle=' + encodeURIComponent(handle) + '&cursor=' + cursor;
+        if (maxId) url += '&max_id=' + maxId;
+        const response = await fetch(url);
+        hasMore = response.headers.get('X-Fake-Has-More') === '1';
+        render(await response.json());
+        cursor += 1;
+    } finally {
+        loading = false;
+    }
+}
+
+// Quitar las celdas que quedaron más de una pantalla por encima de la vista
+function virtualize() {
+    if (!maxCells) return;
+    let cells = timeline.querySelectorAll('[data-testid="cellInnerDiv"]');
+    let i = 0;
+    while (cells.length - i > maxCells) {
+        const rect = cells[i].getBoundingClientRect();
+        if (rect.bottom > -window.innerHeight) break;
+        removedHeight += rect.height;
+        cells[i].remove();
+        i += 1;
+    }
+    spacer.style.height = removedHeight + 'px';
+}
+
+window.addEventListener('scroll', () => {
+    virtualize();
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 800) loadMore();
+});
+loadMore();
+</script>
+</body>
+</html>
+"""
+
+def _twitter_date(value):
+    return value.strftime('%a %b %d %H:%M:%S +0000 %Y')
+
+def generate_tweets(handle, count, start=None, interval_hours=6, seed=0, base_url=None):
+    """
+    Generar tweets sintéticos en orden cronológico inverso (el primero es el más reciente).
+    Cada tweet es un dict con los campos 'legacy' que usa la API de X.
+    """
+    rng = random.Random(f"{handle}:{seed}")
+    start = start or datetime.datetime.now(datetime.timezone.utc)
+    base_id = 1800000000000000000 + rng.randrange(10 ** 12)
+    tweets = []
+    for i in range(count):
+        created = start - datetime.timedelta(hours=interval_hours * i, minutes=rng.randrange(60))
+        status_id = str(base_id - i * 1000)
+        likes = int(rng.paretovariate(1.2) * 20)
+        tweet = {
+            'rest_id': status_id,
+            'screen_name': handle,
+            'full_text': f"Promoción {i} de {handle}: combo especial por ${rng.randrange(49, 299)} #{handle}",
+            'created_at': _twitter_date(created),
+            'reply_count': rng.randrange(0, 50),
+            'retweet_count': rng.randrange(0, likes + 1),
+            'favorite_count': likes,
+            'bookmark_count': rng.randrange(0, 20),
+            'media': []
+        }
+        if rng.random() < 0.4:
+            media_host = base_url or "https://pbs.twimg.com"
+            tweet['media'].append({
+                'type': 'photo' if rng.random() < 0.8 else 'video',
+                'media_url_https': f"{media_host}/media/{status_id}.jpg"
+            })
+        tweets.append(tweet)
+    return tweets
+
+def _tweet_result(tweet):
+    legacy = {
+        'id_str': tweet['rest_id'],
+        'full_text': tweet['full_text'],
+        'created_at': tweet['created_at'],
+        'reply_count': tweet['reply_count'],
+        'retweet_count': tweet['retweet_count'],
+        'favorite_count': tweet['favorite_count'],
+        'bookmark_count': tweet['bookmark_count'],
+        'entities': {}
+    }
+    if tweet['media']:
+        legacy['extended_entities'] = {'media': tweet['media']}
+        legacy['entities']['media'] = tweet['media']
+    return {
+        '__typename': 'Tweet',
+        'rest_id': tweet['rest_id'],
+        'core': {'user_results': {'result': {'__typename': 'User', 'legacy': {'screen_name': tweet['screen_name']}}}},
+        'legacy': legacy
+    }
+
+def _tweet_entry(tweet):
+    return {
+        'entryId': f"tweet-{tweet['rest_id']}",
+        'content': {
+            'entryType': 'TimelineTimelineItem',
+            'itemContent': {
+                'itemType': 'TimelineTweet',
+                'tweet_results': {'result': _tweet_result(tweet)}
+            }
+        }
+    }
+
+def timeline_response(tweets, cursor, pinned=None):
+    """Construir una respuesta UserTweets con la forma de la API GraphQL de X."""
+    entries = [_tweet_entry(tweet) for tweet in tweets]
+    entries.append({
+        'entryId': f"cursor-bottom-{cursor + 1}",
+        'content': {'entryType': 'TimelineTimelineCursor', 'value': str(cursor + 1), 'cursorType': 'Bottom'}
+    })
+    instructions = [{'type': 'TimelineClearCache'}, {'type': 'TimelineAddEntries', 'entries': entries}]
+    if pinned is not None:
+        instructions.append({'type': 'TimelinePinEntry', 'entry': _tweet_entry(pinned)})
+    return {'data': {'user': {'result': {'__typename': 'User', 'timeline': {'timeline': {'instructions': instructions}}}}}}
+
+class FakeXServer:
+    """
+    Servidor local con cuentas falsas. tweets_per_account fija el tamaño del
+    timeline sintético, page_size cuántos tweets devuelve cada respuesta y
+    max_cells cuántas celdas conserva la página en el DOM (0 = sin virtualizar).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, tweets_per_account=200, page_size=20, responses_dir=None,
+                 max_cells=40):
+        self.host = host
+        self.port = port
+        self.tweets_per_account = tweets_per_account
+        self.page_size = page_size
+        self.responses_dir = responses_dir
+        self.max_cells = max_cells
+        self._timelines = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+        self.request_count = 0
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def url_for(self, handle):
+        """URL de la página de timeline de una cuenta falsa."""
+        return f"{self.base_url}/{handle}"
+
+    def timeline_for(self, handle):
+        """Timeline sintético (cacheado) de una cuenta."""
+        with self._lock:
+            if handle not in self._timelines:
+                self._timelines[handle] = generate_tweets(handle, self.tweets_per_account, base_url=self.base_url)
+            return self._timelines[handle]
+
+    def recorded_pages(self, handle):
+        """Respuestas grabadas de una cuenta, ordenadas por nombre de archivo."""
+        if not self.responses_dir:
+            return []
+        return sorted(glob.glob(os.path.join(self.responses_dir, handle, '*.json')))
+
+    def timeline_page(self, handle, cursor, max_id=None):
+        """
+        Devolver (cuerpo JSON, hay más páginas) para la página cursor de una
+        cuenta. max_id limita el timeline sintético a los tweets con id menor o
+        igual (las grabaciones se sirven sin filtrar).
+        """
+        recorded = self.recorded_pages(handle)
+        if recorded:
+            if cursor >= len(recorded):
+                return json.dumps(timeline_response([], cursor)), False
+            with open(recorded[cursor], 'r', encoding='utf-8') as f:
+                return f.read(), cursor + 1 < len(recorded)
+
+        tweets = self.timeline_for(handle)
+        if max_id is not None:
+            tweets = [tweet for tweet in tweets if int(tweet['rest_id']) <= max_id]
+        start = cursor * self.page_size
+        page = tweets[start:start + self.page_size]
+        return json.dumps(timeline_response(page, cursor)), start + self.page_size < len(tweets)
+
+    def page_for(self, handle, max_id=None):
+        """HTML de la página de timeline de una cuenta, opcionalmente desde el tweet max_id."""
+        return (TIMELINE_PAGE.replace('__HANDLE_JSON__', json.dumps(handle))
+                .replace('__MAX_CELLS__', str(int(self.max_cells)))
+                .replace('__MAX_ID_JSON__', json.dumps(max_id))
+                .replace('__HANDLE__', handle)
+                .replace('__TIMELINE_PATH__', TIMELINE_PATH))
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Silenciar el log de cada petición
+
+            def _send(self, status, body, content_type, headers=None):
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.request_count += 1
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                if parsed.path == TIMELINE_PATH:
+                    handle = query.get('handle', [''])[0]
+                    cursor = int(query.get('cursor', ['0'])[0])
+                    max_id = int(query['max_id'][0]) if query.get('max_id') else None
+                    body, has_more = server.timeline_page(handle, cursor, max_id)
+                    self._send(200, body, 'application/json', {'X-Fake-Has-More': '1' if has_more else '0'})
+                elif parsed.path.startswith('/media/'):
+                    # Imagen determinista a partir del nombre para las pruebas de descarga
+                    self._send(200, b'\xff\xd8\xff\xe0' + parsed.path.encode('utf-8') + b'\xff\xd9', 'image/jpeg')
+                elif parsed.path == '/search':
+                    search = query.get('q', [''])[0]
+                    handle = re.search(r'from:(\w+)', search)
+                    max_id = re.search(r'max_id:(\d+)', search)
+                    if not handle:
+                        self._send(404, 'No encontrado', 'text/plain; charset=utf-8')
+                        return
+                    self._send(200, server.page_for(handle.group(1), max_id.group(1) if max_id else None),
+                               'text/html; charset=utf-8')
+                elif re.match(r'^/[A-Za-z0-9_]+/?$', parsed.path):
+                    self._send(200, server.page_for(parsed.path.strip('/')), 'text/html; charset=utf-8')
+                else:
+                    self._send(404, 'No encontrado', 'text/plain; charset=utf-8')
+
+        return Handler
+
+    def start(self):
+        """Iniciar el servidor en un hilo en segundo plano."""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"Servidor de X falso escuchando en {self.base_url}")
+        return self
+
+    def stop(self):
+        """Detener el servidor."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+if __name__ == "__main__":
+    with FakeXServer(port=8000) as fake_server:
+        print(f"Ejemplo: {fake_server.url_for('BurgerKingMX')}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
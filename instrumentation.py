@@ -0,0 +1,223 @@
+"""
+Instrumentación de TwitterScraper: tiempos por fase, comandos WebDriver y rutas de respaldo.
+
+Cada fase (carga de página, popup, scroll, filtrado, cada método extractor...)
+acumula llamadas, segundos y comandos WebDriver, en total y por cuenta. Las
+rutas de respaldo usadas (método de estadísticas 1/2/3, selector de contenido,
+modo de extracción) se cuentan aparte. El informe se exporta como JSON y como
+archivo de texto de Prometheus (textfile collector de node_exporter).
+
+Las fases pueden anidarse (extract_tweet_stats dentro de tweet_por_elemento),
+así que sus tiempos no se suman entre sí.
+"""
+import os
+import time
+import json
+import datetime
+import functools
+from contextlib import contextmanager
+
+PROMETHEUS_PREFIX = 'twitter_scraper'
+
+def timed(phase):
+    """Decorador para métodos de TwitterScraper: mide la llamada como la fase indicada."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.timer(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def _new_phase():
+    return {'llamadas': 0, 'total_s': 0.0, 'max_s': 0.0, 'comandos': 0}
+
+def _add_phase(phases, phase, seconds, commands):
+    entry = phases.setdefault(phase, _new_phase())
+    entry['llamadas'] += 1
+    entry['total_s'] += seconds
+    entry['max_s'] = max(entry['max_s'], seconds)
+    entry['comandos'] += commands
+
+def _phase_summary(phases):
+    summary = {}
+    for phase, entry in phases.items():
+        calls = entry['llamadas'] or 1
+        summary[phase] = {
+            'llamadas': entry['llamadas'],
+            'total_s': round(entry['total_s'], 4),
+            'media_s': round(entry['total_s'] / calls, 4),
+            'max_s': round(entry['max_s'], 4),
+            'comandos': entry['comandos'],
+            'comandos_por_llamada': round(entry['comandos'] / calls, 2)
+        }
+    return summary
+
+def _rate(count, seconds):
+    return round(count / seconds, 3) if seconds > 0 else 0.0
+
+class Instrumentation:
+    """
+    Acumulador de métricas de un scraper. command_counter es una función que
+    devuelve el contador actual de comandos WebDriver.
+    """
+
+    def __init__(self, command_counter=None):
+        self.command_counter = command_counter or (lambda: 0)
+        self.reset()
+
+    def reset(self):
+        self.started_at = datetime.datetime.now()
+        self._started = time.perf_counter()
+        self.phases = {}
+        self.paths = {}
+        self.accounts = {}
+        self._account = None
+
+    @contextmanager
+    def timer(self, phase):
+        """Medir un bloque como una llamada de la fase (segundos y comandos WebDriver)."""
+        started = time.perf_counter()
+        commands = self.command_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            commands = self.command_counter() - commands
+            _add_phase(self.phases, phase, seconds, commands)
+            if self._account is not None:
+                _add_phase(self._account['fases'], phase, seconds, commands)
+
+    def count(self, path, n=1):
+        """Contar el uso de una ruta (método de respaldo, selector, modo...)."""
+        self.paths[path] = self.paths.get(path, 0) + n
+        if self._account is not None:
+            self._account['rutas'][path] = self._account['rutas'].get(path, 0) + n
+
+    def begin_account(self, handle):
+        self._account = {
+            'cuenta': handle,
+            'fases': {},
+            'rutas': {},
+            '_inicio': time.perf_counter(),
+            '_comandos': self.command_counter()
+        }
+
+    def suspend_account(self):
+        """Apartar la cuenta en curso para intercalar otra; devuelve su estado para resume_account."""
+        account, self._account = self._account, None
+        return account
+
+    def resume_account(self, account):
+        self._account = account
+
+    def end_account(self, tweets, mode=None):
+        """Cerrar la cuenta en curso con los tweets extraídos y el modo de extracción usado."""
+        account, self._account = self._account, None
+        if account is None:
+            return
+        if mode:
+            path = f"modo_{mode.replace(' ', '_')}"
+            account['rutas'][path] = account['rutas'].get(path, 0) + 1
+            self.paths[path] = self.paths.get(path, 0) + 1
+        seconds = time.perf_counter() - account.pop('_inicio')
+        commands = self.command_counter() - account.pop('_comandos')
+        account.update({
+            'modo': mode,
+            'tweets': tweets,
+            'duracion_s': round(seconds, 3),
+            'tweets_por_s': _rate(tweets, seconds),
+            'comandos_webdriver': commands,
+            'comandos_por_tweet': round(commands / tweets, 2) if tweets else None
+        })
+        self.accounts[account['cuenta']] = account
+
+    def merge(self, other):
+        """Incorporar las métricas de otro scraper (trabajadores del modo paralelo)."""
+        for phase, entry in other.phases.items():
+            target = self.phases.setdefault(phase, _new_phase())
+            target['llamadas'] += entry['llamadas']
+            target['total_s'] += entry['total_s']
+            target['max_s'] = max(target['max_s'], entry['max_s'])
+            target['comandos'] += entry['comandos']
+        for path, n in other.paths.items():
+            self.paths[path] = self.paths.get(path, 0) + n
+        self.accounts.update(other.accounts)
+
+    def report(self):
+        """Informe completo como diccionario serializable a JSON."""
+        seconds = time.perf_counter() - self._started
+        tweets = sum(account['tweets'] for account in self.accounts.values())
+        commands = sum(account['comandos_webdriver'] for account in self.accounts.values())
+        return {
+            'inicio': self.started_at.isoformat(timespec='seconds'),
+            'duracion_s': round(seconds, 3),
+            'tweets': tweets,
+            'tweets_por_s': _rate(tweets, seconds),
+            'comandos_webdriver': commands,
+            'comandos_por_tweet': round(commands / tweets, 2) if tweets else None,
+            'fases': _phase_summary(self.phases),
+            'rutas': dict(self.paths),
+            'cuentas': {
+                handle: dict(account, fases=_phase_summary(account['fases']))
+                for handle, account in self.accounts.items()
+            }
+        }
+
+    def write_json(self, path, extra=None):
+        """Guardar el informe en JSON, con las secciones de extra añadidas. Devuelve la ruta."""
+        report = self.report()
+        report.update(extra or {})
+        _atomic_write(path, json.dumps(report, ensure_ascii=False, indent=2))
+        return path
+
+    def write_prometheus(self, path):
+        """Guardar las métricas en formato de texto de Prometheus. Devuelve la ruta."""
+        _atomic_write(path, prometheus_text(self.report()))
+        return path
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text(report):
+    """Convertir un informe en el formato de exposición de texto de Prometheus."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels.items())
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{label_text}}} {value}")
+
+    accounts = report['cuentas']
+    metric('tweets_total', 'counter', "Tweets extraídos por cuenta",
+           [({'cuenta': h}, a['tweets']) for h, a in accounts.items()])
+    metric('tweets_per_second', 'gauge', "Tweets por segundo por cuenta",
+           [({'cuenta': h}, a['tweets_por_s']) for h, a in accounts.items()])
+    metric('account_duration_seconds', 'gauge', "Duración de la extracción de cada cuenta",
+           [({'cuenta': h}, a['duracion_s']) for h, a in accounts.items()])
+    metric('webdriver_commands_total', 'counter', "Comandos WebDriver por cuenta",
+           [({'cuenta': h}, a['comandos_webdriver']) for h, a in accounts.items()])
+    metric('webdriver_commands_per_tweet', 'gauge', "Comandos WebDriver por tweet extraído",
+           [({'cuenta': h}, a['comandos_por_tweet']) for h, a in accounts.items()
+            if a['comandos_por_tweet'] is not None])
+    metric('phase_seconds_total', 'counter', "Segundos acumulados por fase",
+           [({'cuenta': h, 'fase': f}, p['total_s']) for h, a in accounts.items() for f, p in a['fases'].items()])
+    metric('phase_calls_total', 'counter', "Llamadas por fase",
+           [({'cuenta': h, 'fase': f}, p['llamadas']) for h, a in accounts.items() for f, p in a['fases'].items()])
+    metric('phase_webdriver_commands_total', 'counter', "Comandos WebDriver por fase",
+           [({'cuenta': h, 'fase': f}, p['comandos']) for h, a in accounts.items() for f, p in a['fases'].items()])
+    metric('path_total', 'counter', "Usos de cada ruta de extracción o de respaldo",
+           [({'cuenta': h, 'ruta': r}, n) for h, a in accounts.items() for r, n in a['rutas'].items()])
+    return "\n".join(lines) + "\n"
+
+def _atomic_write(path, content):
+    # El textfile collector puede leer el archivo en cualquier momento: se escribe aparte y se renombra
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,293 @@
+"""
+Medios (imágenes y videos) de los tweets: normalización y descarga deduplicada.
+
+Los registros de tweets incluyen 'media', una lista de {'url', 'tipo'} con tipo
+'foto', 'video' o 'gif'. MediaDownloader descarga esas URLs con un pool de
+hilos acotado y conexiones reutilizadas (urllib3, que ya instala selenium), y
+guarda cada archivo por el hash de su contenido:
+
+    {root}/ab/ab12...ef.jpg
+
+Así la misma imagen publicada por varias cuentas se guarda una sola vez. Un
+índice SQLite ({root}/media_index.sqlite) recuerda qué URL corresponde a qué
+archivo, de modo que las URLs ya descargadas no se vuelven a pedir.
+
+    with MediaDownloader('twitter_data/media') as downloader:
+        downloader.download_tweets(tweets)
+"""
+import os
+import hashlib
+import sqlite3
+import datetime
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from sinks import TweetSink
+
+MEDIA_TYPES = ('foto', 'video', 'gif')
+
+# Directorio por defecto de los archivos descargados
+DEFAULT_MEDIA_DIR = os.path.join('twitter_data', 'media')
+MEDIA_INDEX_NAME = 'media_index.sqlite'
+
+# Descargas pendientes por hilo antes de frenar a quien las encola
+PENDING_PER_WORKER = 4
+
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'video/mp4': '.mp4'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    ruta TEXT NOT NULL,
+    bytes INTEGER,
+    tipo_contenido TEXT,
+    descargado TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_media_sha256 ON media (sha256);
+"""
+
+def normalize_media_url(url):
+    """
+    Pedir las fotos de pbs.twimg.com/media en tamaño original: el DOM trae
+    name=small o name=900x900 según el ancho de la pantalla, y así la misma
+    foto tiene una sola URL.
+    """
+    parsed = urlparse(url)
+    if parsed.hostname != 'pbs.twimg.com' or not parsed.path.startswith('/media/'):
+        return url
+    query = parse_qs(parsed.query)
+    if 'format' not in query:
+        return url
+    return parsed._replace(query=urlencode({'format': query['format'][0], 'name': 'orig'})).geturl()
+
+def normalize_media(items):
+    """Lista de medios sin duplicados, con URLs http(s) normalizadas y tipos conocidos."""
+    media = []
+    seen = set()
+    for item in items or []:
+        url = (item.get('url') or "").strip()
+        if not url.startswith(('http://', 'https://')):
+            continue  # blob: de los videos por streaming, data: de los marcadores de posición
+        url = normalize_media_url(url)
+        if url in seen:
+            continue
+        seen.add(url)
+        tipo = item.get('tipo')
+        media.append({'url': url, 'tipo': tipo if tipo in MEDIA_TYPES else 'foto'})
+    return media
+
+def _extension(url, content_type):
+    extension = EXTENSIONS.get((content_type or "").split(';')[0].strip())
+    if extension:
+        return extension
+    query = parse_qs(urlparse(url).query)
+    if 'format' in query:
+        return f".{query['format'][0]}"
+    extension = os.path.splitext(urlparse(url).path)[1]
+    return extension if 0 < len(extension) <= 5 else ".bin"
+
+class MediaDownloader:
+    """
+    Descargador concurrente y deduplicado. max_workers hilos comparten un pool
+    de conexiones por host; cada URL se pide una sola vez aunque se encole
+    varias veces o llegue desde varias cuentas. Es seguro usarlo desde varios
+    hilos (p. ej. los trabajadores de scrape_multiple_accounts).
+    """
+
+    def __init__(self, root=DEFAULT_MEDIA_DIR, max_workers=8, timeout=30, retries=2):
+        import urllib3
+
+        self.root = root
+        if not os.path.exists(root):
+            os.makedirs(root)
+        self.http = urllib3.PoolManager(
+            num_pools=16, maxsize=max_workers, block=True,
+            timeout=urllib3.Timeout(connect=10, read=timeout),
+            retries=urllib3.Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)))
+        self.stats = {'descargados': 0, 'en_cache': 0, 'duplicados': 0, 'errores': 0, 'bytes': 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='media')
+        self._slots = threading.BoundedSemaphore(max_workers * PENDING_PER_WORKER)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, MEDIA_INDEX_NAME), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def cached(self, url):
+        """Entrada del índice de una URL ya descargada cuyo archivo sigue en disco (o None)."""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM media WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(os.path.join(self.root, row['ruta'])):
+            return None
+        return dict(row)
+
+    def _content_path(self, sha256, extension):
+        return os.path.join(sha256[:2], f"{sha256}{extension}")
+
+    def fetch(self, url):
+        """
+        Descargar una URL (bloqueante) salvo que ya esté en el índice. Devuelve
+        la entrada del índice o None si falla.
+        """
+        entry = self.cached(url)
+        if entry is not None:
+            self._count('en_cache')
+            return entry
+        try:
+            response = self.http.request('GET', url, preload_content=False)
+        except Exception as e:
+            print(f"Error al descargar {url}: {e}")
+            self._count('errores')
+            return None
+        try:
+            if response.status != 200:
+                print(f"Error al descargar {url}: HTTP {response.status}")
+                self._count('errores')
+                return None
+            content_type = response.headers.get('Content-Type', "")
+            # Se escribe a un temporal calculando el hash; el nombre final depende del contenido
+            digest = hashlib.sha256()
+            size = 0
+            fd, tmp_path = tempfile.mkstemp(prefix='.descarga-', dir=self.root)
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.stream(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        except Exception as e:
+            print(f"Error al descargar {url}: {e}")
+            self._count('errores')
+            return None
+        finally:
+            response.release_conn()
+
+        sha256 = digest.hexdigest()
+        ruta = self._content_path(sha256, _extension(url, content_type))
+        path = os.path.join(self.root, ruta)
+        with self._lock:
+            if os.path.exists(path):
+                # El mismo contenido ya llegó desde otra URL
+                os.remove(tmp_path)
+                self.stats['duplicados'] += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                self.stats['descargados'] += 1
+                self.stats['bytes'] += size
+            entry = {
+                'url': url,
+                'sha256': sha256,
+                'ruta': ruta,
+                'bytes': size,
+                'tipo_contenido': content_type,
+                'descargado': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO media (url, sha256, ruta, bytes, tipo_contenido, descargado) "
+                    "VALUES (:url, :sha256, :ruta, :bytes, :tipo_contenido, :descargado)", entry)
+        return entry
+
+    def submit(self, url):
+        """
+        Encolar la descarga de una URL y devolver su Future. Una URL que ya se
+        está descargando devuelve el mismo Future. Si hay demasiadas descargas
+        pendientes, espera a que se libere un lugar.
+        """
+        url = normalize_media_url(url)
+        with self._lock:
+            future = self._in_flight.get(url)
+            if future is not None:
+                return future
+        self._slots.acquire()
+        with self._lock:
+            future = self._in_flight.get(url)
+            if future is not None:
+                self._slots.release()
+                return future
+            future = self._executor.submit(self.fetch, url)
+            self._in_flight[url] = future
+
+        def done(_):
+            with self._lock:
+                self._in_flight.pop(url, None)
+            self._slots.release()
+
+        future.add_done_callback(done)
+        return future
+
+    def submit_tweet(self, tweet):
+        """Encolar los medios de un tweet. Devuelve los Future."""
+        return [self.submit(item['url']) for item in tweet.get('media') or [] if item.get('url')]
+
+    def download(self, urls):
+        """Descargar varias URLs en paralelo y esperar. Devuelve {url: entrada o None}."""
+        futures = {url: self.submit(url) for url in urls}
+        return {url: future.result() for url, future in futures.items()}
+
+    def download_tweets(self, tweets):
+        """Descargar los medios de una lista de tweets. Devuelve {url: entrada o None}."""
+        return self.download([item['url'] for tweet in tweets for item in tweet.get('media') or []
+                              if item.get('url')])
+
+    def wait(self):
+        """Esperar a que terminen las descargas encoladas."""
+        with self._lock:
+            pending = list(self._in_flight.values())
+        for future in pending:
+            future.result()
+
+    def close(self):
+        """Esperar las descargas pendientes y liberar el pool y el índice."""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self.http.clear()
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class MediaDownloadSink(TweetSink):
+    """
+    Etapa de descarga delante de otro sink: cada tweet se pasa al sink interno
+    y sus medios se encolan en el descargador, que trabaja en segundo plano.
+    """
+
+    def __init__(self, sink, downloader):
+        super().__init__()
+        self.sink = sink
+        self.downloader = downloader
+        self.path = sink.path
+
+    def _write(self, record):
+        self.sink.write(record)
+        self.downloader.submit_tweet(record)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
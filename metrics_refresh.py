@@ -0,0 +1,322 @@
+"""
+Refresco de métricas: volver a leer solo los contadores de tweets ya extraídos.
+
+La interacción de un tweet sigue creciendo durante días, pero volver a raspar
+la cuenta completa repite texto, fecha y medios que ya están guardados.
+MetricsRefresher recibe los tweets conocidos (con url o status_id y sus
+contadores anteriores) y lee solo los contadores actuales:
+
+- por lotes desde el timeline de cada cuenta: cada cosecha del DOM trae los
+  contadores de todos los tweets visibles, y se hace scroll hasta encontrar
+  todos los pendientes o pasar el más antiguo;
+- desde la página de cada tweet (/cuenta/status/id), para los que el timeline
+  no mostró (modo 'auto') o para todos (modo 'estado').
+
+Los tweets con más de max_age_days días se omiten: sus contadores ya casi no
+cambian. Por cada tweet con cambios se escribe una fila compacta con status_id,
+refrescado (fecha y hora UTC) y la diferencia de cada contador; los que no
+cambiaron no escriben nada. Las filas van a refresco_{fecha}.csv (o .jsonl) en
+el directorio de salida, y load_known_tweets las suma a la última extracción
+completa de cada tweet para el siguiente refresco:
+
+    known = load_known_tweets('twitter_data')
+    with TwitterScraper(headless=True) as scraper:
+        MetricsRefresher(scraper, max_age_days=7).refresh_to_file(known, 'twitter_data')
+
+load_known_tweets usa la analítica de analytics.py, así que requiere numpy.
+"""
+import os
+import csv
+import json
+import time
+import datetime
+
+from sinks import INT_FIELDS, DELTA_FIELDNAMES, open_sink
+from tweet_index import status_id_from_url
+from tweet_records import parse_tweet_date, stats_from_labels
+
+REFRESH_MAX_AGE_DAYS = 7
+DELTA_FILE_PREFIX = 'refresco_'
+BASE_URL = "https://x.com"
+MODES = ('auto', 'timeline', 'estado')
+
+# Scrolls como máximo por cuenta al buscar los tweets en el timeline
+MAX_REFRESH_SCROLLS = 30
+# Scrolls seguidos sin tweets nuevos antes de dar el timeline por terminado (como en twitter_scraper)
+MAX_STALE_SCROLLS = 3
+
+def _utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _status_id(tweet):
+    return str(tweet.get('status_id') or status_id_from_url(tweet.get('url')) or "")
+
+def _counters(values):
+    counters = {}
+    for field in INT_FIELDS:
+        try:
+            counters[field] = int(values.get(field) or 0)
+        except (TypeError, ValueError):
+            counters[field] = 0
+    return counters
+
+def record_counters(record):
+    """Contadores de un registro crudo del DOM (o del modo red, que ya los trae exactos)."""
+    if record.get('estadisticas'):
+        return _counters(record['estadisticas'])
+    return stats_from_labels(record.get('metric_labels') or {}, record.get('group_labels') or [])
+
+def select_targets(tweets, max_age_days=REFRESH_MAX_AGE_DAYS, now=None):
+    """
+    Tweets a refrescar: {status_id: tweet}, sin repetidos ni los de más de
+    max_age_days días (los de fecha desconocida se refrescan). Devuelve
+    (objetivos, cuántos se omitieron por antigüedad).
+    """
+    cutoff = (now or _utc_now()) - datetime.timedelta(days=max_age_days) if max_age_days else None
+    targets = {}
+    skipped = 0
+    for tweet in tweets:
+        status_id = _status_id(tweet)
+        if not status_id.isdigit():
+            continue
+        fecha = parse_tweet_date(tweet.get('fecha'))
+        if cutoff is not None and fecha is not None and fecha < cutoff:
+            skipped += 1
+            continue
+        targets[status_id] = tweet
+    return targets, skipped
+
+def delta_row(status_id, previous, current, refreshed_at):
+    """Fila de cambios de un tweet, o None si ningún contador cambió."""
+    previous = _counters(previous)
+    changes = {field: current[field] - previous[field] for field in INT_FIELDS}
+    if not any(changes.values()):
+        return None
+    row = {'status_id': status_id, 'refrescado': refreshed_at}
+    row.update(changes)
+    return row
+
+def _account_url(tweet, base_url=BASE_URL):
+    url = tweet.get('url') or ""
+    if '/status/' in url:
+        return url.split('/status/')[0]
+    return f"{base_url}/{tweet.get('cuenta')}"
+
+def _status_url(tweet, status_id, base_url=BASE_URL):
+    return tweet.get('url') or f"{_account_url(tweet, base_url)}/status/{status_id}"
+
+class MetricsRefresher:
+    """
+    Refrescar los contadores de tweets conocidos con el navegador de scraper.
+    mode: 'auto' (timeline y luego páginas de estado para los que falten),
+    'timeline' o 'estado'. self.stats acumula lo hecho en cada refresh().
+    """
+
+    def __init__(self, scraper, max_age_days=REFRESH_MAX_AGE_DAYS, mode='auto', max_scrolls=MAX_REFRESH_SCROLLS):
+        if mode not in MODES:
+            raise ValueError(f"Modo de refresco no válido: {mode}")
+        self.scraper = scraper
+        self.max_age_days = max_age_days
+        self.mode = mode
+        self.max_scrolls = max_scrolls
+        self.stats = {
+            'tweets': 0,
+            'omitidos_antiguedad': 0,
+            'leidos_timeline': 0,
+            'leidos_estado': 0,
+            'no_encontrados': 0,
+            'con_cambios': 0,
+            'paginas': 0,
+            'duracion_s': 0.0
+        }
+
+    def _read(self, status_id, record, pending, found):
+        """Guardar los contadores de un tweet pendiente leído en la página."""
+        counters = record_counters(record)
+        previous = _counters(pending[status_id])
+        # Métricas sin dibujar todavía: contadores en cero que antes no lo estaban
+        if not any(counters.values()) and any(previous.values()):
+            return False
+        found[status_id] = counters
+        del pending[status_id]
+        return True
+
+    def _refresh_from_timeline(self, account_url, pending, found):
+        """Buscar los tweets pendientes de una cuenta haciendo scroll en su timeline."""
+        scraper = self.scraper
+        account_handle = scraper.get_account_name(account_url)
+        self.stats['paginas'] += 1
+        if not scraper._load_timeline(account_url):
+            return 0
+        oldest_pending = min(int(status_id) for status_id in pending)
+        read = 0
+        stale_scrolls = 0
+        seen = set()
+        for scroll in range(self.max_scrolls + 1):
+            records = scraper._harvest_raw_records(account_handle, first=scroll == 0)
+            if records is None:
+                print("La extracción por lotes no está disponible; el refresco por timeline necesita lotes")
+                break
+            new_records = 0
+            oldest_seen = None
+            for record in records:
+                status_id = str(record.get('status_id') or "")
+                if not status_id.isdigit() or status_id in seen:
+                    continue
+                seen.add(status_id)
+                new_records += 1
+                if not record.get('fijado') and not record.get('reposteado') and not record.get('promocionado'):
+                    oldest_seen = min(oldest_seen or int(status_id), int(status_id))
+                if status_id in pending and self._read(status_id, record, pending, found):
+                    read += 1
+            scraper._log(f"Refresco de {account_handle}, scroll {scroll}: {read} leídos, {len(pending)} pendientes")
+            # El timeline es cronológico inverso: pasado el pendiente más antiguo ya no aparecerán
+            if not pending or (oldest_seen is not None and oldest_seen < oldest_pending):
+                break
+            stale_scrolls = stale_scrolls + 1 if new_records == 0 else 0
+            if stale_scrolls >= MAX_STALE_SCROLLS:
+                break
+            if scroll < self.max_scrolls:
+                scraper._scroll_once()
+        return read
+
+    def _refresh_from_status_page(self, tweet, status_id, pending, found):
+        """Leer los contadores de un tweet en su propia página."""
+        scraper = self.scraper
+        url = _status_url(tweet, status_id)
+        self.stats['paginas'] += 1
+        if not scraper._load_timeline(url):
+            return False
+        # La página de estado también muestra respuestas: se toma el registro con el status id buscado
+        records = scraper._harvest_raw_records(scraper.get_account_name(url), first=True) or []
+        for record in records:
+            if str(record.get('status_id') or "") == status_id:
+                return self._read(status_id, record, pending, found)
+        return False
+
+    def refresh(self, tweets, sink=None):
+        """
+        Refrescar los contadores de tweets (diccionarios con url o status_id,
+        cuenta, fecha y los contadores anteriores). Devuelve las filas de
+        cambios y, si se indica sink, las escribe en él.
+        """
+        started = time.perf_counter()
+        targets, skipped = select_targets(tweets, self.max_age_days)
+        self.stats['tweets'] += len(targets)
+        self.stats['omitidos_antiguedad'] += skipped
+        print(f"Refrescando {len(targets)} tweets ({skipped} omitidos por tener más de {self.max_age_days} días)")
+
+        by_account = {}
+        for status_id, tweet in targets.items():
+            by_account.setdefault(_account_url(tweet), {})[status_id] = tweet
+
+        rows = []
+        for position, (account_url, pending) in enumerate(by_account.items()):
+            if position:
+                self.scraper.pause_between_accounts()
+            found = {}
+            if self.mode != 'estado':
+                self.stats['leidos_timeline'] += self._refresh_from_timeline(account_url, pending, found)
+            if self.mode != 'timeline':
+                for status_id, tweet in sorted(pending.items(), reverse=True):
+                    if self._refresh_from_status_page(tweet, status_id, pending, found):
+                        self.stats['leidos_estado'] += 1
+            self.stats['no_encontrados'] += len(pending)
+
+            refreshed_at = _utc_now().isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+            account_rows = [row for row in (delta_row(status_id, targets[status_id], counters, refreshed_at)
+                                            for status_id, counters in found.items()) if row]
+            self.stats['con_cambios'] += len(account_rows)
+            print(f"{self.scraper.get_account_name(account_url)}: {len(found)} tweets leídos, "
+                  f"{len(account_rows)} con cambios, {len(pending)} no encontrados")
+            if sink is not None:
+                sink.write_many(account_rows)
+            rows.extend(account_rows)
+        self.stats['duracion_s'] = round(self.stats['duracion_s'] + time.perf_counter() - started, 1)
+        return rows
+
+    def refresh_to_file(self, tweets, output_dir, output_format='csv', timestamp=None):
+        """Refrescar y guardar los cambios en output_dir/refresco_{timestamp}. Devuelve la ruta."""
+        timestamp = timestamp or datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        sink = open_sink(output_format, os.path.join(output_dir, f"{DELTA_FILE_PREFIX}{timestamp}"))
+        sink.fieldnames = DELTA_FIELDNAMES
+        with sink:
+            self.refresh(tweets, sink)
+        print_stats(self.stats)
+        if sink.count:
+            print(f"Cambios guardados en {sink.path}")
+        return sink.path
+
+def print_stats(stats):
+    print(f"Refresco: {stats['tweets']} tweets, {stats['leidos_timeline']} leídos en timelines, "
+          f"{stats['leidos_estado']} en páginas de estado, {stats['no_encontrados']} no encontrados, "
+          f"{stats['con_cambios']} con cambios ({stats['paginas']} páginas en {stats['duracion_s']}s)")
+
+def delta_files(output_dir):
+    """Archivos de cambios de refrescos anteriores, del más antiguo al más reciente."""
+    if not os.path.isdir(output_dir):
+        return []
+    return [os.path.join(output_dir, name) for name in sorted(os.listdir(output_dir))
+            if name.startswith(DELTA_FILE_PREFIX) and name.endswith(('.csv', '.jsonl'))]
+
+def read_delta_rows(path):
+    if path.endswith('.jsonl'):
+        rows = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue  # Línea cortada por una interrupción
+        return rows
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def load_known_tweets(output_dir='twitter_data', max_age_days=REFRESH_MAX_AGE_DAYS, base_url=BASE_URL):
+    """
+    Tweets conocidos de output_dir con sus contadores vigentes: la extracción
+    completa más reciente de cada tweet más los cambios de los refrescos
+    posteriores a ella. Con max_age_days se descartan de entrada los antiguos.
+    """
+    import numpy as np
+    from analytics import EngagementAnalytics
+
+    analytics = EngagementAnalytics(output_dir)
+    analytics.update()
+    columns = analytics.columns
+    rows = analytics.latest_rows()
+    rows = rows[columns['status_id'][rows] > 0]
+    if max_age_days:
+        cutoff = np.datetime64(_utc_now().replace(tzinfo=None), 'ms') - np.timedelta64(max_age_days, 'D')
+        fechas = columns['fecha'][rows]
+        rows = rows[np.isnat(fechas) | (fechas >= cutoff)]
+
+    known = {}
+    extracted = {}
+    for row in rows.tolist():
+        account = analytics.accounts[columns['cuenta'][row]]
+        status_id = str(columns['status_id'][row])
+        fecha = columns['fecha'][row]
+        tweet = {
+            'cuenta': account,
+            'status_id': status_id,
+            'url': f"{base_url}/{account}/status/{status_id}",
+            'fecha': "" if np.isnat(fecha) else f"{np.datetime_as_string(fecha, unit='ms')}Z"
+        }
+        tweet.update({field: int(columns[field][row]) for field in INT_FIELDS})
+        known[status_id] = tweet
+        extracted[status_id] = int(columns['extraido'][row].astype(np.int64))
+
+    # Sumar los cambios refrescados después de la última extracción completa
+    for path in delta_files(output_dir):
+        for delta in read_delta_rows(path):
+            status_id = str(delta.get('status_id') or "")
+            refreshed = parse_tweet_date(delta.get('refrescado'))
+            if status_id not in known or refreshed is None:
+                continue
+            if refreshed.timestamp() * 1000 <= extracted[status_id]:
+                continue
+            tweet = known[status_id]
+            for field, change in _counters(delta).items():
+                tweet[field] += change
+    return list(known.values())
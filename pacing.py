@@ -0,0 +1,179 @@
+"""
+Ritmo adaptativo (AIMD) con cortacircuitos para las pausas del scraper.
+
+En lugar de una pausa fija con variación aleatoria, AdaptivePacer ajusta la
+tasa de acciones (scrolls y cargas de página) según las señales de bloqueo
+que reporta el scraper:
+- 'carga_pagina': la página no mostró ningún selector de carga a tiempo;
+- 'login': apareció la ventana emergente de inicio de sesión;
+- 'sin_celdas': un scroll no cargó celdas nuevas (también ocurre al final de
+  un timeline, por eso pesa la mitad).
+
+Cada acción exitosa suma increase acciones/s a la tasa (aumento aditivo) y
+cada señal la multiplica por decrease elevado a su peso (disminución
+multiplicativa), entre 1/max_delay y 1/min_delay. Si las señales consecutivas
+suman breaker_threshold, el circuito se abre: nadie carga ni hace scroll
+durante cooldown segundos (que se duplica con cada apertura seguida, hasta
+max_cooldown). Después el circuito queda semiabierto y la siguiente acción
+decide: un éxito lo cierra y una señal lo vuelve a abrir.
+
+Un mismo AdaptivePacer se comparte entre los navegadores de una sesión (los
+bloqueos dependen de la IP, no del navegador) y es seguro entre hilos.
+"""
+import time
+import random
+import threading
+
+BLOCK_SIGNALS = {
+    'carga_pagina': 1.0,
+    'login': 1.0,
+    'sin_celdas': 0.5
+}
+# Pausa entre cuentas en múltiplos del retardo actual (0,3 s -> unos 6 s)
+ACCOUNT_PAUSE_FACTOR = 20
+ACCOUNT_PAUSE_LIMITS = (1.0, 300.0)
+
+CLOSED = 'cerrado'
+OPEN = 'abierto'
+HALF_OPEN = 'semiabierto'
+
+class AdaptivePacer:
+    """
+    Controlador de ritmo AIMD. initial_delay es el retardo de partida entre
+    acciones, acotado a [min_delay, max_delay]; rate y delay devuelven el
+    valor actual.
+    """
+
+    def __init__(self, initial_delay=0.3, min_delay=0.1, max_delay=15.0, increase=0.1, decrease=0.5,
+                 breaker_threshold=3, cooldown=60.0, max_cooldown=900.0):
+        if not 0 < min_delay <= max_delay:
+            raise ValueError("Se necesita 0 < min_delay <= max_delay")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease debe estar entre 0 y 1")
+        self.min_rate = 1.0 / max_delay
+        self.max_rate = 1.0 / min_delay
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_threshold = breaker_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._rate = min(self.max_rate, max(self.min_rate, 1.0 / max(initial_delay, 1e-6)))
+        self._state = CLOSED
+        self._strikes = 0.0
+        self._trips_in_row = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            'exitos': 0,
+            'bloqueos': {},
+            'aperturas': 0,
+            'espera_circuito_s': 0.0,
+            'tasa_min': self._rate,
+            'tasa_max': self._rate
+        }
+
+    @property
+    def rate(self):
+        """Acciones por segundo permitidas ahora."""
+        return self._rate
+
+    @property
+    def delay(self):
+        """Retardo actual entre acciones, en segundos."""
+        return 1.0 / self._rate
+
+    @property
+    def state(self):
+        return self._state
+
+    def _set_rate(self, rate):
+        self._rate = min(self.max_rate, max(self.min_rate, rate))
+        self.stats['tasa_min'] = min(self.stats['tasa_min'], self._rate)
+        self.stats['tasa_max'] = max(self.stats['tasa_max'], self._rate)
+
+    def success(self):
+        """Una acción sin señales de bloqueo: aumento aditivo (y cierre del circuito semiabierto)."""
+        with self._lock:
+            self.stats['exitos'] += 1
+            if self._state == HALF_OPEN:
+                print("Circuito de ritmo cerrado: X vuelve a responder")
+                self._state = CLOSED
+                self._trips_in_row = 0
+            self._strikes = 0.0
+            if self._state == CLOSED:
+                self._set_rate(self._rate + self.increase)
+
+    def block(self, kind):
+        """Registrar una señal de bloqueo (ver BLOCK_SIGNALS): disminución multiplicativa."""
+        weight = BLOCK_SIGNALS.get(kind, 1.0)
+        with self._lock:
+            self.stats['bloqueos'][kind] = self.stats['bloqueos'].get(kind, 0) + 1
+            self._set_rate(self._rate * self.decrease ** weight)
+            if self._state == OPEN:
+                # Acciones que ya estaban en curso al abrirse el circuito
+                return
+            self._strikes += weight
+            if self._state == HALF_OPEN or self._strikes >= self.breaker_threshold:
+                self._open()
+
+    def _open(self):
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** self._trips_in_row)
+        self._state = OPEN
+        self._open_until = time.monotonic() + cooldown
+        self._trips_in_row += 1
+        self._strikes = 0.0
+        self.stats['aperturas'] += 1
+        print(f"Circuito de ritmo abierto: demasiadas señales de bloqueo, pausa de {cooldown:.0f}s "
+              f"(retardo {self.delay:.2f}s)")
+
+    def gate(self):
+        """Esperar mientras el circuito esté abierto. Devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                if self._state != OPEN:
+                    break
+                remaining = self._open_until - time.monotonic()
+                if remaining <= 0:
+                    self._state = HALF_OPEN
+                    break
+            time.sleep(remaining)
+            waited += remaining
+        if waited:
+            with self._lock:
+                self.stats['espera_circuito_s'] += waited
+        return waited
+
+    def pause(self):
+        """Pausa entre acciones: el retardo actual con ±20 % de variación. Devuelve los segundos esperados."""
+        waited = self.gate()
+        seconds = random.uniform(self.delay * 0.8, self.delay * 1.2)
+        time.sleep(seconds)
+        return waited + seconds
+
+    def account_pause(self):
+        """Pausa entre cuentas proporcional al retardo actual. Devuelve los segundos esperados."""
+        waited = self.gate()
+        seconds = self.account_pause_seconds()
+        time.sleep(seconds)
+        return waited + seconds
+
+    def account_pause_seconds(self):
+        """Duración de la pausa entre cuentas con el retardo actual, sin esperarla."""
+        low, high = ACCOUNT_PAUSE_LIMITS
+        return min(high, max(low, self.delay * ACCOUNT_PAUSE_FACTOR * random.uniform(0.8, 1.2)))
+
+    def snapshot(self):
+        """Estado actual y contadores, para el informe de la ejecución."""
+        with self._lock:
+            return {
+                'estado': self._state,
+                'retardo_s': round(self.delay, 3),
+                'acciones_por_minuto': round(self._rate * 60, 1),
+                'acciones_por_minuto_min': round(self.stats['tasa_min'] * 60, 1),
+                'acciones_por_minuto_max': round(self.stats['tasa_max'] * 60, 1),
+                'exitos': self.stats['exitos'],
+                'bloqueos': dict(self.stats['bloqueos']),
+                'aperturas': self.stats['aperturas'],
+                'espera_circuito_s': round(self.stats['espera_circuito_s'], 1)
+            }
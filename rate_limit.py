@@ -0,0 +1,80 @@
+"""
+Limitador de tasa por host (cubeta de fichas) compartido entre navegadores.
+
+Cada host tiene una cubeta que se rellena a rate fichas por segundo hasta
+burst fichas. Cada carga de página o scroll toma una ficha; si no hay, se
+espera lo justo hasta que la haya. Funciona tanto desde hilos (acquire) como
+desde asyncio (acquire_async), con el mismo estado.
+"""
+import time
+import asyncio
+import threading
+from urllib.parse import urlparse
+
+class TokenBucket:
+    """
+    Cubeta de fichas con reserva: cada llamada reserva su ficha al momento y
+    devuelve cuánto debe esperar, así las esperas concurrentes quedan en fila
+    sin volver a competir.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate debe ser mayor que 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Tomar una ficha y devolver los segundos que hay que esperar para usarla."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Versión bloqueante (hilos). Devuelve los segundos esperados."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Versión para asyncio: no bloquea el bucle de eventos."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+class HostRateLimiter:
+    """
+    Una cubeta por host. rate y burst son los valores por defecto; per_host
+    permite fijar otros por host, p. ej. {'x.com': (0.5, 2)}.
+    """
+
+    def __init__(self, rate=0.5, burst=2, per_host=None):
+        self.rate = rate
+        self.burst = burst
+        self.per_host = dict(per_host or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = (urlparse(url).hostname or url).lower()
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.per_host.get(host, (self.rate, self.burst))
+                self._buckets[host] = TokenBucket(rate, burst)
+            return self._buckets[host]
+
+    def acquire(self, url):
+        return self.bucket(url).acquire()
+
+    async def acquire_async(self, url):
+        return await self.bucket(url).acquire_async()
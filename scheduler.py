@@ -0,0 +1,269 @@
+"""
+Planificador adaptativo de visitas periódicas a las cuentas.
+
+En lugar de raspar todas las cuentas con el mismo número de tweets en cada
+cron, estima la frecuencia de publicación de cada cuenta a partir de las
+fechas de los tweets ya recolectados y mantiene una cola de prioridad con la
+próxima visita de cada una. Las cuentas activas se visitan más seguido y las
+calladas casi no consumen navegador: cada visita pide solo los tweets
+posteriores al último visto y un presupuesto acorde a los que se esperan.
+
+    scraper = TwitterScraper(headless=True)
+    AccountScheduler(scraper, accounts, output_dir='twitter_data').run()
+"""
+import os
+import json
+import math
+import time
+import heapq
+import datetime
+import threading
+
+from sinks import open_sink
+from tweet_records import parse_tweet_date
+
+# Tweets nuevos que se espera encontrar en cada visita; fija el intervalo entre visitas
+TARGET_NEW_TWEETS = 5
+
+# Límites del intervalo entre visitas (segundos) y del presupuesto de tweets por visita
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = 7 * 24 * 3600
+MIN_BUDGET = 5
+MAX_BUDGET = 200
+
+# Tope del intervalo mientras no hay estimación: se duplica desde MIN_INTERVAL con cada visita
+NO_RATE_MAX_INTERVAL = 6 * 3600
+
+# Tope de la espera tras visitas fallidas seguidas: se duplica desde MIN_INTERVAL con cada fallo
+MAX_FAILURE_BACKOFF = 4 * 3600
+
+# Presupuesto de la primera visita, cuando aún no hay estimación
+INITIAL_BUDGET = 20
+
+# Fechas que se conservan por cuenta para estimar la frecuencia
+RATE_WINDOW = 30
+
+# Peso de la estimación nueva frente a la anterior
+RATE_SMOOTHING = 0.5
+
+# Margen sobre los tweets esperados al fijar el presupuesto
+BUDGET_MARGIN = 1.5
+
+def estimate_rate(fechas, now=None):
+    """
+    Tweets por hora según las fechas dadas (texto ISO o datetime). Se mide
+    desde el tweet más antiguo de la ventana hasta ahora, así que una cuenta
+    que dejó de publicar baja su tasa aunque antes publicara seguido.
+    Devuelve None si hay menos de dos fechas válidas.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    dates = sorted((d for d in (parse_tweet_date(f) for f in fechas) if d is not None), reverse=True)
+    dates = dates[:RATE_WINDOW]
+    if len(dates) < 2:
+        return None
+    hours = max((now - dates[-1]).total_seconds() / 3600, 1.0)
+    return len(dates) / hours
+
+class AccountSchedule:
+    """Estado de planificación de una cuenta (se guarda en el archivo de estado)."""
+
+    def __init__(self, url, handle, fechas=None, rate=None, last_visit=None, next_due=0.0, last_fecha=None,
+                 last_urls=None, visits=0, failures=0):
+        self.url = url
+        self.handle = handle
+        self.fechas = list(fechas or [])
+        self.rate = rate
+        self.last_visit = last_visit
+        self.next_due = next_due
+        self.last_fecha = last_fecha
+        self.last_urls = list(last_urls or [])
+        self.visits = visits
+        self.failures = failures
+
+    def budget(self, now):
+        """Tweets a pedir en la próxima visita según los que se esperan desde la anterior."""
+        if self.rate is None or self.last_visit is None:
+            return INITIAL_BUDGET
+        expected = self.rate * (now - self.last_visit) / 3600
+        return int(min(MAX_BUDGET, max(MIN_BUDGET, math.ceil(expected * BUDGET_MARGIN))))
+
+    def interval(self):
+        """
+        Segundos hasta la próxima visita: el tiempo en que se esperan
+        TARGET_NEW_TWEETS tweets. Sin estimación (cuenta nueva o con menos de
+        dos fechas) se parte de MIN_INTERVAL y se duplica con cada visita hasta
+        NO_RATE_MAX_INTERVAL.
+        """
+        if not self.rate:
+            return min(NO_RATE_MAX_INTERVAL, MIN_INTERVAL * 2 ** min(self.visits, 16))
+        return min(MAX_INTERVAL, max(MIN_INTERVAL, TARGET_NEW_TWEETS / self.rate * 3600))
+
+    def record_visit(self, tweets, now):
+        """Actualizar fechas, tasa y próxima visita con los tweets de una visita."""
+        new_fechas = [tweet.get('fecha') for tweet in tweets if tweet.get('fecha')]
+        self.fechas = sorted(set(self.fechas + new_fechas), reverse=True)[:RATE_WINDOW]
+        estimate = estimate_rate(self.fechas, datetime.datetime.fromtimestamp(now, datetime.timezone.utc))
+        if estimate is not None:
+            self.rate = estimate if self.rate is None else (
+                RATE_SMOOTHING * estimate + (1 - RATE_SMOOTHING) * self.rate)
+        if self.fechas:
+            self.last_fecha = self.fechas[0]
+        if tweets:
+            self.last_urls = [tweet.get('url') for tweet in tweets if tweet.get('url')][:50]
+        self.last_visit = now
+        self.visits += 1
+        self.failures = 0
+        self.next_due = now + self.interval()
+
+    def record_failure(self, now, tweets=()):
+        """
+        Reprogramar una visita fallida (la página no cargó o la extracción se
+        cortó): no cuenta como visita sin tweets nuevos ni cambia la tasa; se
+        reintenta tras MIN_INTERVAL, duplicado con cada fallo seguido hasta
+        MAX_FAILURE_BACKOFF. tweets son los que la visita alcanzó a guardar:
+        se marcan como vistos para no repetirlos en el reintento, que vuelve a
+        pedir desde la misma fecha.
+        """
+        self.last_urls = [tweet.get('url') for tweet in tweets if tweet.get('url')] + self.last_urls
+        self.failures += 1
+        self.next_due = now + min(MAX_FAILURE_BACKOFF, MIN_INTERVAL * 2 ** min(self.failures - 1, 16))
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'cuenta': self.handle,
+            'fechas': self.fechas,
+            'tasa_por_hora': self.rate,
+            'ultima_visita': self.last_visit,
+            'proxima_visita': self.next_due,
+            'ultima_fecha': self.last_fecha,
+            'ultimas_urls': self.last_urls,
+            'visitas': self.visits,
+            'fallos': self.failures
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['url'], data['cuenta'], data.get('fechas'), data.get('tasa_por_hora'),
+                   data.get('ultima_visita'), data.get('proxima_visita') or 0.0, data.get('ultima_fecha'),
+                   data.get('ultimas_urls'), data.get('visitas') or 0, data.get('fallos') or 0)
+
+class AccountScheduler:
+    """
+    Bucle de larga duración que visita cada cuenta cuando le toca. Los tweets
+    nuevos se agregan a {output_dir}/{cuenta}_programado.csv (o .jsonl) y el
+    estado se guarda en state_path para continuar tras un reinicio.
+    """
+
+    def __init__(self, scraper, account_urls, output_dir='twitter_data', output_format='csv', state_path=None):
+        self.scraper = scraper
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.state_path = state_path or os.path.join(output_dir, 'planificador.json')
+        self.schedules = {}
+        self._stop_event = threading.Event()
+        self._load_state()
+        for url in account_urls:
+            handle = scraper.get_account_name(url)
+            if handle not in self.schedules:
+                self.schedules[handle] = AccountSchedule(url, handle, fechas=self._indexed_dates(handle))
+        # Cola de prioridad de (próxima visita, cuenta), solo con las cuentas pedidas
+        handles = {scraper.get_account_name(url) for url in account_urls}
+        self._queue = [(schedule.next_due, handle) for handle, schedule in self.schedules.items()
+                       if handle in handles]
+        heapq.heapify(self._queue)
+
+    def _indexed_dates(self, handle):
+        """Fechas ya guardadas en el índice de tweets, si el scraper tiene uno."""
+        if self.scraper.tweet_index is None:
+            return []
+        return self.scraper.tweet_index.recent_dates(handle, RATE_WINDOW)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            for data in json.load(f).values():
+                schedule = AccountSchedule.from_dict(data)
+                self.schedules[schedule.handle] = schedule
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({handle: s.to_dict() for handle, s in self.schedules.items()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def stop(self):
+        """Pedir que el bucle termine (se puede llamar desde otro hilo)."""
+        self._stop_event.set()
+
+    def visit(self, schedule, now=None):
+        """
+        Raspar los tweets nuevos de una cuenta y reprogramarla. Devuelve los
+        tweets nuevos. Si la extracción falla el error se propaga (run
+        reprograma la cuenta con record_failure).
+        """
+        now = now or time.time()
+        budget = schedule.budget(now)
+        print(f"\nVisitando {schedule.handle}: presupuesto {budget} tweets "
+              f"(tasa estimada: {schedule.rate or 0:.2f} tweets/hora)")
+        # Solo los posteriores al último tweet visto: la extracción se corta al llegar a él
+        tweets = self.scraper.scrape_account(schedule.url, budget, since=schedule.last_fecha)
+        new_tweets = self._save_new_tweets(schedule, tweets)
+        schedule.record_visit(new_tweets, now)
+        self._save_state()
+        next_visit = datetime.datetime.fromtimestamp(schedule.next_due).strftime('%Y-%m-%d %H:%M')
+        print(f"{schedule.handle}: {len(new_tweets)} tweets nuevos, próxima visita {next_visit}")
+        return new_tweets
+
+    def _save_new_tweets(self, schedule, tweets):
+        """Agregar al archivo de la cuenta los tweets que no se vieron en la visita anterior. Los devuelve."""
+        seen = set(schedule.last_urls)
+        new_tweets = [tweet for tweet in tweets if tweet.get('url') not in seen]
+        if new_tweets:
+            with open_sink(self.output_format, os.path.join(self.output_dir, f"{schedule.handle}_programado")) as sink:
+                sink.write_many(new_tweets)
+        return new_tweets
+
+    def run(self, max_visits=None):
+        """
+        Visitar las cuentas en orden de próxima visita, esperando entre una y
+        otra, hasta stop() o max_visits visitas. Devuelve las visitas hechas.
+        Entre dos visitas se hace siempre la pausa entre cuentas del scraper,
+        aunque la siguiente ya esté vencida (como en la primera pasada).
+        """
+        visits = 0
+        while self._queue and not self._stop_event.is_set():
+            if max_visits is not None and visits >= max_visits:
+                break
+            if visits:
+                self.scraper.pause_between_accounts()
+            due, handle = heapq.heappop(self._queue)
+            wait = due - time.time()
+            if wait > 0:
+                print(f"Próxima visita: {handle} en {wait / 60:.1f} minutos")
+                if self._stop_event.wait(wait):
+                    heapq.heappush(self._queue, (due, handle))
+                    break
+            schedule = self.schedules[handle]
+            try:
+                self.visit(schedule)
+            except Exception as e:
+                # scrape_account deja en records (AccountScrapeError) lo extraído antes del fallo
+                saved = []
+                try:
+                    saved = self._save_new_tweets(schedule, getattr(e, 'records', None) or [])
+                except Exception as save_error:
+                    print(f"No se pudieron guardar los tweets parciales de {handle}: {save_error}")
+                schedule.record_failure(time.time(), saved)
+                self._save_state()
+                retry = datetime.datetime.fromtimestamp(schedule.next_due).strftime('%Y-%m-%d %H:%M')
+                print(f"Error al visitar {handle} ({schedule.failures} fallos seguidos): {e}; reintento {retry}")
+                if not self.scraper.is_alive():
+                    self.scraper.restart_driver()
+            visits += 1
+            heapq.heappush(self._queue, (schedule.next_due, handle))
+        return visits
@@ -0,0 +1,158 @@
+"""
+Registro de estrategias (selectores o métodos) que se ajusta solo según cuál funciona.
+
+Para cada campo (p. ej. 'contenido' o 'estadisticas') se guarda cuántas veces
+se probó y acertó cada estrategia. La que acierta pasa a probarse primero el
+resto de la sesión y las estadísticas se guardan en disco para que la
+siguiente ejecución empiece con el orden correcto. Si la estrategia ganadora
+empieza a fallar mientras otra acierta (X cambió su marcado), se registra una
+deriva y deja de ser la ganadora.
+"""
+import os
+import json
+import datetime
+import tempfile
+import threading
+
+# Fallos seguidos de la ganadora (con otra estrategia acertando) para considerar deriva
+DRIFT_THRESHOLD = 3
+
+class StrategyRegistry:
+    """Estadísticas de acierto por campo y estrategia, opcionalmente persistidas en path (JSON)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.stats = {}
+        self.winners = {}
+        self.drift_events = []
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"No se pudo leer el registro de selectores {self.path}: {e}")
+            return
+        for field, strategies in (data.get('campos') or {}).items():
+            self.stats[field] = {
+                strategy: {'intentos': entry.get('intentos', 0), 'aciertos': entry.get('aciertos', 0), 'fallos_seguidos': 0}
+                for strategy, entry in strategies.items()
+            }
+        self.winners = dict(data.get('ganadoras') or {})
+
+    def _entry(self, field, strategy):
+        return self.stats.setdefault(field, {}).setdefault(
+            strategy, {'intentos': 0, 'aciertos': 0, 'fallos_seguidos': 0})
+
+    @staticmethod
+    def _hit_rate(entry):
+        return entry['aciertos'] / entry['intentos'] if entry['intentos'] else 0.0
+
+    def order(self, field, strategies):
+        """Estrategias en el orden a probar: la ganadora primero, luego por tasa de acierto."""
+        with self._lock:
+            known = self.stats.get(field, {})
+            winner = self.winners.get(field)
+            default_position = {strategy: i for i, strategy in enumerate(strategies)}
+
+            def key(strategy):
+                entry = known.get(strategy)
+                rate = self._hit_rate(entry) if entry else 0.0
+                return (strategy != winner, -rate, default_position[strategy])
+
+            return sorted(strategies, key=key)
+
+    def record(self, field, hit_strategy, missed_strategies=()):
+        """Registrar que hit_strategy acertó después de que fallaran missed_strategies."""
+        with self._lock:
+            winner = self.winners.get(field)
+            for strategy in missed_strategies:
+                entry = self._entry(field, strategy)
+                entry['intentos'] += 1
+                entry['fallos_seguidos'] += 1
+                if strategy == winner and entry['fallos_seguidos'] >= DRIFT_THRESHOLD:
+                    self._drift(field, strategy, hit_strategy)
+            entry = self._entry(field, hit_strategy)
+            entry['intentos'] += 1
+            entry['aciertos'] += 1
+            entry['fallos_seguidos'] = 0
+            if field not in self.winners:
+                self.winners[field] = hit_strategy
+
+    def _drift(self, field, old_winner, new_winner):
+        event = {
+            'campo': field,
+            'anterior': old_winner,
+            'nueva': new_winner,
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds')
+        }
+        self.drift_events.append(event)
+        self.winners[field] = new_winner
+        print(f"Deriva de selectores en '{field}': '{old_winner}' dejó de funcionar, se usa '{new_winner}'")
+
+    def first(self, field, strategies, attempt):
+        """
+        Probar las estrategias en el orden aprendido con attempt(estrategia), que
+        devuelve un resultado o None. Devuelve (estrategia, resultado) de la
+        primera que acierte o (None, None). Si ninguna acierta no se registra
+        nada: un tweet sin texto o sin métricas no dice nada de los selectores.
+        """
+        missed = []
+        for strategy in self.order(field, strategies):
+            result = attempt(strategy)
+            if result is not None:
+                self.record(field, strategy, missed)
+                return strategy, result
+            missed.append(strategy)
+        return None, None
+
+    def report(self):
+        """Tasa de acierto por campo y estrategia, ganadoras y derivas detectadas."""
+        with self._lock:
+            return {
+                'campos': {
+                    field: {
+                        strategy: {
+                            'intentos': entry['intentos'],
+                            'aciertos': entry['aciertos'],
+                            'tasa_acierto': round(self._hit_rate(entry), 3)
+                        }
+                        for strategy, entry in strategies.items()
+                    }
+                    for field, strategies in self.stats.items()
+                },
+                'ganadoras': dict(self.winners),
+                'derivas': list(self.drift_events)
+            }
+
+    def print_report(self):
+        report = self.report()
+        for field, strategies in report['campos'].items():
+            print(f"Selectores de '{field}' (ganadora: {report['ganadoras'].get(field)}):")
+            for strategy, entry in strategies.items():
+                print(f"  {strategy}: {entry['aciertos']}/{entry['intentos']} ({entry['tasa_acierto']:.0%})")
+
+    def save(self):
+        """
+        Guardar las estadísticas en path (si se indicó). Cada llamada escribe
+        su propio temporal en el mismo directorio, así que varios trabajadores
+        pueden guardar a la vez: el último os.replace gana.
+        """
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', prefix=f".{os.path.basename(self.path)}.",
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,192 @@
+"""
+Destinos (sinks) de salida a los que scrape_account envía cada tweet a medida que se extrae.
+
+Los sinks de archivo agregan al final con un búfer acotado y vacían a disco
+(flush + fsync) cada cierto número de registros o segundos, de modo que un
+fallo del navegador solo pierde lo que quedaba en el búfer y la memoria no
+crece con la cantidad de tweets.
+"""
+import os
+import csv
+import json
+import time
+
+# Esquema fijo de los registros de tweets
+# (media es una lista de {'url', 'tipo'}; en CSV se guarda como texto JSON)
+TWEET_FIELDNAMES = ['cuenta', 'texto', 'fecha', 'url', 'comentarios', 'retweets', 'me_gusta', 'compartidos', 'tiene_media',
+                    'media']
+
+INT_FIELDS = ('comentarios', 'retweets', 'me_gusta', 'compartidos')
+
+# Campos que agrega la etapa de enriquecimiento (ver enrichment.py); las listas también van como JSON en CSV
+ENRICHMENT_FIELDS = ['hashtags', 'menciones', 'enlaces', 'precios', 'codigos_promo', 'idioma', 'duplicado_de']
+ENRICHED_FIELDNAMES = TWEET_FIELDNAMES + ENRICHMENT_FIELDS
+
+# Filas de cambios del refresco de métricas (ver metrics_refresh.py): diferencias de cada contador
+DELTA_FIELDNAMES = ['status_id', 'refrescado'] + list(INT_FIELDS)
+
+LIST_FIELDS = ('media', 'hashtags', 'menciones', 'enlaces', 'precios', 'codigos_promo')
+
+# Cantidad de registros que se conservan para mostrar ejemplos al final de cada cuenta
+PREVIEW_SIZE = 3
+
+def normalize_record(record, fieldnames=TWEET_FIELDNAMES):
+    """Ajustar un registro al esquema fijo: solo las columnas conocidas y con su tipo."""
+    normalized = {}
+    for field in fieldnames:
+        value = record.get(field)
+        if field in INT_FIELDS:
+            try:
+                value = int(value or 0)
+            except (TypeError, ValueError):
+                value = 0
+        elif field == 'tiene_media':
+            value = value if isinstance(value, bool) else str(value).lower() in ('true', '1')
+        elif field in LIST_FIELDS:
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value) if value else []
+                except ValueError:
+                    value = []
+            if field == 'media':
+                value = [dict(item) for item in value or [] if isinstance(item, dict)]
+            else:
+                value = [item for item in value or [] if not isinstance(item, (dict, list))]
+        else:
+            value = "" if value is None else value
+        normalized[field] = value
+    return normalized
+
+class TweetSink:
+    """
+    Interfaz de los sinks: write() por registro, flush() y close(). Se puede usar con with.
+    fieldnames es el esquema de los registros (ENRICHED_FIELDNAMES si se enriquecen).
+    """
+
+    fieldnames = TWEET_FIELDNAMES
+
+    def __init__(self):
+        self.count = 0
+        self.preview = []
+
+    def write(self, record):
+        record = normalize_record(record, self.fieldnames)
+        self.count += 1
+        if len(self.preview) < PREVIEW_SIZE:
+            self.preview.append(record)
+        self._write(record)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _write(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ListSink(TweetSink):
+    """Sink en memoria; es el que usa scrape_account cuando no se indica otro."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def _write(self, record):
+        self.records.append(record)
+
+class BufferedFileSink(TweetSink):
+    """
+    Base de los sinks de archivo: abre en modo de agregado al recibir el primer
+    registro (no se crean archivos vacíos) y vacía el búfer cada flush_every
+    registros o flush_interval segundos, con fsync si fsync=True.
+    """
+
+    def __init__(self, path, flush_every=50, flush_interval=5.0, fsync=True):
+        super().__init__()
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._buffer = []
+        self._file = None
+        self._last_flush = time.monotonic()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._on_open(is_new)
+
+    def _on_open(self, is_new):
+        pass
+
+    def _write(self, record):
+        self._buffer.append(record)
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _write_records(self, records):
+        raise NotImplementedError
+
+    def flush(self):
+        """Escribir el búfer en el archivo y forzarlo a disco."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        self._write_records(self._buffer)
+        self._buffer = []
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class CsvSink(BufferedFileSink):
+    """CSV con el esquema fijo; el encabezado se escribe solo si el archivo es nuevo."""
+
+    def _on_open(self, is_new):
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        if is_new:
+            self._writer.writeheader()
+
+    def _write_records(self, records):
+        for record in records:
+            self._writer.writerow({field: (json.dumps(value, ensure_ascii=False) if value else "")
+                                   if field in LIST_FIELDS else value for field, value in record.items()})
+
+class JsonlSink(BufferedFileSink):
+    """Un objeto JSON por línea, con enteros y booleanos tipados."""
+
+    def _write_records(self, records):
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+
+SINK_TYPES = {
+    'csv': CsvSink,
+    'jsonl': JsonlSink
+}
+
+def open_sink(output_format, path_without_extension, **kwargs):
+    """Crear el sink de archivo de un formato ('csv' o 'jsonl') agregando la extensión."""
+    if output_format not in SINK_TYPES:
+        raise ValueError(f"Formato de salida no válido: {output_format}")
+    return SINK_TYPES[output_format](f"{path_without_extension}.{output_format}", **kwargs)
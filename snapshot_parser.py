@@ -0,0 +1,235 @@
+"""
+Extracción de tweets a partir de instantáneas HTML (driver.page_source o archivos .html guardados).
+
+Replica con lxml los selectores que TwitterScraper usa sobre WebElement, pero
+parsea todo el DOM en memoria, sin viajes de ida y vuelta al navegador. Esto
+permite re-extraer instantáneas archivadas cuando X cambia su marcado sin
+volver a visitar el sitio.
+"""
+import os
+import re
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+from tweet_records import STAT_TESTIDS, build_tweet_record
+
+BASE_URL = "https://x.com"
+
+# Nombre de archivo que genera TwitterScraper.save_snapshot: {cuenta}_{YYYYmmdd_HHMMSS}_{n}.html
+SNAPSHOT_FILENAME_RE = re.compile(r'^(?P<handle>.+)_\d{8}_\d{6}(?:_\d+)?\.html?$')
+STATUS_RE = re.compile(r'/status/(\d+)')
+
+# XPath precompilados equivalentes a los selectores CSS de la ruta en vivo
+ARTICLES = etree.XPath('//article')
+STATUS_LINKS = etree.XPath('.//a[contains(@href, "/status/")]')
+TIME_ELEMENTS = etree.XPath('.//time')
+DATETIME_ELEMENTS = etree.XPath('.//*[@datetime]')
+ALL_LINKS = etree.XPath('.//a[@href]')
+TWEET_TEXT = etree.XPath('.//*[@data-testid="tweetText"]')
+TEXT_FALLBACKS = [
+    etree.XPath('.//div[@lang]'),
+    etree.XPath('.//div[@dir="auto"]'),
+    etree.XPath('.//div[@role="group"]//div[@dir="auto"]')
+]
+MEDIA = etree.XPath(
+    './/*[@data-testid="tweetPhoto"] | .//video | .//img[contains(@src, "pbs.twimg.com")]'
+    ' | .//*[@data-testid="videoPlayer"] | .//*[@data-testid="mediaPreview"]'
+)
+PHOTO_IMAGES = etree.XPath('.//*[@data-testid="tweetPhoto"]//img | .//img[contains(@src, "pbs.twimg.com/media/")]')
+VIDEOS = etree.XPath('.//video')
+VIDEO_SOURCES = etree.XPath('./source/@src')
+SOCIAL_PROOF = etree.XPath('.//*[@data-testid="socialProof"]')
+SOCIAL_CONTEXT = etree.XPath('.//*[@data-testid="socialContext"]')
+PINNED_RE = re.compile(r'pinned|fijad|fijo', re.IGNORECASE)
+REPOST_RE = re.compile(r'repost|retw|retui', re.IGNORECASE)
+GROUP_BUTTONS = etree.XPath('.//*[@role="group"]//*[@role="button"]')
+SPANS = etree.XPath('.//span')
+METRICS = {testid: etree.XPath(f'.//*[@data-testid="{testid}"]') for testid in STAT_TESTIDS}
+
+def _text(element):
+    """Texto visible de un elemento (similar a innerText), incluyendo el alt de los emojis."""
+    parts = []
+
+    def walk(node):
+        if not isinstance(node.tag, str):
+            return  # Comentarios e instrucciones de procesamiento
+        if node.tag == 'br':
+            parts.append("\n")
+        elif node.tag == 'img' and node.get('alt'):
+            parts.append(node.get('alt'))
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+
+    walk(element)
+    return "".join(parts)
+
+def _extract_url(article, base_url):
+    links = STATUS_LINKS(article)
+    if links:
+        return urljoin(base_url, links[0].get('href'))
+    times = TIME_ELEMENTS(article)
+    if times:
+        parent = times[0].getparent()
+        if parent is not None and parent.tag == 'a' and parent.get('href'):
+            return urljoin(base_url, parent.get('href'))
+    for link in ALL_LINKS(article):
+        if STATUS_RE.search(link.get('href')):
+            return urljoin(base_url, link.get('href'))
+    return ""
+
+def _extract_text(article):
+    main = TWEET_TEXT(article)
+    if main:
+        return _text(main[0])
+    for xpath in TEXT_FALLBACKS:
+        for element in xpath(article):
+            text = _text(element).strip()
+            if text and len(text) > 5:
+                return text
+    return ""
+
+def _extract_date(article):
+    times = TIME_ELEMENTS(article) or DATETIME_ELEMENTS(article)
+    if times:
+        return times[0].get('datetime') or ""
+    return ""
+
+def _extract_metric_label(article, testid):
+    elements = METRICS[testid](article)
+    if not elements:
+        return ""
+    element = elements[0]
+    parent = element.getparent()
+    if parent is not None and parent.get('aria-label'):
+        return parent.get('aria-label')
+    if element.get('aria-label'):
+        return element.get('aria-label')
+    for span in SPANS(element):
+        text = _text(span).strip()
+        if text:
+            return text
+    return ""
+
+def _extract_media(article, base_url):
+    """Igual que extractMedia de MEDIA_EXTRACT_FUNCTION (la normaliza build_tweet_record)."""
+    media = [{'url': urljoin(base_url, img.get('src') or ""), 'tipo': 'foto'} for img in PHOTO_IMAGES(article)]
+    posters = set()
+    for video in VIDEOS(article):
+        poster = urljoin(base_url, video.get('poster') or "")
+        sources = VIDEO_SOURCES(video)
+        src = video.get('src') or (sources[0] if sources else "")
+        tipo = 'gif' if 'tweet_video_thumb' in poster else 'video'
+        url = urljoin(base_url, src) if src and not src.startswith('blob:') else poster
+        media.append({'url': url, 'tipo': tipo})
+        if video.get('poster'):
+            posters.add(poster)
+    # La miniatura del video también es un img dentro de tweetPhoto: se descarta
+    # por su poster aunque el video se emita con su mp4
+    return [item for item in media if item['tipo'] != 'foto' or item['url'] not in posters]
+
+def _is_pinned(article):
+    context = SOCIAL_CONTEXT(article)
+    return bool(context) and PINNED_RE.search(_text(context[0])) is not None
+
+def _is_repost(article):
+    context = SOCIAL_CONTEXT(article)
+    return bool(context) and REPOST_RE.search(_text(context[0])) is not None
+
+def _group_label(button):
+    aria = button.get('aria-label') or ""
+    inner = _text(button)
+    return aria if len(aria) > len(inner) else inner
+
+def extract_raw_records(page_source, base_url=BASE_URL):
+    """
+    Extraer de un HTML los registros crudos de cada article, con el mismo
+    formato que devuelve BATCH_EXTRACT_SCRIPT en el navegador.
+    """
+    if not page_source or not page_source.strip():
+        return []
+    document = lxml_html.fromstring(page_source)
+
+    records = []
+    for article in ARTICLES(document):
+        url = _extract_url(article, base_url)
+        match = STATUS_RE.search(url)
+        records.append({
+            'status_id': match.group(1) if match else "",
+            'url': url,
+            'texto': _extract_text(article),
+            'fecha': _extract_date(article),
+            'tiene_media': bool(MEDIA(article)),
+            'media': _extract_media(article, base_url),
+            'promocionado': bool(SOCIAL_PROOF(article)),
+            'fijado': _is_pinned(article),
+            'reposteado': _is_repost(article),
+            'metric_labels': {testid: _extract_metric_label(article, testid) for testid in STAT_TESTIDS},
+            'group_labels': [_group_label(button) for button in GROUP_BUTTONS(article)]
+        })
+    return records
+
+def handle_from_url(url):
+    """Obtener el nombre de usuario del autor a partir de la URL de un tweet."""
+    match = re.search(r'/([^/]+)/status/\d+', url or "")
+    return match.group(1) if match else "unknown"
+
+def parse_snapshot(page_source, account_handle=None, base_url=BASE_URL):
+    """
+    Parsear una instantánea HTML y devolver los mismos diccionarios que
+    construye scrape_account (sin promocionados ni duplicados).
+
+    No se aplica el filtro de antigüedad, para que las instantáneas archivadas
+    puedan re-extraerse completas. Si no se indica account_handle, se usa el
+    autor de cada tweet según su URL.
+    """
+    tweets_data = []
+    tweet_urls = set()
+    for record in extract_raw_records(page_source, base_url):
+        url = record['url']
+        if record['promocionado'] or not url or url in tweet_urls:
+            continue
+        tweet_urls.add(url)
+        tweets_data.append(build_tweet_record(account_handle or handle_from_url(url), record))
+    return tweets_data
+
+def parse_snapshot_file(path, account_handle=None, base_url=BASE_URL):
+    """Parsear un archivo .html guardado; la cuenta se deduce del nombre si sigue el formato de save_snapshot."""
+    if account_handle is None:
+        match = SNAPSHOT_FILENAME_RE.match(os.path.basename(path))
+        if match:
+            account_handle = match.group('handle')
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_snapshot(f.read(), account_handle, base_url)
+
+def _parse_snapshot_worker(path):
+    try:
+        return path, parse_snapshot_file(path), None
+    except Exception as e:
+        return path, [], str(e)
+
+def parse_snapshot_directory(directory, pattern='*.html', max_workers=None):
+    """
+    Parsear en paralelo (pool de procesos) todas las instantáneas de un directorio.
+    Devuelve un diccionario {ruta: lista de tweets}.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        print(f"No se encontraron instantáneas en {directory}")
+        return {}
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for path, tweets, error in executor.map(_parse_snapshot_worker, paths, chunksize=4):
+            if error:
+                print(f"Error al parsear {path}: {error}")
+            results[path] = tweets
+
+    print(f"Parseadas {len(paths)} instantáneas, {sum(len(t) for t in results.values())} tweets en total")
+    return results
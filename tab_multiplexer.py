@@ -0,0 +1,370 @@
+"""
+Varias cuentas a la vez en un solo Chrome, una ventana por cuenta en curso.
+
+TwitterScraper pasa la mayor parte del tiempo esperando cargas de página y
+el renderizado de cada scroll, y un Chrome por cuenta cuesta cientos de MB.
+TabMultiplexer abre N ventanas en el navegador de un TwitterScraper y avanza
+cada cuenta por pasos: inicia la navegación o el scroll de una ventana sin
+esperar y, mientras el navegador trabaja, cambia a otra ventana para extraer
+lo que ya está listo. Los cambios son cooperativos desde un solo hilo (WebDriver
+atiende un comando a la vez y solo sobre la ventana activa), así que cada
+cosecha se hace con la ventana de su cuenta activa y los tweets quedan
+atribuidos a esa cuenta. La carga se da por buena solo cuando la ventana ya
+está en la ruta de la cuenta, no en la página anterior ni en el login.
+
+Se usan ventanas y no pestañas porque Chrome deja de renderizar las pestañas
+ocultas y el timeline de X solo carga más tweets al renderizarse;
+TwitterScraper(tabs=N) además arranca Chrome sin la limitación de segundo plano.
+
+Funciona con la extracción por lotes y por instantánea. El modo red lee un
+log de rendimiento común a todas las ventanas y el historial profundo
+reinicia el navegador, así que no se pueden intercalar.
+"""
+import time
+import random
+from collections import deque
+from urllib.parse import urlparse
+
+from twitter_scraper import PAGE_READY_SELECTORS, MAX_STALE_SCROLLS
+from tweet_records import resolve_date_range
+
+# Espera entre rondas cuando ninguna ventana tiene nada listo
+POLL_INTERVAL = 0.1
+
+# Pasos que devuelve cada cuenta al planificador
+WAIT = 'esperar'
+PAUSE = 'pausa'
+
+CELL_SIGNATURE_FUNCTION = """
+const cellSignature = () => {
+    const cells = document.querySelectorAll('[data-testid="cellInnerDiv"]');
+    const last = cells.length ? cells[cells.length - 1] : null;
+    const link = last ? last.querySelector('a[href*="/status/"]') : null;
+    return cells.length + '|' + (link ? link.href : '');
+};
+"""
+
+# Scroll sin esperar: la firma de las celdas queda en la página para comprobarla después
+START_SCROLL_SCRIPT = CELL_SIGNATURE_FUNCTION + """
+window.__scraperSignature = cellSignature();
+window.scrollTo(0, document.body.scrollHeight);
+"""
+
+SCROLL_CHECK_SCRIPT = CELL_SIGNATURE_FUNCTION + """
+return cellSignature() !== window.__scraperSignature;
+"""
+
+# Lista solo en la ruta de la cuenta: justo después de navegar sigue visible la página anterior
+PAGE_CHECK_SCRIPT = """
+const selectors = arguments[0];
+const expected = arguments[1];
+const path = location.pathname.toLowerCase().replace(/\\/+$/, '');
+if (path.startsWith('/i/flow/login') || path === '/login') return {login: true};
+if (path !== expected && !path.startsWith(expected + '/')) return null;
+for (const selector of selectors) {
+    if (document.querySelector(selector)) return {selector: selector};
+}
+return null;
+"""
+
+class _Window:
+    """Estado de una ventana: la cuenta en curso y sus contadores."""
+
+    def __init__(self, number, handle):
+        self.number = number
+        self.handle = handle
+        self.steps = None
+        self.wait = None
+        self.not_before = 0.0
+        self.url = None
+        self.account = None
+        self.sink = None
+        self.sink_start = 0
+        self.context = {}
+        self.metrics = None
+        self.mode = None
+        self.started = 0.0
+        self.stats = {'ventana': number, 'cuentas': 0, 'tweets': 0, 'activo_s': 0.0}
+
+    @property
+    def collected(self):
+        """Tweets ya enviados al sink de la cuenta en curso, para informar un corte a mitad."""
+        return self.sink.count - self.sink_start if self.sink is not None else 0
+
+class TabMultiplexer:
+    """
+    Intercalar cuentas entre las ventanas (tabs) del navegador de scraper. Usa el
+    índice, el controlador de ritmo, el limitador de tasa y la instrumentación
+    del scraper igual que scrape_account.
+    """
+
+    def __init__(self, scraper, tabs=3):
+        if scraper.extraction_mode == 'network':
+            raise ValueError("El modo red no admite varias ventanas: el log de rendimiento es común a todas")
+        if scraper.deep_history:
+            raise ValueError("El historial profundo reinicia el navegador y no admite varias ventanas")
+        self.scraper = scraper
+        self.tabs = max(1, tabs)
+        self.report = None
+
+    def _open_windows(self, count):
+        driver = self.scraper.driver
+        windows = [_Window(1, driver.current_window_handle)]
+        for number in range(2, count + 1):
+            driver.switch_to.new_window('window')
+            windows.append(_Window(number, driver.current_window_handle))
+        return windows
+
+    def _close_windows(self, windows):
+        driver = self.scraper.driver
+        for window in windows[1:]:
+            try:
+                driver.switch_to.window(window.handle)
+                driver.close()
+            except Exception as e:
+                print(f"No se pudo cerrar la ventana {window.number}: {e}")
+        try:
+            driver.switch_to.window(windows[0].handle)
+        except Exception:
+            pass
+
+    def _pause_seconds(self):
+        """Pausa entre scrolls de una ventana; las demás ventanas siguen mientras tanto."""
+        scraper = self.scraper
+        if scraper.pacer is not None:
+            scraper.pacer.gate()
+            return random.uniform(scraper.pacer.delay * 0.8, scraper.pacer.delay * 1.2)
+        if scraper.polite_floor <= 0:
+            return 0.0
+        return random.uniform(scraper.polite_floor * 0.8, scraper.polite_floor * 1.2)
+
+    def _account_pause_seconds(self):
+        """Pausa de una ventana antes de su siguiente cuenta, como pause_between_accounts sin bloquear."""
+        scraper = self.scraper
+        if scraper.pacer is not None:
+            scraper.pacer.gate()
+            return scraper.pacer.account_pause_seconds()
+        return random.uniform(*scraper.account_pause)
+
+    def _account_steps(self, window, num_tweets, date_range, max_scrolls, run_id):
+        """
+        Generador con los pasos de una cuenta. Cede (WAIT, script, args, segundos)
+        para esperar una condición de la página o (PAUSE, segundos), y devuelve
+        cuántos tweets se extrajeron.
+        """
+        scraper = self.scraper
+        url = window.url
+        account_handle = window.account
+        already_saved = scraper._prepare_harvest_context(url, account_handle, run_id)
+        window.mode = "instantánea" if scraper.extraction_mode == 'snapshot' else "lotes"
+
+        scraper._throttle(url)
+        scraper.driver.execute_script("window.location.href = arguments[0];", url)
+        expected_path = urlparse(url).path.rstrip('/').lower()
+        ready = yield (WAIT, PAGE_CHECK_SCRIPT, (PAGE_READY_SELECTORS, expected_path),
+                       scraper.wait_timeout * len(PAGE_READY_SELECTORS))
+        if not ready or ready.get('login'):
+            print(f"[Ventana {window.number}] No se pudo cargar {url}"
+                  f"{' (X pide iniciar sesión)' if ready else ''}")
+            if scraper.pacer is not None:
+                scraper.pacer.block('login' if ready else 'carga_pagina')
+            return 0
+        if scraper.close_login_popup() and scraper.pacer is not None:
+            scraper.pacer.block('login')
+        if already_saved >= num_tweets:
+            return 0
+
+        num_tweets -= already_saved
+        collected = 0
+        seen_ids = set()
+        stale_scrolls = 0
+        for scroll in range(max_scrolls + 1):
+            records = scraper._harvest_raw_records(account_handle, first=scroll == 0)
+            if not records:
+                if scroll == 0:
+                    # Sin extracción por lotes: la ruta por elemento bloquea a las demás ventanas
+                    window.mode = "por elemento"
+                    scraper.scroll_down(max(7, num_tweets // 2))
+                    collected = scraper._extract_tweets_per_element(account_handle, num_tweets, date_range,
+                                                                    window.sink)
+                    break
+                records = []
+
+            new_tweets, new_records, reached_cutoff = scraper._process_raw_records(
+                records, seen_ids, account_handle, date_range, num_tweets - collected)
+            scraper._emit_tweets(window.sink, new_tweets)
+            collected += len(new_tweets)
+            scraper._log(f"[Ventana {window.number}] {account_handle}, scroll {scroll}/{max_scrolls}: "
+                         f"{collected}/{num_tweets} recolectados")
+            if reached_cutoff:
+                scraper._harvest_context['complete'] = True
+                break
+            if collected >= num_tweets:
+                break
+            stale_scrolls = stale_scrolls + 1 if new_records == 0 else 0
+            if stale_scrolls >= MAX_STALE_SCROLLS:
+                print(f"[Ventana {window.number}] No aparecen tweets nuevos en {account_handle}, fin del timeline")
+                scraper._harvest_context['complete'] = True
+                break
+            if scroll == max_scrolls:
+                break
+
+            scraper._throttle(url)
+            scraper.driver.execute_script(START_SCROLL_SCRIPT)
+            changed = yield (WAIT, SCROLL_CHECK_SCRIPT, (), scraper.wait_timeout)
+            login_wall = scraper.close_login_popup()
+            scraper._report_pacing(bool(changed), login_wall)
+            yield (PAUSE, self._pause_seconds())
+
+        if scraper.tweet_index is not None:
+            scraper._complete_indexed_account(url, account_handle, run_id)
+        return collected
+
+    def _start_account(self, window, url, open_sink, num_tweets, date_range, max_scrolls, run_id):
+        scraper = self.scraper
+        window.url = url
+        window.account = scraper.get_account_name(url)
+        window.started = time.perf_counter()
+        print(f"[Ventana {window.number}] Raspando cuenta: {url}")
+        scraper.instrumentation.begin_account(window.account)
+        window.metrics = scraper.instrumentation.suspend_account()
+        window.context = {}
+        window.wait = None
+        window.not_before = 0.0
+        window.sink = open_sink(window.account)
+        window.sink_start = window.sink.count
+        window.steps = self._account_steps(window, num_tweets, date_range, max_scrolls, run_id)
+
+    def _finish_account(self, window, tweets_count, results):
+        """Cerrar la cuenta de la ventana (con su cuenta de instrumentación activa)."""
+        scraper = self.scraper
+        try:
+            window.sink.close()
+        except Exception as e:
+            print(f"Error al guardar el archivo para {window.account}: {e}")
+        scraper.instrumentation.end_account(tweets_count, window.mode)
+        seconds = time.perf_counter() - window.started
+        window.stats['cuentas'] += 1
+        window.stats['tweets'] += tweets_count
+        window.stats['activo_s'] += seconds
+        results[window.account] = tweets_count
+        print(f"[Ventana {window.number}] {window.account}: {tweets_count} tweets en {seconds:.1f}s"
+              + (f", datos en {window.sink.path}" if tweets_count and getattr(window.sink, 'path', None) else ""))
+        self._sample_memory()
+        window.steps = None
+        window.sink = None
+
+    def _advance(self, window, value, results):
+        """Ejecutar los pasos de la ventana activa hasta su próxima espera."""
+        scraper = self.scraper
+        scraper._harvest_context = window.context
+        scraper._current_url = window.url
+        scraper.instrumentation.resume_account(window.metrics)
+        try:
+            request = window.steps.send(value)
+        except StopIteration as done:
+            self._finish_account(window, done.value or 0, results)
+        except Exception as e:
+            print(f"[Ventana {window.number}] Error global al raspar cuenta {window.url}: {e} "
+                  f"({window.collected} tweets enviados antes del fallo)")
+            self._finish_account(window, window.collected, results)
+        else:
+            if request[0] == PAUSE:
+                window.not_before = time.monotonic() + request[1]
+            else:
+                _, script, args, timeout = request
+                window.wait = (script, args, time.monotonic() + timeout)
+        finally:
+            window.context = scraper._harvest_context
+            window.metrics = scraper.instrumentation.suspend_account()
+
+    def _sample_memory(self):
+        memory = self.scraper.browser_memory()
+        self._memory_max = max(self._memory_max, memory)
+        return memory
+
+    def run(self, account_urls, open_sink, num_tweets=20, since=None, until=None, max_scrolls=None, run_id=None):
+        """
+        Raspar las cuentas repartidas entre las ventanas. open_sink(cuenta)
+        devuelve el sink de cada cuenta, que se cierra al terminarla. Devuelve
+        {cuenta: tweets extraídos} y deja el informe por ventana en self.report.
+        """
+        scraper = self.scraper
+        date_range = resolve_date_range(since, until)
+        if max_scrolls is None:
+            max_scrolls = max(7, num_tweets)
+        pending = deque(account_urls)
+        results = {}
+        self._memory_max = 0
+        started = time.perf_counter()
+        windows = self._open_windows(min(self.tabs, len(pending)) or 1)
+        print(f"Raspando {len(pending)} cuentas en {len(windows)} ventanas de un mismo navegador")
+        try:
+            while pending or any(window.steps is not None for window in windows):
+                progressed = False
+                for window in windows:
+                    if window.steps is None:
+                        # Tras terminar una cuenta la ventana espera la pausa entre cuentas
+                        if not pending or time.monotonic() < window.not_before:
+                            continue
+                        scraper.driver.switch_to.window(window.handle)
+                        self._start_account(window, pending.popleft(), open_sink, num_tweets, date_range,
+                                            max_scrolls, run_id)
+                    if time.monotonic() < window.not_before:
+                        continue
+                    scraper.driver.switch_to.window(window.handle)
+                    value = None
+                    if window.wait is not None:
+                        script, args, deadline = window.wait
+                        try:
+                            value = scraper.driver.execute_script(script, *args)
+                        except Exception as e:
+                            scraper._log(f"[Ventana {window.number}] Error al comprobar la página: {e}")
+                        if not value and time.monotonic() < deadline:
+                            continue
+                        window.wait = None
+                    self._advance(window, value, results)
+                    if window.steps is None and pending:
+                        window.not_before = time.monotonic() + self._account_pause_seconds()
+                    progressed = True
+                if not progressed:
+                    time.sleep(POLL_INTERVAL)
+        finally:
+            for window in windows:
+                if window.steps is not None:
+                    window.steps.close()
+                    scraper.instrumentation.resume_account(window.metrics)
+                    self._finish_account(window, window.collected, results)
+            memory = self._sample_memory()
+            self._close_windows(windows)
+            self.report = self._build_report(windows, time.perf_counter() - started, memory)
+        return results
+
+    def _build_report(self, windows, seconds, memory):
+        per_window = []
+        for window in windows:
+            stats = dict(window.stats)
+            stats['activo_s'] = round(stats['activo_s'], 1)
+            stats['tweets_por_minuto'] = round(stats['tweets'] * 60 / stats['activo_s'], 1) \
+                if stats['activo_s'] else 0.0
+            per_window.append(stats)
+        tweets = sum(stats['tweets'] for stats in per_window)
+        return {
+            'ventanas': len(windows),
+            'duracion_s': round(seconds, 1),
+            'tweets': tweets,
+            'tweets_por_minuto': round(tweets * 60 / seconds, 1) if seconds else 0.0,
+            'memoria_navegador_mb': round(memory / 2 ** 20, 1),
+            'memoria_navegador_max_mb': round(self._memory_max / 2 ** 20, 1),
+            'por_ventana': per_window
+        }
+
+def print_report(report):
+    """Mostrar el rendimiento por ventana y la memoria del navegador."""
+    print(f"\n{report['ventanas']} ventanas: {report['tweets']} tweets en {report['duracion_s']}s "
+          f"({report['tweets_por_minuto']} tweets/min)")
+    for stats in report['por_ventana']:
+        print(f"- Ventana {stats['ventana']}: {stats['cuentas']} cuentas, {stats['tweets']} tweets, "
+              f"{stats['tweets_por_minuto']} tweets/min")
+    print(f"Memoria del navegador: {report['memoria_navegador_mb']} MB "
+          f"(máx. {report['memoria_navegador_max_mb']} MB)")
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def offline_scraper():
+    """TwitterScraper sin navegador, para probar la lógica que no usa el driver."""
+    from twitter_scraper import TwitterScraper
+    return TwitterScraper(verbose=False, polite_floor=0, start_driver=False)
@@ -0,0 +1,95 @@
+"""
+AsyncTwitterScraper con sesiones de navegador falsas: entrega de tweets y cancelación.
+"""
+import asyncio
+
+from async_scraper import AsyncTwitterScraper, _AsyncSession, CLOSE_LOGIN_POPUP_SCRIPT
+from tab_multiplexer import PAGE_CHECK_SCRIPT
+from twitter_scraper import TwitterScraper, BATCH_EXTRACT_SCRIPT
+
+PAGE_SIZE = 5
+
+def raw(handle, status_id):
+    return {'status_id': str(status_id), 'url': f"https://x.com/{handle}/status/{status_id}",
+            'texto': f"tweet {status_id}", 'fecha': '2024-03-01T10:00:00.000Z', 'tiene_media': False, 'media': [],
+            'promocionado': False, 'fijado': False, 'reposteado': False, 'metric_labels': {}, 'group_labels': []}
+
+class FakeAsyncDriver:
+    """Timeline de 20 tweets por cuenta, PAGE_SIZE más en cada scroll."""
+
+    def __init__(self):
+        self.handle = None
+        self.loaded = 0
+        self.commands = []
+
+    async def get(self, url):
+        self.commands.append('get')
+        self.handle = url.rstrip('/').rsplit('/', 1)[-1]
+        self.loaded = PAGE_SIZE
+        await asyncio.sleep(0)
+
+    async def execute_script(self, script, *args):
+        self.commands.append('script')
+        await asyncio.sleep(0)
+        if script == PAGE_CHECK_SCRIPT:
+            return {'selector': 'article'}
+        if script == CLOSE_LOGIN_POPUP_SCRIPT:
+            return False
+        if script == BATCH_EXTRACT_SCRIPT:
+            return [raw(self.handle, status_id) for status_id in range(100, 100 - self.loaded, -1)]
+        return 1
+
+    async def execute_async_script(self, script, *args):
+        self.commands.append('scroll')
+        await asyncio.sleep(0)
+        self.loaded = min(20, self.loaded + PAGE_SIZE)
+        return {'changed': True}
+
+    async def quit(self):
+        pass
+
+def fake_scraper(sessions=2):
+    scraper = AsyncTwitterScraper(sessions=sessions, rate=1000, burst=1000, polite_floor=0)
+    for number in range(1, sessions + 1):
+        session = _AsyncSession(number, TwitterScraper(start_driver=False, **scraper.scraper_kwargs))
+        session.driver = FakeAsyncDriver()
+        scraper.browsers.append(session)
+    return scraper
+
+def test_tweets_of_all_accounts_are_delivered():
+    scraper = fake_scraper()
+    sessions = list(scraper.browsers)
+
+    async def scenario():
+        tweets = [tweet async for tweet in scraper.scrape(['https://x.com/uno', 'https://x.com/dos'], num_tweets=12,
+                                                       since='2024-01-01')]
+        await scraper.close()
+        return tweets
+
+    tweets = asyncio.run(scenario())
+    by_account = {}
+    for tweet in tweets:
+        by_account.setdefault(tweet['cuenta'], []).append(tweet['url'].rsplit('/', 1)[-1])
+    assert by_account == {handle: [str(status_id) for status_id in range(100, 88, -1)] for handle in ('uno', 'dos')}
+    # Las dos sesiones trabajaron a la vez, una cuenta cada una
+    assert [session.scraper.instrumentation.accounts.keys() for session in sessions] == [{'uno'}, {'dos'}]
+
+def test_consumer_that_stops_reading_ends_the_sessions():
+    scraper = fake_scraper(sessions=1)
+    session = scraper.browsers[0]
+
+    async def scenario():
+        received = []
+        stream = scraper.scrape(['https://x.com/uno', 'https://x.com/dos'], num_tweets=20, since='2024-01-01')
+        async for tweet in stream:
+            received.append(tweet)
+            if len(received) == 3:
+                break
+        await stream.aclose()
+        return received
+
+    received = asyncio.run(scenario())
+    assert len(received) == 3
+    # La sesión terminó en su siguiente paso: ni el resto del timeline ni la segunda cuenta
+    assert session.driver.commands.count('get') == 1
+    assert session.driver.commands.count('scroll') <= 1
@@ -0,0 +1,121 @@
+"""
+Cliente WebDriver asíncrono contra un servidor W3C mínimo local.
+"""
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from async_webdriver import AsyncWebDriver, WebDriverError
+
+class FakeWebDriverServer:
+    """Responde /status, /session, execute/sync (devuelve script y args) y DELETE de la sesión."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, value):
+                body = json.dumps({'value': value}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'null')
+                server.requests.append((self.command, self.path, payload))
+                if self.path == '/status':
+                    self._reply(200, {'ready': True})
+                elif self.path == '/session':
+                    self._reply(200, {'sessionId': 'abc', 'capabilities': {'browserName': 'chrome'}})
+                elif self.path == '/session/abc/execute/sync':
+                    if payload['script'] == 'throw':
+                        self._reply(500, {'error': 'javascript error', 'message': 'falló'})
+                    else:
+                        self._reply(200, {'script': payload['script'], 'args': payload['args']})
+                elif self.path == '/session/abc' and self.command == 'DELETE':
+                    self._reply(200, None)
+                else:
+                    self._reply(404, {'error': 'unknown command', 'message': self.path})
+
+            do_GET = do_POST = do_DELETE = _handle
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def server():
+    with FakeWebDriverServer() as fake_server:
+        yield fake_server
+
+def test_commands_share_one_connection(server):
+    counted = []
+
+    async def scenario():
+        driver = AsyncWebDriver(url=server.url, on_command=lambda: counted.append(1))
+        await driver.start()
+        assert await driver.new_session({'browserName': 'chrome'}) == 'abc'
+        results = [await driver.execute_script("return arguments[0];", {'n': n}, [n]) for n in range(3)]
+        await driver.quit()
+        return driver, results
+
+    driver, results = asyncio.run(scenario())
+    assert results[2] == {'script': "return arguments[0];", 'args': [{'n': 2}, [2]]}
+    assert driver.command_count == len(counted) == 3
+    assert server.connections == 1
+    assert server.requests[1] == ('POST', '/session', {'capabilities': {'alwaysMatch': {'browserName': 'chrome'}}})
+    assert server.requests[-1][:2] == ('DELETE', '/session/abc')
+
+def test_error_responses_raise_webdriver_error(server):
+    async def scenario():
+        driver = AsyncWebDriver(url=server.url)
+        await driver.start()
+        await driver.new_session({})
+        try:
+            with pytest.raises(WebDriverError) as error:
+                await driver.execute_script('throw')
+            # La conexión sigue sirviendo después de un error
+            assert (await driver.execute_script('return 1;'))['script'] == 'return 1;'
+            with pytest.raises(WebDriverError):
+                await driver.page_source()
+        finally:
+            await driver.quit()
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.error == 'javascript error' and error.message == 'falló' and error.status == 500
+
+def test_commands_need_a_session(server):
+    async def scenario():
+        driver = AsyncWebDriver(url=server.url)
+        await driver.start()
+        with pytest.raises(WebDriverError):
+            await driver.get('https://x.com/cuenta')
+        await driver.quit()
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+"""
+Arranque de la línea de comandos sin Selenium y lectura de la lista de cuentas.
+"""
+import io
+import os
+import sys
+import subprocess
+
+import cli
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que no deben cargar Selenium al importarse (ver benchmarks/bench_startup.py)
+SELENIUM_FREE_MODULES = ['cli', 'tweet_records', 'snapshot_parser', 'scheduler', 'sinks', 'analytics', 'enrichment',
+                         'work_queue', 'tweet_index', 'metric_parser']
+
+# Tope del tiempo de importación (s); sin Selenium ronda las décimas de segundo
+IMPORT_TIME_LIMIT = 3.0
+
+IMPORT_CHECK = """
+import sys, time
+start = time.perf_counter()
+import {modules}
+print(time.perf_counter() - start)
+print(sorted(name for name in sys.modules if name.split('.')[0] == 'selenium'))
+"""
+
+def test_modules_without_browser_do_not_import_selenium():
+    result = subprocess.run([sys.executable, '-c', IMPORT_CHECK.format(modules=', '.join(SELENIUM_FREE_MODULES))],
+                            cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    seconds, selenium_modules = result.stdout.strip().splitlines()[-2:]
+    assert selenium_modules == '[]'
+    assert float(seconds) < IMPORT_TIME_LIMIT
+
+def test_cli_help_does_not_import_selenium():
+    check = "import sys, runpy; sys.argv = ['cli.py', '--help']\n" \
+            "try:\n    runpy.run_path('cli.py', run_name='__main__')\n" \
+            "except SystemExit:\n    pass\n" \
+            "print('selenium' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', check], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'False'
+
+def test_account_url_accepts_handles_and_urls():
+    assert cli.account_url('KFC_MEXICO') == f"{cli.ACCOUNT_BASE_URL}/KFC_MEXICO"
+    assert cli.account_url(' @KFC_MEXICO ') == f"{cli.ACCOUNT_BASE_URL}/KFC_MEXICO"
+    assert cli.account_url('https://x.com/KFC_MEXICO/') == 'https://x.com/KFC_MEXICO'
+
+def test_read_accounts_skips_comments_blanks_and_repeats():
+    lines = [
+        "# cuentas de comida\n",
+        "\n",
+        "@KFC_MEXICO\n",
+        "https://x.com/dominos_mx  # pizza\n",
+        "kfc_mexico\n",
+        "   \n",
+        "https://x.com/Dominos_MX/\n"
+    ]
+    assert cli.read_accounts(lines) == [f"{cli.ACCOUNT_BASE_URL}/KFC_MEXICO", 'https://x.com/dominos_mx']
+
+def test_load_accounts_from_files_arguments_and_stdin(tmp_path, monkeypatch):
+    accounts_file = tmp_path / 'cuentas.txt'
+    accounts_file.write_text("@uno\n# comentario\ndos\n", encoding='utf-8')
+    monkeypatch.setattr(sys, 'stdin', io.StringIO("tres\n@uno\n"))
+    assert cli.load_accounts([str(accounts_file), '@cuatro', '-']) == [
+        f"{cli.ACCOUNT_BASE_URL}/{handle}" for handle in ('uno', 'dos', 'cuatro', 'tres')]
+
+def test_load_accounts_reads_piped_stdin_without_arguments(monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO("https://x.com/uno\n"))
+    assert cli.load_accounts([]) == ['https://x.com/uno']
+
+def test_load_accounts_ignores_terminal_stdin_without_arguments(monkeypatch):
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+    monkeypatch.setattr(sys, 'stdin', Terminal("https://x.com/uno\n"))
+    assert cli.load_accounts([]) == []
@@ -0,0 +1,42 @@
+"""
+Reglas de corte de la cosecha: rango de fechas, marca de agua, fijados y reposts.
+"""
+from tweet_records import resolve_date_range
+
+DATE_RANGE = resolve_date_range('2024-01-01', None)
+
+def raw(status_id, fecha, **flags):
+    record = {'status_id': str(status_id), 'url': f"https://x.com/cuenta/status/{status_id}", 'texto': f"tweet {status_id}",
+              'fecha': fecha, 'tiene_media': False, 'media': [], 'promocionado': False, 'fijado': False,
+              'reposteado': False, 'metric_labels': {}, 'group_labels': []}
+    record.update(flags)
+    return record
+
+def process(scraper, records, remaining=100):
+    tweets, _, reached_cutoff = scraper._process_raw_records(records, set(), 'cuenta', DATE_RANGE, remaining)
+    return [tweet['url'].rsplit('/', 1)[-1] for tweet in tweets], reached_cutoff
+
+def test_old_tweet_stops_the_harvest(offline_scraper):
+    ids, reached_cutoff = process(offline_scraper, [raw(30, '2024-03-01T10:00:00.000Z'),
+                                                    raw(10, '2023-06-01T10:00:00.000Z'),
+                                                    raw(9, '2024-02-01T10:00:00.000Z')])
+    assert ids == ['30']
+    assert reached_cutoff
+
+def test_old_pinned_and_reposted_tweets_do_not_stop_the_harvest(offline_scraper):
+    ids, reached_cutoff = process(offline_scraper, [raw(5, '2022-01-01T10:00:00.000Z', fijado=True),
+                                                    raw(40, '2024-03-02T10:00:00.000Z'),
+                                                    raw(3, '2021-05-01T10:00:00.000Z', reposteado=True),
+                                                    raw(30, '2024-03-01T10:00:00.000Z')])
+    assert ids == ['40', '30']
+    assert not reached_cutoff
+
+def test_reposts_below_the_watermark_do_not_stop_the_harvest(offline_scraper):
+    offline_scraper._harvest_context = {'watermark': 20}
+    ids, reached_cutoff = process(offline_scraper, [raw(40, '2024-03-02T10:00:00.000Z'),
+                                                    raw(7, '2024-01-05T10:00:00.000Z', reposteado=True),
+                                                    raw(30, '2024-03-01T10:00:00.000Z'),
+                                                    raw(20, '2024-02-20T10:00:00.000Z'),
+                                                    raw(15, '2024-02-10T10:00:00.000Z')])
+    assert ids == ['40', '7', '30']
+    assert reached_cutoff
@@ -0,0 +1,71 @@
+"""
+Descarga de medios contra la ruta /media/ de FakeXServer y normalización de URLs.
+"""
+import os
+
+import pytest
+
+from fake_x_server import FakeXServer
+from media import MediaDownloader, normalize_media_url
+from snapshot_parser import extract_raw_records
+
+@pytest.fixture
+def server():
+    with FakeXServer() as fake_server:
+        yield fake_server
+
+def stored_files(root):
+    return sorted(name for _, _, names in os.walk(root) for name in names
+                  if not name.startswith('media_index.sqlite'))
+
+@pytest.mark.parametrize('url', [
+    "https://pbs.twimg.com/media/GAbc123?format=jpg&name=small",
+    "https://pbs.twimg.com/media/GAbc123?format=jpg&name=900x900",
+    "https://pbs.twimg.com/media/GAbc123?name=large&format=jpg",
+])
+def test_photo_sizes_collapse_to_the_original(url):
+    assert normalize_media_url(url) == "https://pbs.twimg.com/media/GAbc123?format=jpg&name=orig"
+
+@pytest.mark.parametrize('url', [
+    "https://video.twimg.com/ext_tw_video/1/pu/vid/720x1280/a.mp4?tag=12",
+    "https://pbs.twimg.com/profile_images/1/foto_normal.jpg",
+    "https://pbs.twimg.com/media/GAbc123.jpg",
+])
+def test_other_urls_are_left_alone(url):
+    assert normalize_media_url(url) == url
+
+def test_same_content_from_two_urls_is_stored_once(server, tmp_path):
+    # El contenido de /media/ depende solo de la ruta: las dos URLs traen los mismos bytes
+    urls = [f"{server.base_url}/media/1.jpg?format=jpg&name=small",
+            f"{server.base_url}/media/1.jpg?format=jpg&name=large",
+            f"{server.base_url}/media/2.jpg"]
+    with MediaDownloader(str(tmp_path)) as downloader:
+        entries = downloader.download(urls)
+        stats = dict(downloader.stats)
+    assert all(entries.values())
+    assert entries[urls[0]]['sha256'] == entries[urls[1]]['sha256'] != entries[urls[2]]['sha256']
+    assert stats['descargados'] == 2 and stats['duplicados'] == 1 and stats['errores'] == 0
+    assert len(stored_files(str(tmp_path))) == 2
+
+def test_second_run_skips_urls_already_in_the_index(server, tmp_path):
+    urls = [f"{server.base_url}/media/{n}.jpg" for n in range(3)]
+    with MediaDownloader(str(tmp_path)) as downloader:
+        first = downloader.download(urls)
+    requests = server.request_count
+
+    with MediaDownloader(str(tmp_path)) as downloader:
+        second = downloader.download(urls)
+        stats = dict(downloader.stats)
+    assert server.request_count == requests
+    assert stats['en_cache'] == 3 and stats['descargados'] == 0
+    assert {url: entry['ruta'] for url, entry in second.items()} == {url: entry['ruta'] for url, entry in first.items()}
+
+def test_video_thumbnail_is_not_kept_as_a_photo():
+    page = """<html><body><article>
+        <a href="/cuenta/status/1"><time datetime="2024-03-01T10:00:00.000Z">1 mar</time></a>
+        <div data-testid="tweetPhoto"><img src="https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/a.jpg"></div>
+        <div data-testid="videoPlayer"><video poster="https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/a.jpg"
+            src="https://video.twimg.com/ext_tw_video/1/pu/vid/a.mp4"></video></div>
+    </article></body></html>"""
+    records = extract_raw_records(page)
+    assert records[0]['media'] == [{'url': "https://video.twimg.com/ext_tw_video/1/pu/vid/a.mp4", 'tipo': 'video'}]
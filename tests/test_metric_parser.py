@@ -0,0 +1,46 @@
+"""
+Tabla de corrección de metric_parser (etiquetas de métricas en español, inglés y otros formatos).
+"""
+import pytest
+
+from metric_parser import extract_number, extract_numbers
+
+# (etiqueta, valor esperado); benchmarks/bench_metric_parser.py la usa para comparar con la versión anterior
+CASES = [
+    ("", 0),
+    ("Reply", 0),
+    ("5 respuestas", 5),
+    ("45 reposts. Repost", 45),
+    ("5 Me gusta", 5),
+    ("10.2K Me gusta", 10200),
+    ("10,2 K Me gusta", 10200),
+    ("1,5 mil Me gusta", 1500),
+    ("15 mil reposts", 15000),
+    ("1,234 Likes. Like", 1234),
+    ("1.234 respuestas", 1234),
+    ("1,234,567 Likes", 1234567),
+    ("12 345 J'aime", 12345),
+    ("1.2M views", 1200000),
+    ("3,4 M Me gusta", 3400000),
+    ("1 millón de reproducciones", 1000000),
+    ("2,5 millones Me gusta", 2500000),
+    ("2 mil millones", 2000000000),
+    ("1.2B views", 1200000000),
+    ("5 Bookmarks. Bookmark", 5),
+    ("7 elementos guardados", 7),
+    ("1 234", 1234),
+    ("1 234 567 vues", 1234567),
+    ("1\u00a0234 Me gusta", 1234),
+    ("1\u202f234 J'aime", 1234),
+    ("1'234 Gefällt mir", 1234),
+    ("12 replies, 3 reposts, 100 likes", 12),
+    ("2 345,5 mil", 2345500),
+]
+
+@pytest.mark.parametrize('label, expected', CASES)
+def test_extract_number(label, expected):
+    assert extract_number(label) == expected
+
+def test_extract_numbers_matches_extract_number():
+    labels = [label for label, _ in CASES] + [None]
+    assert list(extract_numbers(labels)) == [expected for _, expected in CASES] + [0]
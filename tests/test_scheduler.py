@@ -0,0 +1,97 @@
+"""
+Planificador de visitas: intervalos sin estimación, visitas fallidas y tweets parciales.
+"""
+import os
+import csv
+
+import pytest
+
+import scheduler
+from scheduler import AccountSchedule, AccountScheduler
+
+class AccountScrapeError(Exception):
+    """Como twitter_scraper.AccountScrapeError: lo extraído antes del fallo viaja en records."""
+
+    def __init__(self, records):
+        super().__init__("la extracción se cortó")
+        self.records = records
+
+def tweet(status_id, fecha='2024-03-01T10:00:00.000Z'):
+    return {'cuenta': 'cuenta', 'url': f"https://x.com/cuenta/status/{status_id}", 'texto': f"tweet {status_id}",
+            'fecha': fecha}
+
+class FakeScraper:
+    tweet_index = None
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+        self.events = []
+
+    def get_account_name(self, url):
+        return url.rstrip('/').rsplit('/', 1)[-1]
+
+    def scrape_account(self, url, num_tweets, since=None):
+        self.calls.append(since)
+        self.events.append(('visita', self.get_account_name(url)))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def is_alive(self):
+        return True
+
+    def pause_between_accounts(self):
+        self.events.append(('pausa', None))
+
+def saved_urls(output_dir):
+    path = os.path.join(output_dir, 'cuenta_programado.csv')
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [row['url'] for row in csv.DictReader(f)]
+
+def test_account_without_rate_backs_off_up_to_the_cap():
+    schedule = AccountSchedule('https://x.com/cuenta', 'cuenta')
+    intervals = []
+    for _ in range(8):
+        schedule.record_visit([], 0)
+        intervals.append(schedule.next_due)
+    assert intervals[0] == scheduler.MIN_INTERVAL * 2
+    assert max(intervals) == scheduler.NO_RATE_MAX_INTERVAL
+    assert schedule.failures == 0
+
+def test_failed_visits_back_off_without_counting_as_visits():
+    schedule = AccountSchedule('https://x.com/cuenta', 'cuenta')
+    delays = []
+    for _ in range(6):
+        schedule.record_failure(0)
+        delays.append(schedule.next_due)
+    assert delays[:3] == [scheduler.MIN_INTERVAL, scheduler.MIN_INTERVAL * 2, scheduler.MIN_INTERVAL * 4]
+    assert delays[-1] == scheduler.MAX_FAILURE_BACKOFF
+    assert schedule.visits == 0 and schedule.rate is None
+    assert AccountSchedule.from_dict(schedule.to_dict()).failures == 6
+
+def test_partial_tweets_of_a_failed_visit_are_kept_and_not_repeated(tmp_path):
+    output_dir = str(tmp_path)
+    fake = FakeScraper([AccountScrapeError([tweet(3), tweet(2)]), [tweet(3), tweet(2), tweet(1)]])
+    planner = AccountScheduler(fake, ['https://x.com/cuenta'], output_dir=output_dir)
+    assert planner.run(max_visits=1) == 1
+    schedule = planner.schedules['cuenta']
+    assert schedule.failures == 1 and schedule.visits == 0
+    assert saved_urls(output_dir) == [tweet(3)['url'], tweet(2)['url']]
+
+    new_tweets = planner.visit(schedule)
+    assert [t['url'] for t in new_tweets] == [tweet(1)['url']]
+    assert saved_urls(output_dir) == [tweet(status_id)['url'] for status_id in (3, 2, 1)]
+    # El reintento pide desde la misma fecha que la visita fallida
+    assert fake.calls == [None, None]
+    assert schedule.failures == 0 and schedule.visits == 1
+
+def test_due_accounts_are_visited_with_the_pause_between_them(tmp_path):
+    fake = FakeScraper([[tweet(1)], [tweet(2)], [tweet(3)]])
+    urls = ['https://x.com/uno', 'https://x.com/dos', 'https://x.com/tres']
+    planner = AccountScheduler(fake, urls, output_dir=str(tmp_path))
+    assert planner.run(max_visits=3) == 3
+    assert [kind for kind, _ in fake.events] == ['visita', 'pausa', 'visita', 'pausa', 'visita']
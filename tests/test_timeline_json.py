@@ -0,0 +1,106 @@
+"""
+Decodificación de las respuestas JSON del timeline (modo red) contra respuestas
+grabadas en tests/fixtures y contra el servidor local fake_x_server.
+"""
+import os
+import json
+import urllib.request
+
+import pytest
+
+from fake_x_server import FakeXServer, TIMELINE_PATH
+from timeline_json import TIMELINE_URL_RE, decode_timeline_response
+from tweet_records import build_tweet_record
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RESPONSES = os.path.join(FIXTURES, 'responses')
+
+def load_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def stats(comentarios, retweets, me_gusta, compartidos):
+    return {'comentarios': comentarios, 'retweets': retweets, 'me_gusta': me_gusta, 'compartidos': compartidos}
+
+def test_user_tweets_page_with_pinned_promoted_and_hidden_tweets():
+    records = decode_timeline_response(load_fixture('responses', 'KFC_MEXICO', '01_UserTweets.json'))
+    assert records == [
+        {'status_id': '1800000000000000100', 'url': 'https://x.com/KFC_MEXICO/status/1800000000000000100',
+         'texto': 'Tweet fijado con el texto completo de la nota, más largo que full_text',
+         'fecha': '2024-06-01T10:00:00.000Z', 'tiene_media': False, 'media': [], 'promocionado': False,
+         'fijado': True, 'estadisticas': stats(2001, 350, 45000, 1200)},
+        {'status_id': '1850000000000000500', 'url': 'https://x.com/KFC_MEXICO/status/1850000000000000500',
+         'texto': 'Martes de cubeta: 12 piezas por $249 #KFC', 'fecha': '2024-10-21T18:30:00.000Z',
+         'tiene_media': True, 'media': [{'url': 'https://pbs.twimg.com/media/GabcPhoto1.jpg', 'tipo': 'foto'}],
+         'promocionado': False, 'fijado': False, 'estadisticas': stats(134, 1520, 10234, 87)},
+        {'status_id': '1849999999999999999', 'url': 'https://x.com/OtraMarca/status/1849999999999999999',
+         'texto': 'Anuncio de otra marca', 'fecha': '2024-10-21T12:00:00.000Z', 'tiene_media': False, 'media': [],
+         'promocionado': True, 'fijado': False, 'estadisticas': stats(3, 1, 40, 0)},
+        {'status_id': '1849000000000000400', 'url': 'https://x.com/KFC_MEXICO/status/1849000000000000400',
+         'texto': 'Nuevo combo con video', 'fecha': '2024-10-18T15:05:09.000Z', 'tiene_media': True,
+         'media': [{'url': 'https://video.twimg.com/ext_tw_video/9002/pu/vid/1280x720/high.mp4', 'tipo': 'video'}],
+         'promocionado': False, 'fijado': False, 'estadisticas': stats(12, 45, 980, 3)}
+    ]
+
+def test_user_tweets_page_with_conversation_module():
+    records = decode_timeline_response(load_fixture('responses', 'KFC_MEXICO', '02_UserTweets.json'))
+    assert [record['status_id'] for record in records] == ['1847000000000000200', '1847000000000000201']
+    assert records[1]['media'] == [{'url': 'https://video.twimg.com/tweet_video/GifThumb.mp4', 'tipo': 'gif'}]
+    assert [record['estadisticas'] for record in records] == [stats(5, 2, 61, 0), stats(1, 0, 18, 0)]
+
+def test_search_timeline_response():
+    records = decode_timeline_response(json.loads(load_fixture('SearchTimeline.json')))
+    assert [(record['status_id'], record['fecha'], record['estadisticas']) for record in records] == [
+        ('1846000000000000100', '2024-10-10T09:15:00.000Z', stats(40, 310, 2890, 15)),
+        ('1845000000000000050', '2024-10-06T23:59:59.000Z', stats(1203, 4512, 38761, 512))
+    ]
+
+def test_invalid_payload_decodes_to_nothing():
+    assert decode_timeline_response('{"data": ') == []
+    assert decode_timeline_response({'data': {}}) == []
+
+def test_output_record_keeps_exact_counters():
+    record = decode_timeline_response(load_fixture('SearchTimeline.json'))[1]
+    tweet = build_tweet_record('KFC_MEXICO', record)
+    assert {key: tweet[key] for key in ('comentarios', 'retweets', 'me_gusta', 'compartidos')} == \
+        stats(1203, 4512, 38761, 512)
+
+@pytest.mark.parametrize('url, matches', [
+    ('https://x.com/i/api/graphql/V7H0Ap3_Hh2FyS75OCDO3Q/UserTweets?variables=%7B%7D', True),
+    ('https://x.com/i/api/graphql/abc/UserTweetsAndReplies?variables=%7B%7D', True),
+    ('https://x.com/i/api/graphql/abc/SearchTimeline?variables=%7B%7D', True),
+    ('https://x.com/i/api/graphql/abc/TweetDetail?variables=%7B%7D', False),
+    ('https://x.com/KFC_MEXICO', False)
+])
+def test_timeline_url_pattern(url, matches):
+    assert bool(TIMELINE_URL_RE.search(url)) is matches
+
+def fetch(server, handle, cursor):
+    url = f"{server.base_url}{TIMELINE_PATH}?handle={handle}&cursor={cursor}"
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.read().decode('utf-8'), response.headers['X-Fake-Has-More']
+
+def test_fake_server_serves_recorded_responses():
+    with FakeXServer(responses_dir=RESPONSES) as server:
+        pages = [fetch(server, 'KFC_MEXICO', cursor) for cursor in range(3)]
+    assert [has_more for _, has_more in pages] == ['1', '0', '0']
+    assert decode_timeline_response(pages[0][0]) == \
+        decode_timeline_response(load_fixture('responses', 'KFC_MEXICO', '01_UserTweets.json'))
+    assert len(decode_timeline_response(pages[1][0])) == 2
+    assert decode_timeline_response(pages[2][0]) == []
+
+def test_fake_server_synthetic_timeline_decodes_exact_counters():
+    with FakeXServer(tweets_per_account=30, page_size=20) as server:
+        body, has_more = fetch(server, 'BurgerKingMX', 0)
+        tweets = server.timeline_for('BurgerKingMX')[:20]
+        base_url = server.base_url
+    records = decode_timeline_response(body)
+    assert has_more == '1'
+    assert [record['status_id'] for record in records] == [tweet['rest_id'] for tweet in tweets]
+    assert [record['url'] for record in records] == \
+        [f"https://x.com/BurgerKingMX/status/{tweet['rest_id']}" for tweet in tweets]
+    assert [record['estadisticas'] for record in records] == [
+        stats(tweet['reply_count'], tweet['retweet_count'], tweet['favorite_count'], tweet['bookmark_count'])
+        for tweet in tweets]
+    assert [bool(record['media']) for record in records] == [bool(tweet['media']) for tweet in tweets]
+    assert all(item['url'].startswith(base_url) for record in records for item in record['media'])
@@ -0,0 +1,73 @@
+"""
+Marca de agua del índice de tweets: solo avanza cuando la cosecha llega a la anterior.
+"""
+import pytest
+
+from tweet_index import TweetIndex
+from tweet_records import resolve_date_range
+
+def tweet(status_id):
+    return {'cuenta': 'cuenta', 'url': f"https://x.com/cuenta/status/{status_id}", 'texto': f"tweet {status_id}",
+            'fecha': '2024-03-01T10:00:00.000Z'}
+
+def raw(status_id):
+    return {'status_id': str(status_id), 'url': f"https://x.com/cuenta/status/{status_id}",
+            'texto': f"tweet {status_id}", 'fecha': '2024-03-01T10:00:00.000Z', 'media': [],
+            'metric_labels': {}, 'group_labels': []}
+
+@pytest.fixture
+def index(tmp_path):
+    index = TweetIndex(str(tmp_path / 'indice.sqlite'))
+    yield index
+    index.close()
+
+def test_complete_account_moves_the_watermark_to_the_newest_tweet(index):
+    index.upsert_tweets([tweet(10), tweet(30), tweet(20)])
+    index.complete_account('cuenta')
+    assert index.account_watermark('cuenta') == 30
+
+def test_complete_account_without_advance_keeps_the_watermark(index):
+    index.upsert_tweets([tweet(10)])
+    index.complete_account('cuenta')
+    index.upsert_tweets([tweet(50), tweet(40)])
+    index.complete_account('cuenta', advance=False)
+    assert index.account_watermark('cuenta') == 10
+
+@pytest.fixture
+def indexed_scraper(offline_scraper, index, monkeypatch):
+    """Scraper sin navegador con índice y un timeline de status ids 100, 99, ..., 1 en páginas de 5."""
+    offline_scraper.tweet_index = index
+    pages = [[raw(status_id) for status_id in range(start, start - 5, -1)] for start in range(100, 0, -5)]
+    monkeypatch.setattr(offline_scraper, '_harvest_raw_records',
+                        lambda account_handle, first=False: pages.pop(0) if pages else [])
+    monkeypatch.setattr(offline_scraper, '_scroll_once', lambda *args, **kwargs: None)
+    return offline_scraper
+
+def harvest(scraper, num_tweets):
+    scraper._prepare_harvest_context('https://x.com/cuenta', 'cuenta', None)
+    collected = []
+
+    class Sink:
+        def write_many(self, tweets):
+            collected.extend(tweets)
+
+    scraper._harvest_timeline('cuenta', num_tweets, resolve_date_range('2024-01-01', None), 50, Sink())
+    scraper._complete_indexed_account('https://x.com/cuenta', 'cuenta', None)
+    return [int(t['url'].rsplit('/', 1)[-1]) for t in collected]
+
+def test_harvest_cut_by_num_tweets_keeps_the_previous_watermark(indexed_scraper, index):
+    index.upsert_tweets([tweet(80)])
+    index.complete_account('cuenta')
+    assert harvest(indexed_scraper, 10) == list(range(100, 90, -1))
+    # 90..81 no se rasparon: la próxima ejecución tiene que llegar hasta 80
+    assert index.account_watermark('cuenta') == 80
+
+def test_harvest_reaching_the_watermark_advances_it(indexed_scraper, index):
+    index.upsert_tweets([tweet(80)])
+    index.complete_account('cuenta')
+    assert harvest(indexed_scraper, 50) == list(range(100, 80, -1))
+    assert index.account_watermark('cuenta') == 100
+
+def test_first_harvest_sets_the_watermark(indexed_scraper, index):
+    assert harvest(indexed_scraper, 10) == list(range(100, 90, -1))
+    assert index.account_watermark('cuenta') == 100
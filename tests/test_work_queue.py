@@ -0,0 +1,90 @@
+"""
+Trabajadores de la cola: confirmación atómica en parquet y pausa entre cuentas.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from tweet_dataset import DATASET_DIRNAME, load_dataset
+from work_queue import MemoryWorkQueue, DONE, run_worker
+
+class AccountScrapeError(Exception):
+    """Como twitter_scraper.AccountScrapeError: la extracción se cortó a mitad."""
+
+def visible_files(dataset_dir):
+    """Archivos que ve load_dataset: los que no están bajo un nombre oculto."""
+    files = []
+    for directory, subdirs, names in os.walk(dataset_dir):
+        subdirs[:] = [name for name in subdirs if not name.startswith('.')]
+        files.extend(name for name in names if not name.startswith('.'))
+    return files
+
+def tweet(handle, status_id):
+    return {'cuenta': handle, 'url': f"https://x.com/{handle}/status/{status_id}", 'texto': f"tweet {status_id}",
+            'fecha': '2024-03-01T10:00:00.000Z'}
+
+class FakeScraper:
+    """Cada intento escribe sus tweets al sink; los intentos marcados como fallidos se cortan después."""
+
+    def __init__(self, failing_attempts=()):
+        self.failing_attempts = set(failing_attempts)
+        self.attempts = 0
+        self.events = []
+        self.visible = []
+
+    def get_account_name(self, url):
+        return url.rstrip('/').rsplit('/', 1)[-1]
+
+    def scrape_account_to_sink(self, account_url, sink, num_tweets=20, since=None, until=None):
+        handle = self.get_account_name(account_url)
+        self.attempts += 1
+        self.events.append(('cuenta', handle))
+        for status_id in range(3):
+            sink.write(tweet(handle, status_id))
+        sink.flush()
+        if self.attempts in self.failing_attempts:
+            # Lo escrito hasta aquí no debe verse en el dataset
+            self.visible.append(len(visible_files(self.dataset_dir)))
+            raise AccountScrapeError(f"{handle}: la extracción se cortó")
+        return 3
+
+    def is_alive(self):
+        return True
+
+    def pause_between_accounts(self):
+        self.events.append(('pausa', None))
+
+def test_parquet_attempts_are_only_visible_after_commit(tmp_path):
+    output_dir = str(tmp_path)
+    queue = MemoryWorkQueue()
+    sweep_id = queue.create_sweep(['https://x.com/uno'], output_format='parquet')
+    scraper = FakeScraper(failing_attempts={1})
+    scraper.dataset_dir = os.path.join(output_dir, DATASET_DIRNAME)
+
+    assert run_worker(scraper, queue, sweep_id, output_dir, worker='w1') == 1
+    assert scraper.attempts == 2 and scraper.visible == [0]
+    assert queue.jobs(sweep_id)[0]['status'] == DONE
+    table = load_dataset(scraper.dataset_dir)
+    assert sorted(table.column('status_id').to_pylist()) == [0, 1, 2]
+    # No quedan directorios de staging
+    assert [name for name in os.listdir(scraper.dataset_dir) if name.startswith('.')] == []
+
+def test_failed_parquet_job_leaves_nothing_in_the_dataset(tmp_path):
+    output_dir = str(tmp_path)
+    queue = MemoryWorkQueue()
+    sweep_id = queue.create_sweep(['https://x.com/uno'], output_format='parquet')
+    scraper = FakeScraper(failing_attempts={1, 2, 3})
+    scraper.dataset_dir = os.path.join(output_dir, DATASET_DIRNAME)
+
+    assert run_worker(scraper, queue, sweep_id, output_dir, worker='w1') == 0
+    assert scraper.attempts == 3 and scraper.visible == [0, 0, 0]
+    assert os.listdir(scraper.dataset_dir) == []
+
+def test_worker_pauses_between_accounts(tmp_path):
+    queue = MemoryWorkQueue()
+    sweep_id = queue.create_sweep([f"https://x.com/{handle}" for handle in ('uno', 'dos', 'tres')])
+    scraper = FakeScraper()
+    assert run_worker(scraper, queue, sweep_id, str(tmp_path), worker='w1') == 3
+    assert [kind for kind, _ in scraper.events] == ['cuenta', 'pausa', 'cuenta', 'pausa', 'cuenta']
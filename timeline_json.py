@@ -0,0 +1,156 @@
+"""
+Decodificación de las respuestas JSON del timeline de X (API GraphQL del cliente web).
+
+Las respuestas UserTweets ya traen los contadores exactos, el texto completo,
+la fecha y los medios de cada tweet, así que no hace falta interpretar los
+aria-labels redondeados ("10.2K") del DOM. Los registros que se generan tienen el
+mismo formato crudo que BATCH_EXTRACT_SCRIPT, con las estadísticas exactas en
+'estadisticas'.
+"""
+import re
+import json
+import datetime
+
+# Operaciones GraphQL que devuelven el timeline de una cuenta (SearchTimeline: reanudación del modo profundo)
+TIMELINE_URL_RE = re.compile(r'/i/api/graphql/[^/]+/(?:UserTweets|UserTweetsAndReplies|UserMedia|SearchTimeline)\b')
+
+BASE_URL = "https://x.com"
+
+def twitter_date_to_iso(created_at):
+    """Convertir 'Wed Oct 10 20:19:24 +0000 2018' al formato ISO del atributo datetime del DOM."""
+    if not created_at:
+        return ""
+    try:
+        parsed = datetime.datetime.strptime(created_at, '%a %b %d %H:%M:%S %z %Y')
+    except ValueError:
+        return ""
+    parsed = parsed.astimezone(datetime.timezone.utc)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def _unwrap_tweet(result):
+    """Los tweets con restricciones de visibilidad vienen envueltos en 'tweet'."""
+    if not result:
+        return None
+    if result.get('__typename') == 'TweetWithVisibilityResults':
+        return result.get('tweet')
+    if result.get('__typename') in ('TweetTombstone', 'TweetUnavailable'):
+        return None
+    return result
+
+def _screen_name(tweet):
+    user = ((tweet.get('core') or {}).get('user_results') or {}).get('result') or {}
+    # Las versiones recientes de la API movieron screen_name de legacy a core
+    return ((user.get('core') or {}).get('screen_name')
+            or (user.get('legacy') or {}).get('screen_name')
+            or "")
+
+def _tweet_text(tweet):
+    legacy = tweet.get('legacy') or {}
+    note = (((tweet.get('note_tweet') or {}).get('note_tweet_results') or {}).get('result') or {})
+    return note.get('text') or legacy.get('full_text') or ""
+
+def _has_media(legacy):
+    extended = (legacy.get('extended_entities') or {}).get('media')
+    entities = (legacy.get('entities') or {}).get('media')
+    return bool(extended or entities)
+
+def _media_items(legacy):
+    """Fotos por su URL y videos/GIF por la variante mp4 de mayor bitrate."""
+    items = (legacy.get('extended_entities') or {}).get('media') or (legacy.get('entities') or {}).get('media') or []
+    media = []
+    for item in items:
+        kind = item.get('type')
+        if kind in ('video', 'animated_gif'):
+            variants = [v for v in (item.get('video_info') or {}).get('variants') or []
+                        if v.get('content_type') == 'video/mp4' and v.get('url')]
+            best = max(variants, key=lambda v: v.get('bitrate') or 0) if variants else None
+            media.append({'url': best['url'] if best else item.get('media_url_https') or "",
+                          'tipo': 'gif' if kind == 'animated_gif' else 'video'})
+        elif item.get('media_url_https'):
+            media.append({'url': item['media_url_https'], 'tipo': 'foto'})
+    return media
+
+def tweet_record(result, pinned=False, promoted=False, base_url=BASE_URL):
+    """Convertir un tweet_results.result en un registro crudo."""
+    tweet = _unwrap_tweet(result)
+    if not tweet or not tweet.get('legacy'):
+        return None
+    legacy = tweet['legacy']
+    status_id = tweet.get('rest_id') or legacy.get('id_str') or ""
+    screen_name = _screen_name(tweet)
+    url = f"{base_url}/{screen_name}/status/{status_id}" if screen_name and status_id else ""
+
+    return {
+        'status_id': status_id,
+        'url': url,
+        'texto': _tweet_text(tweet),
+        'fecha': twitter_date_to_iso(legacy.get('created_at')),
+        'tiene_media': _has_media(legacy),
+        'media': _media_items(legacy),
+        'promocionado': promoted,
+        'fijado': pinned,
+        'estadisticas': {
+            'comentarios': int(legacy.get('reply_count') or 0),
+            'retweets': int(legacy.get('retweet_count') or 0),
+            'me_gusta': int(legacy.get('favorite_count') or 0),
+            'compartidos': int(legacy.get('bookmark_count') or 0)
+        }
+    }
+
+def _item_content_record(item_content, entry_id, pinned, base_url):
+    if not item_content or item_content.get('itemType', 'TimelineTweet') != 'TimelineTweet':
+        return None
+    promoted = entry_id.startswith('promoted') or bool(item_content.get('promotedMetadata'))
+    return tweet_record((item_content.get('tweet_results') or {}).get('result'), pinned, promoted, base_url)
+
+def _entry_records(entry, pinned, base_url):
+    entry_id = entry.get('entryId') or ""
+    content = entry.get('content') or {}
+    records = []
+    if 'itemContent' in content:
+        records.append(_item_content_record(content['itemContent'], entry_id, pinned, base_url))
+    # Hilos y conversaciones llegan como módulos con varios elementos
+    for item in content.get('items') or []:
+        item_content = (item.get('item') or {}).get('itemContent')
+        records.append(_item_content_record(item_content, entry_id, pinned, base_url))
+    return [record for record in records if record]
+
+def _find_instructions(payload):
+    """Localizar la lista de instrucciones sin depender de la ruta exacta (timeline_v2, timeline...)."""
+    if isinstance(payload, dict):
+        if isinstance(payload.get('instructions'), list):
+            return payload['instructions']
+        for value in payload.values():
+            found = _find_instructions(value)
+            if found is not None:
+                return found
+    elif isinstance(payload, list):
+        for value in payload:
+            found = _find_instructions(value)
+            if found is not None:
+                return found
+    return None
+
+def decode_timeline_response(payload, base_url=BASE_URL):
+    """
+    Decodificar una respuesta UserTweets (dict o texto JSON) en registros crudos,
+    en el orden del timeline. El tweet fijado llega en TimelinePinEntry.
+    """
+    if isinstance(payload, (str, bytes)):
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            return []
+    instructions = _find_instructions(payload) or []
+
+    pinned = []
+    records = []
+    for instruction in instructions:
+        kind = instruction.get('type')
+        if kind == 'TimelinePinEntry' and instruction.get('entry'):
+            pinned.extend(_entry_records(instruction['entry'], True, base_url))
+        elif kind == 'TimelineAddEntries':
+            for entry in instruction.get('entries') or []:
+                records.extend(_entry_records(entry, False, base_url))
+    # En la página el tweet fijado se muestra primero
+    return pinned + records
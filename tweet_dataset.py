@@ -0,0 +1,244 @@
+"""
+Salida columnar (Parquet) de los tweets, particionada por cuenta y mes.
+
+El dataset vive en un directorio con particiones estilo Hive
+(cuenta=BurgerKingMX/mes=2024-05/*.parquet) y columnas tipadas: métricas
+int64, fecha como timestamp UTC, tiene_media booleano, media como lista de
+structs (url, tipo), las columnas del enriquecimiento (nulas si no se
+enriqueció) y cuenta codificada como diccionario. Cada ejecución agrega
+archivos nuevos a las particiones que toca y compact_dataset() los fusiona en un solo archivo por partición, quedándose con
+la última versión de cada tweet. load_dataset() lee un rango de fechas
+aplicando los filtros sobre las particiones y las estadísticas de los archivos,
+sin leer el resto de los datos.
+
+Requiere pyarrow (pip install pyarrow).
+"""
+import os
+import uuid
+import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from sinks import TweetSink, INT_FIELDS
+from tweet_index import status_id_from_url
+
+# Subdirectorio de output_dir donde scrape_multiple_accounts escribe el dataset
+DATASET_DIRNAME = 'dataset'
+
+# Partición de los tweets sin fecha legible
+NO_DATE_PARTITION = 'sin_fecha'
+
+MEDIA_TYPE = pa.list_(pa.struct([('url', pa.string()), ('tipo', pa.string())]))
+
+# Columnas del enriquecimiento (enrichment.py); nulas en los tweets sin enriquecer
+ENRICHMENT_COLUMNS = [
+    ('hashtags', pa.list_(pa.string())),
+    ('menciones', pa.list_(pa.string())),
+    ('enlaces', pa.list_(pa.string())),
+    ('precios', pa.list_(pa.float64())),
+    ('codigos_promo', pa.list_(pa.string())),
+    ('idioma', pa.string()),
+    ('duplicado_de', pa.int64())
+]
+
+# Columnas guardadas en cada archivo; cuenta y mes salen de la ruta de la partición
+FILE_SCHEMA = pa.schema(
+    [('status_id', pa.int64()),
+     ('texto', pa.string()),
+     ('fecha', pa.timestamp('ms', tz='UTC')),
+     ('url', pa.string())]
+    + [(field, pa.int64()) for field in INT_FIELDS]
+    + [('tiene_media', pa.bool_()),
+       ('media', MEDIA_TYPE),
+       ('extraido', pa.timestamp('ms', tz='UTC'))]
+    + ENRICHMENT_COLUMNS
+)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('cuenta', pa.dictionary(pa.int32(), pa.string())), ('mes', pa.string())]),
+    flavor='hive', dictionaries='infer'
+)
+
+def _parse_fecha(value):
+    """Convertir el datetime ISO del DOM ('2024-05-01T12:00:00.000Z') en datetime UTC."""
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    elif value:
+        try:
+            parsed = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+def _to_utc(value):
+    """Límite de fecha (date, datetime o texto ISO) como datetime UTC."""
+    if isinstance(value, datetime.datetime):
+        return _parse_fecha(value)
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day, tzinfo=datetime.timezone.utc)
+    return _parse_fecha(value)
+
+def _month(fecha):
+    return fecha.strftime('%Y-%m') if fecha else NO_DATE_PARTITION
+
+def _partition_dir(root, cuenta, mes):
+    return os.path.join(root, f"cuenta={cuenta}", f"mes={mes}")
+
+def _write_file(table, directory, prefix):
+    """Escribir un archivo Parquet de forma atómica (temporal oculto + rename)."""
+    if not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    name = f"{prefix}-{uuid.uuid4().hex[:8]}.parquet"
+    # Los nombres que empiezan por '.' no los ve ds.dataset mientras se escriben
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(table, tmp_path, compression='zstd')
+    path = os.path.join(directory, name)
+    os.replace(tmp_path, path)
+    return path
+
+def _records_to_table(records, extraido):
+    columns = {field: [] for field in FILE_SCHEMA.names}
+    for record in records:
+        status_id = status_id_from_url(record.get('url'))
+        columns['status_id'].append(int(status_id) if status_id else None)
+        columns['texto'].append(record.get('texto') or "")
+        columns['fecha'].append(_parse_fecha(record.get('fecha')))
+        columns['url'].append(record.get('url') or "")
+        for field in INT_FIELDS:
+            columns[field].append(record.get(field) or 0)
+        columns['tiene_media'].append(bool(record.get('tiene_media')))
+        columns['media'].append([{'url': item.get('url') or "", 'tipo': item.get('tipo') or ""}
+                                 for item in record.get('media') or []])
+        columns['extraido'].append(extraido)
+        for field, _ in ENRICHMENT_COLUMNS:
+            value = record.get(field)
+            if field == 'duplicado_de':
+                value = int(value) if value else None
+            columns[field].append(value)
+    return pa.Table.from_pydict(columns, schema=FILE_SCHEMA)
+
+class ParquetDatasetSink(TweetSink):
+    """
+    Sink que agrega los tweets al dataset particionado. Guarda en memoria hasta
+    flush_every registros y en cada flush escribe un archivo nuevo por
+    partición (cuenta, mes) tocada, así un fallo solo pierde el búfer.
+    """
+
+    def __init__(self, root, run_id=None, flush_every=1000):
+        super().__init__()
+        self.path = root
+        self.run_id = run_id or datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.flush_every = flush_every
+        self.files_written = []
+        self._buffer = []
+
+    def _write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        extraido = datetime.datetime.now(datetime.timezone.utc)
+        partitions = {}
+        for record in self._buffer:
+            key = (record.get('cuenta') or 'unknown', _month(_parse_fecha(record.get('fecha'))))
+            partitions.setdefault(key, []).append(record)
+        for (cuenta, mes), records in partitions.items():
+            table = _records_to_table(records, extraido)
+            self.files_written.append(_write_file(table, _partition_dir(self.path, cuenta, mes), f"run-{self.run_id}"))
+        self._buffer = []
+
+def _partition_dirs(root, accounts=None):
+    if not os.path.isdir(root):
+        return []
+    directories = []
+    for account_dir in sorted(os.listdir(root)):
+        if not account_dir.startswith('cuenta='):
+            continue
+        if accounts is not None and account_dir[len('cuenta='):] not in accounts:
+            continue
+        account_path = os.path.join(root, account_dir)
+        for month_dir in sorted(os.listdir(account_path)):
+            if month_dir.startswith('mes='):
+                directories.append(os.path.join(account_path, month_dir))
+    return directories
+
+def _latest_versions(table):
+    """Quedarse con la versión más reciente (por 'extraido') de cada status_id."""
+    status_ids = table.column('status_id').to_pylist()
+    extraidos = table.column('extraido').to_pylist()
+    latest = {}
+    keep = []
+    for row, status_id in enumerate(status_ids):
+        if status_id is None:
+            keep.append(row)
+        elif status_id not in latest or extraidos[row] >= extraidos[latest[status_id]]:
+            latest[status_id] = row
+    keep.extend(latest.values())
+    return table.take(sorted(keep)).sort_by([('fecha', 'descending')])
+
+def compact_dataset(root, accounts=None):
+    """
+    Fusionar los archivos de cada partición en uno solo, sin duplicados.
+    Con accounts (lista de cuentas) solo se compactan esas. Devuelve cuántas
+    particiones se compactaron.
+    """
+    compacted = 0
+    for directory in _partition_dirs(root, accounts):
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                       if name.endswith('.parquet') and not name.startswith('.'))
+        if len(paths) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(path, schema=FILE_SCHEMA) for path in paths])
+        _write_file(_latest_versions(table), directory, 'compactado')
+        # Si se interrumpe aquí quedan duplicados que la siguiente compactación elimina
+        for path in paths:
+            os.remove(path)
+        compacted += 1
+    if compacted:
+        print(f"Dataset compactado: {compacted} particiones en {root}")
+    return compacted
+
+def open_dataset(root):
+    """Dataset de pyarrow sobre el directorio, con las columnas cuenta y mes de la partición."""
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    if 'cuenta' not in dataset.schema.names:
+        return dataset
+    # El esquema inferido es el del primer archivo; con FILE_SCHEMA los archivos
+    # escritos antes de agregar una columna (p. ej. media) la leen como nula
+    schema = pa.schema(list(FILE_SCHEMA) + [dataset.schema.field('cuenta'), dataset.schema.field('mes')])
+    return dataset.replace_schema(schema)
+
+def load_dataset(root, since=None, until=None, accounts=None, columns=None):
+    """
+    Leer el dataset como pyarrow.Table filtrando por fecha (since <= fecha < until)
+    y por cuentas, y cargando solo las columnas indicadas. Los filtros descartan
+    particiones enteras (cuenta, mes) y grupos de filas por sus estadísticas
+    antes de leerlos.
+    """
+    since, until = _to_utc(since), _to_utc(until)
+    expression = None
+
+    def add(condition):
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    if accounts is not None:
+        add(ds.field('cuenta').isin(list(accounts)))
+    if since is not None:
+        add(ds.field('mes') >= since.strftime('%Y-%m'))
+        add(ds.field('fecha') >= pa.scalar(since, type=pa.timestamp('ms', tz='UTC')))
+    if until is not None:
+        # 'sin_fecha' queda fuera porque es mayor que cualquier 'YYYY-MM'
+        add(ds.field('mes') <= until.strftime('%Y-%m'))
+        add(ds.field('fecha') < pa.scalar(until, type=pa.timestamp('ms', tz='UTC')))
+
+    return open_dataset(root).to_table(columns=columns, filter=expression)
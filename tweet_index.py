@@ -0,0 +1,282 @@
+"""
+Índice persistente (SQLite) de los tweets ya vistos, para ejecuciones incrementales y reanudables.
+
+Guarda por cuenta y status id las últimas métricas vistas y cuándo se
+rasparon, una marca de agua por cuenta (el status id más reciente de la última
+extracción completa, como since_id) y el avance de cada ejecución de
+scrape_multiple_accounts para poder reanudarla donde se interrumpió.
+"""
+import os
+import re
+import csv
+import json
+import sqlite3
+import datetime
+import threading
+
+from sinks import TWEET_FIELDNAMES
+
+STATUS_ID_RE = re.compile(r'/status/(\d+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    cuenta TEXT NOT NULL,
+    status_id TEXT NOT NULL,
+    url TEXT,
+    texto TEXT,
+    fecha TEXT,
+    tiene_media INTEGER,
+    comentarios INTEGER,
+    retweets INTEGER,
+    me_gusta INTEGER,
+    compartidos INTEGER,
+    first_run_id TEXT,
+    last_run_id TEXT,
+    first_seen TEXT,
+    last_scraped TEXT,
+    PRIMARY KEY (cuenta, status_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_first_run ON tweets (first_run_id);
+CREATE INDEX IF NOT EXISTS idx_tweets_last_run ON tweets (last_run_id, cuenta);
+CREATE TABLE IF NOT EXISTS accounts (
+    cuenta TEXT PRIMARY KEY,
+    watermark_id INTEGER,
+    last_scraped TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    account_urls TEXT,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS run_accounts (
+    run_id TEXT NOT NULL,
+    account_url TEXT NOT NULL,
+    position INTEGER,
+    status TEXT,
+    tweets INTEGER DEFAULT 0,
+    resume_before_id INTEGER,
+    updated_at TEXT,
+    PRIMARY KEY (run_id, account_url)
+);
+"""
+
+def _now():
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def status_id_from_url(url):
+    """Obtener el status id (como texto) de la URL de un tweet."""
+    match = STATUS_ID_RE.search(url or "")
+    return match.group(1) if match else ""
+
+class TweetIndex:
+    """
+    Índice de tweets en un archivo SQLite. Cada instancia usa su propia conexión;
+    en modo paralelo cada trabajador abre la suya sobre el mismo archivo.
+    """
+
+    def __init__(self, path='twitter_data/tweet_index.sqlite'):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # WAL permite que varios trabajadores lean mientras otro escribe
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def account_watermark(self, cuenta):
+        """Status id más reciente de la última extracción completa de la cuenta (o None)."""
+        row = self.conn.execute("SELECT watermark_id FROM accounts WHERE cuenta = ?", (cuenta,)).fetchone()
+        return row['watermark_id'] if row else None
+
+    def upsert_tweets(self, tweets, run_id=None):
+        """
+        Insertar o actualizar tweets (diccionarios de scrape_account) con sus
+        últimas métricas. Devuelve cuántos eran nuevos.
+        """
+        now = _now()
+        new_count = 0
+        with self._lock, self.conn:
+            for tweet in tweets:
+                status_id = status_id_from_url(tweet.get('url'))
+                if not status_id:
+                    continue
+                cursor = self.conn.execute(
+                    """
+                    INSERT INTO tweets (cuenta, status_id, url, texto, fecha, tiene_media, comentarios, retweets,
+                                        me_gusta, compartidos, first_run_id, last_run_id, first_seen, last_scraped)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (cuenta, status_id) DO NOTHING
+                    """,
+                    (tweet.get('cuenta'), status_id, tweet.get('url'), tweet.get('texto'), tweet.get('fecha'),
+                     int(bool(tweet.get('tiene_media'))), tweet.get('comentarios', 0), tweet.get('retweets', 0),
+                     tweet.get('me_gusta', 0), tweet.get('compartidos', 0), run_id, run_id, now, now))
+                if cursor.rowcount:
+                    new_count += 1
+                    continue
+                self.conn.execute(
+                    """
+                    UPDATE tweets SET comentarios = ?, retweets = ?, me_gusta = ?, compartidos = ?,
+                                      last_run_id = ?, last_scraped = ?
+                    WHERE cuenta = ? AND status_id = ?
+                    """,
+                    (tweet.get('comentarios', 0), tweet.get('retweets', 0), tweet.get('me_gusta', 0),
+                     tweet.get('compartidos', 0), run_id, now, tweet.get('cuenta'), status_id))
+        return new_count
+
+    def complete_account(self, cuenta, advance=True):
+        """
+        Mover la marca de agua de la cuenta al tweet más reciente indexado. Con
+        advance=False (la extracción se cortó antes de llegar a la marca
+        anterior) solo se registra la fecha y la marca se conserva, para que la
+        próxima ejecución vuelva a bajar hasta ella.
+        """
+        with self._lock, self.conn:
+            if not advance:
+                self.conn.execute(
+                    """
+                    INSERT INTO accounts (cuenta, watermark_id, last_scraped) VALUES (?, NULL, ?)
+                    ON CONFLICT (cuenta) DO UPDATE SET last_scraped = excluded.last_scraped
+                    """,
+                    (cuenta, _now()))
+                return
+            self.conn.execute(
+                """
+                INSERT INTO accounts (cuenta, watermark_id, last_scraped)
+                SELECT ?, MAX(CAST(status_id AS INTEGER)), ? FROM tweets WHERE cuenta = ?
+                ON CONFLICT (cuenta) DO UPDATE SET watermark_id = excluded.watermark_id,
+                                                   last_scraped = excluded.last_scraped
+                """,
+                (cuenta, _now(), cuenta))
+
+    def recent_dates(self, cuenta, limit=30):
+        """Fechas de los tweets más recientes indexados de una cuenta."""
+        rows = self.conn.execute(
+            "SELECT fecha FROM tweets WHERE cuenta = ? AND fecha != '' ORDER BY CAST(status_id AS INTEGER) DESC LIMIT ?",
+            (cuenta, limit))
+        return [row['fecha'] for row in rows]
+
+    def tweets_for_run(self, run_id, cuenta):
+        """Tweets de una cuenta vistos en una ejecución, del más reciente al más antiguo."""
+        rows = self.conn.execute(
+            "SELECT * FROM tweets WHERE last_run_id = ? AND cuenta = ? ORDER BY CAST(status_id AS INTEGER) DESC",
+            (run_id, cuenta))
+        return [self._row_to_tweet(row) for row in rows]
+
+    @staticmethod
+    def _row_to_tweet(row):
+        # Los medios no se guardan en el índice
+        tweet = {field: row[field] for field in TWEET_FIELDNAMES if field in row.keys()}
+        tweet['tiene_media'] = bool(tweet['tiene_media'])
+        return tweet
+
+    def start_run(self, run_id, account_urls, resume=True):
+        """
+        Registrar una ejecución. Con resume=True, si la última ejecución con la
+        misma lista de cuentas quedó sin terminar, se reanuda esa y se devuelve su
+        run_id. Devuelve (run_id, cuentas pendientes en orden).
+        """
+        urls_json = json.dumps(list(account_urls))
+        if resume:
+            row = self.conn.execute(
+                "SELECT run_id FROM runs WHERE finished_at IS NULL AND account_urls = ? ORDER BY started_at DESC LIMIT 1",
+                (urls_json,)).fetchone()
+            if row:
+                pending = self.pending_accounts(row['run_id'])
+                print(f"Reanudando la ejecución {row['run_id']}: {len(pending)} cuentas pendientes")
+                return row['run_id'], pending
+
+        # Dos ejecuciones en el mismo segundo tendrían el mismo timestamp
+        base_run_id, suffix = run_id, 1
+        while self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+            suffix += 1
+            run_id = f"{base_run_id}_{suffix}"
+
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO runs (run_id, account_urls, started_at) VALUES (?, ?, ?)",
+                              (run_id, urls_json, _now()))
+            self.conn.executemany(
+                "INSERT INTO run_accounts (run_id, account_url, position, status, updated_at) VALUES (?, ?, ?, 'pendiente', ?)",
+                [(run_id, url, position, _now()) for position, url in enumerate(account_urls)])
+        return run_id, list(account_urls)
+
+    def pending_accounts(self, run_id):
+        rows = self.conn.execute(
+            "SELECT account_url FROM run_accounts WHERE run_id = ? AND status != 'completada' ORDER BY position",
+            (run_id,))
+        return [row['account_url'] for row in rows]
+
+    def account_progress(self, run_id, account_url):
+        """Avance de una cuenta interrumpida: (tweets ya guardados, status id más antiguo guardado)."""
+        row = self.conn.execute(
+            "SELECT tweets, resume_before_id FROM run_accounts WHERE run_id = ? AND account_url = ?",
+            (run_id, account_url)).fetchone()
+        if not row:
+            return 0, None
+        return row['tweets'] or 0, row['resume_before_id']
+
+    def save_progress(self, run_id, account_url, tweets):
+        """Guardar en el índice los tweets recién cosechados y la posición alcanzada en la cuenta."""
+        if not tweets:
+            return
+        self.upsert_tweets(tweets, run_id)
+        ids = [int(status_id) for status_id in (status_id_from_url(t.get('url')) for t in tweets) if status_id]
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                UPDATE run_accounts SET tweets = tweets + ?, status = 'en_curso', updated_at = ?,
+                       resume_before_id = MIN(COALESCE(resume_before_id, ?), ?)
+                WHERE run_id = ? AND account_url = ?
+                """,
+                (len(tweets), _now(), min(ids) if ids else None, min(ids) if ids else None, run_id, account_url))
+
+    def complete_run_account(self, run_id, account_url, cuenta, advance=True):
+        """Marcar una cuenta como terminada dentro de la ejecución y actualizar su marca de agua."""
+        self.complete_account(cuenta, advance)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE run_accounts SET status = 'completada', updated_at = ? WHERE run_id = ? AND account_url = ?",
+                (_now(), run_id, account_url))
+
+    def finish_run(self, run_id):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (_now(), run_id))
+
+    def run_stats(self, run_id):
+        """Tweets por cuenta guardados o actualizados en una ejecución."""
+        rows = self.conn.execute(
+            "SELECT cuenta, COUNT(*) AS total FROM tweets WHERE last_run_id = ? GROUP BY cuenta", (run_id,))
+        return {row['cuenta']: row['total'] for row in rows}
+
+    def last_finished_run(self):
+        row = self.conn.execute(
+            "SELECT run_id FROM runs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT 1").fetchone()
+        return row['run_id'] if row else None
+
+    def new_since_last_run(self, run_id=None):
+        """Tweets vistos por primera vez en la última ejecución terminada (o en run_id)."""
+        run_id = run_id or self.last_finished_run()
+        if not run_id:
+            return []
+        rows = self.conn.execute(
+            "SELECT * FROM tweets WHERE first_run_id = ? ORDER BY cuenta, CAST(status_id AS INTEGER) DESC",
+            (run_id,))
+        return [self._row_to_tweet(row) for row in rows]
+
+    def export_new_since_last_run(self, output_file, run_id=None):
+        """Escribir en CSV los tweets nuevos de la última ejecución. Devuelve cuántos se exportaron."""
+        tweets = self.new_since_last_run(run_id)
+        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=TWEET_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(tweets)
+        print(f"{len(tweets)} tweets nuevos exportados a {output_file}")
+        return len(tweets)
@@ -0,0 +1,169 @@
+"""
+Funciones de los registros de tweets que no dependen de Selenium.
+
+Construcción del registro de salida a partir de los datos crudos del DOM
+(build_tweet_record), fechas y rangos de fechas, el resumen por cuenta y la URL
+de búsqueda con la que se reanuda un timeline. Las usan twitter_scraper y las
+herramientas que no abren un navegador (snapshot_parser, scheduler, cli), que
+así arrancan sin importar Selenium.
+"""
+import os
+import csv
+import datetime
+from urllib.parse import urlparse, quote
+
+from media import normalize_media
+from metric_parser import extract_number, extract_numbers
+
+# Antigüedad máxima por defecto de los tweets (2 años)
+DEFAULT_MAX_AGE_DAYS = 730
+
+# Búsqueda de X con la que se reanuda el timeline de una cuenta antes de un tweet
+RESUME_SEARCH_PATH = "/search?q={query}&src=typed_query&f=live"
+
+# Relación entre los data-testid de X y las columnas de estadísticas
+STAT_TESTIDS = {
+    'reply': 'comentarios',
+    'retweet': 'retweets',
+    'like': 'me_gusta',
+    'bookmark': 'compartidos'
+}
+
+def resume_search_url(account_url, account_handle, before_id):
+    """URL de la búsqueda (más recientes primero) con los tweets de la cuenta anteriores a before_id."""
+    parsed = urlparse(account_url)
+    query = quote(f"from:{account_handle} max_id:{int(before_id) - 1}")
+    return f"{parsed.scheme}://{parsed.netloc}{RESUME_SEARCH_PATH.format(query=query)}"
+
+def write_summary(output_dir, timestamp, accounts_stats):
+    """Guardar el resumen resumen_extraccion_{timestamp}.csv con los tweets extraídos por cuenta."""
+    try:
+        summary_file = os.path.join(output_dir, f"resumen_extraccion_{timestamp}.csv")
+        with open(summary_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Cuenta', 'Tweets Extraídos', 'Fecha Extracción'])
+            for account, count in accounts_stats.items():
+                writer.writerow([account, count, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+        
+        print(f"\nResumen de la extracción guardado en {summary_file}")
+    except Exception as e:
+        print(f"Error al guardar el archivo de resumen: {e}")
+
+def parse_tweet_date(value):
+    """Convertir una fecha ISO de X (o un date/datetime) en datetime con zona horaria."""
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    elif isinstance(value, datetime.date):
+        parsed = datetime.datetime(value.year, value.month, value.day)
+    else:
+        try:
+            # Manejar diferentes formatos posibles
+            parsed = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    # Asegurarnos que la fecha tenga información de zona horaria
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+def resolve_date_range(since=None, until=None):
+    """
+    Resolver el rango de fechas (since, until) una sola vez por ejecución.
+    Sin since se usan los últimos dos años; sin until no hay límite superior.
+    """
+    if since is None:
+        since_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=DEFAULT_MAX_AGE_DAYS)
+    else:
+        since_date = parse_tweet_date(since)
+        if since_date is None:
+            raise ValueError(f"Fecha 'since' no válida: {since}")
+    until_date = None
+    if until is not None:
+        until_date = parse_tweet_date(until)
+        if until_date is None:
+            raise ValueError(f"Fecha 'until' no válida: {until}")
+    return since_date, until_date
+
+def date_range_position(date_str, date_range):
+    """
+    Ubicar la fecha de un tweet respecto al rango: -1 si es anterior, 0 si está
+    dentro, 1 si es posterior y None si la fecha no se puede interpretar.
+    """
+    tweet_date = parse_tweet_date(date_str)
+    if tweet_date is None:
+        return None
+    since_date, until_date = date_range
+    if since_date is not None and tweet_date < since_date:
+        return -1
+    if until_date is not None and tweet_date > until_date:
+        return 1
+    return 0
+
+def stats_from_labels(metric_labels, group_labels, count_path=None):
+    """
+    Convertir los aria-labels crudos de las métricas en estadísticas. Si se indica
+    count_path, se le pasa el nombre del método que dio resultado.
+    """
+    stats = {
+        'comentarios': 0,
+        'retweets': 0,
+        'me_gusta': 0,
+        'compartidos': 0
+    }
+    # Método 1: etiquetas por data-testid
+    values = extract_numbers([metric_labels.get(testid, "") for testid in STAT_TESTIDS])
+    for stat_key, value in zip(STAT_TESTIDS.values(), values):
+        if value > 0:
+            stats[stat_key] = value
+
+    # Método 2: etiquetas de los botones del grupo de métricas
+    if all(v == 0 for v in stats.values()):
+        for metric_text in group_labels:
+            metric_text = (metric_text or "").lower()
+            stat_key = classify_metric_text(metric_text)
+            if stat_key:
+                stats[stat_key] = extract_number(metric_text)
+        method = "estadisticas_metodo_2"
+    else:
+        method = "estadisticas_metodo_1"
+    if count_path is not None:
+        count_path(method if any(v > 0 for v in stats.values()) else "estadisticas_sin_datos")
+    return stats
+
+def build_tweet_record(account_handle, record, count_path=None):
+    """Construir el diccionario de salida de un tweet a partir de un registro crudo."""
+    tweet_data = {
+        'cuenta': account_handle,
+        'texto': record.get('texto') or "",
+        'fecha': record.get('fecha') or "",
+        'url': record.get('url') or "",
+        'tiene_media': bool(record.get('tiene_media')),
+        'media': normalize_media(record.get('media')),
+        'comentarios': 0,
+        'retweets': 0,
+        'me_gusta': 0,
+        'compartidos': 0
+    }
+    if record.get('estadisticas'):
+        # Contadores exactos (modo red): no hace falta interpretar aria-labels
+        tweet_data.update(record['estadisticas'])
+        if count_path is not None:
+            count_path("estadisticas_red")
+    else:
+        tweet_data.update(stats_from_labels(record.get('metric_labels') or {},
+                                            record.get('group_labels') or [], count_path))
+    return tweet_data
+
+def classify_metric_text(metric_text):
+    """Determinar a qué estadística corresponde un texto de métrica (ya en minúsculas)."""
+    if any(keyword in metric_text for keyword in ["repl", "respuesta", "comment"]):
+        return 'comentarios'
+    elif any(keyword in metric_text for keyword in ["retweet", "retuit"]):
+        return 'retweets'
+    elif any(keyword in metric_text for keyword in ["like", "me gusta"]):
+        return 'me_gusta'
+    elif any(keyword in metric_text for keyword in ["bookmark", "guardar", "compartir"]):
+        return 'compartidos'
+    return None
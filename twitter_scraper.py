@@ -1,9 +1,12 @@
 import time
-import csv
 import re
 import random
 import os
 import datetime
+import queue
+import threading
+import json
+import base64
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -13,9 +16,415 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
 
+from instrumentation import Instrumentation, timed
+from media import normalize_media
+from metric_parser import extract_number
+from selector_registry import StrategyRegistry
+from sinks import ListSink, open_sink
+from tweet_index import TweetIndex
+# Funciones sin Selenium; se importan aquí también para no romper los imports existentes
+from tweet_records import (DEFAULT_MAX_AGE_DAYS, STAT_TESTIDS, build_tweet_record, classify_metric_text,
+                           date_range_position, parse_tweet_date, resolve_date_range, resume_search_url,
+                           stats_from_labels, write_summary)
+
+# Función JS que lista los medios de un tweet: las fotos por su src y los videos
+# por su mp4 o, si se reproducen como blob: (streaming), por la miniatura. Los GIF
+# de X son videos cuya miniatura está en tweet_video_thumb. La normalización final
+# (tamaño original, duplicados) se hace en Python con media.normalize_media.
+MEDIA_EXTRACT_FUNCTION = """
+function extractMedia(article) {
+    const media = [];
+    const posters = new Set();
+    for (const img of article.querySelectorAll('[data-testid="tweetPhoto"] img, img[src*="pbs.twimg.com/media/"]')) {
+        media.push({url: img.src, tipo: 'foto'});
+    }
+    for (const video of article.querySelectorAll('video')) {
+        const poster = video.getAttribute('poster') || '';
+        const tipo = poster.includes('tweet_video_thumb') ? 'gif' : 'video';
+        const source = video.querySelector('source');
+        const src = video.currentSrc || video.src || (source ? source.src : '');
+        media.push({url: src && !src.startsWith('blob:') ? src : poster, tipo: tipo});
+        // video.poster es la URL resuelta, comparable con img.src
+        if (video.poster) posters.add(video.poster);
+    }
+    // La miniatura del video también es un img dentro de tweetPhoto: se descarta
+    // por su poster aunque el video se emita con su mp4
+    return media.filter((item) => item.tipo !== 'foto' || !posters.has(item.url));
+}
+"""
+
+# Script de la ruta por elemento: los medios de un solo tweet en una llamada
+TWEET_MEDIA_SCRIPT = MEDIA_EXTRACT_FUNCTION + "return extractMedia(arguments[0]);"
+
+# Script que extrae en el navegador todos los tweets (article) presentes en el DOM
+# en una sola llamada a execute_script. Replica los selectores de los métodos
+# extract_tweet_* y devuelve los aria-labels crudos de las métricas para que el
+# parseo de números se haga en Python con extract_number.
+BATCH_EXTRACT_SCRIPT = MEDIA_EXTRACT_FUNCTION + """
+const statusRe = /\\/status\\/(\\d+)/;
+const mediaSelectors = [
+    '[data-testid="tweetPhoto"]',
+    'video',
+    'img[src*="pbs.twimg.com"]',
+    '[data-testid="videoPlayer"]',
+    '[data-testid="mediaPreview"]'
+];
+const metricIds = ['reply', 'retweet', 'like', 'bookmark'];
+
+function extractUrl(article) {
+    const link = article.querySelector('a[href*="/status/"]');
+    if (link && link.href) return link.href;
+    const time = article.querySelector('time');
+    if (time && time.parentElement && time.parentElement.tagName === 'A') return time.parentElement.href;
+    for (const a of article.querySelectorAll('a')) {
+        if (a.href && statusRe.test(a.href)) return a.href;
+    }
+    return '';
+}
+
+function extractText(article) {
+    const main = article.querySelector('[data-testid="tweetText"]');
+    if (main) return main.innerText;
+    for (const selector of ['div[lang]', 'div[dir="auto"]', 'div[role="group"] div[dir="auto"]']) {
+        for (const el of article.querySelectorAll(selector)) {
+            const text = (el.innerText || '').trim();
+            if (text && text.length > 5) return text;
+        }
+    }
+    return '';
+}
+
+function extractMetricLabel(article, testid) {
+    const el = article.querySelector('[data-testid="' + testid + '"]');
+    if (!el) return '';
+    const parentLabel = el.parentElement ? el.parentElement.getAttribute('aria-label') : '';
+    if (parentLabel) return parentLabel;
+    const ownLabel = el.getAttribute('aria-label');
+    if (ownLabel) return ownLabel;
+    for (const span of el.querySelectorAll('span')) {
+        const text = (span.innerText || '').trim();
+        if (text) return text;
+    }
+    return '';
+}
+
+function isPinned(article) {
+    const context = article.querySelector('[data-testid="socialContext"]');
+    return context !== null && /pinned|fijad|fijo/i.test(context.innerText || '');
+}
+
+function isRepost(article) {
+    const context = article.querySelector('[data-testid="socialContext"]');
+    return context !== null && /repost|retw|retui/i.test(context.innerText || '');
+}
+
+return Array.from(document.querySelectorAll('article')).map((article) => {
+    const url = extractUrl(article);
+    const match = url.match(statusRe);
+    const time = article.querySelector('time') || article.querySelector('[datetime]');
+    const labels = {};
+    for (const id of metricIds) labels[id] = extractMetricLabel(article, id);
+    const groupLabels = Array.from(article.querySelectorAll('[role="group"] [role="button"]')).map((btn) => {
+        const aria = btn.getAttribute('aria-label') || '';
+        const inner = btn.innerText || '';
+        return aria.length > inner.length ? aria : inner;
+    });
+    return {
+        status_id: match ? match[1] : '',
+        url: url,
+        texto: extractText(article),
+        fecha: time ? (time.getAttribute('datetime') || '') : '',
+        tiene_media: mediaSelectors.some((sel) => article.querySelector(sel) !== null),
+        media: extractMedia(article),
+        promocionado: article.querySelector('[data-testid="socialProof"]') !== null,
+        fijado: isPinned(article),
+        reposteado: isRepost(article),
+        metric_labels: labels,
+        group_labels: groupLabels
+    };
+});
+"""
+
+# Script asíncrono: hace scroll y espera con un MutationObserver a que cambien las
+# celdas del timeline (más celdas o una última celda distinta), con tiempo máximo.
+SCROLL_AND_WAIT_SCRIPT = """
+const timeoutMs = arguments[0];
+const done = arguments[arguments.length - 1];
+const signature = () => {
+    const cells = document.querySelectorAll('[data-testid="cellInnerDiv"]');
+    const last = cells.length ? cells[cells.length - 1] : null;
+    const link = last ? last.querySelector('a[href*="/status/"]') : null;
+    return cells.length + '|' + (link ? link.href : '');
+};
+const before = signature();
+const start = performance.now();
+let finished = false;
+let timer = null;
+const observer = new MutationObserver(() => {
+    if (signature() !== before) finish(true);
+});
+function finish(changed) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done({changed: changed, elapsed_ms: performance.now() - start});
+}
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(() => finish(false), timeoutMs);
+window.scrollTo(0, document.body.scrollHeight);
+"""
+
+# Script asíncrono: centra un tweet en pantalla y espera a que su grupo de
+# métricas esté poblado (aria-label o botones con data-testid).
+SCROLL_INTO_VIEW_AND_WAIT_SCRIPT = """
+const tweet = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const ready = () => {
+    const group = tweet.querySelector('[role="group"]');
+    return group !== null && (group.getAttribute('aria-label') || group.querySelector('[data-testid="reply"], [data-testid="like"]'));
+};
+const start = performance.now();
+tweet.scrollIntoView({block: 'center'});
+if (ready()) {
+    done({changed: true, elapsed_ms: performance.now() - start});
+} else {
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        if (ready()) {
+            observer.disconnect();
+            clearTimeout(timer);
+            done({changed: true, elapsed_ms: performance.now() - start});
+        }
+    });
+    observer.observe(tweet, {childList: true, subtree: true, attributes: true});
+    timer = setTimeout(() => {
+        observer.disconnect();
+        done({changed: false, elapsed_ms: performance.now() - start});
+    }, timeoutMs);
+}
+"""
+
+# Métricas de carga de la página según Navigation/Resource Timing. Los recursos de
+# otros dominios sin Timing-Allow-Origin reportan 0 bytes, así que es una cota inferior.
+PAGE_LOAD_STATS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const resource of resources) bytes += resource.transferSize || 0;
+return {
+    carga_s: nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd) / 1000 : null,
+    dom_s: nav ? nav.domContentLoadedEventEnd / 1000 : null,
+    bytes_transferidos: bytes,
+    recursos: resources.length
+};
+"""
+
+# Modo de historial profundo: vacía las celdas ya cosechadas salvo las últimas
+# arguments[0] (X las usa como ancla para cargar más) y devuelve cuántos nodos
+# quedan en el DOM. Se vacían en lugar de quitarse porque React sigue siendo dueño
+# del contenedor; la altura fija evita que el scroll salte. Las alturas se leen
+# todas antes de escribir para no forzar un reflow por celda.
+PRUNE_HARVESTED_CELLS_SCRIPT = """
+const keep = arguments[0];
+const cells = Array.from(document.querySelectorAll('[data-testid="cellInnerDiv"]:not([data-cosechado])'));
+const pruned = cells.slice(0, Math.max(0, cells.length - keep));
+const heights = pruned.map(cell => cell.offsetHeight);
+pruned.forEach((cell, i) => {
+    cell.style.height = heights[i] + 'px';
+    cell.replaceChildren();
+    cell.setAttribute('data-cosechado', '1');
+});
+return {vaciadas: pruned.length, nodos: document.getElementsByTagName('*').length};
+"""
+
+# Patrones de URL que el modo ligero bloquea con Network.setBlockedURLs: imágenes,
+# video, fuentes y hosts de analítica/publicidad. El JS y la API de X se mantienen.
+LEAN_BLOCKED_URLS = [
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.ico',
+    '*.mp4', '*.m3u8', '*.m4s', '*.webm',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*pbs.twimg.com/*', '*video.twimg.com/*',
+    '*google-analytics.com/*', '*googletagmanager.com/*', '*doubleclick.net/*',
+    '*ads-twitter.com/*', '*ads-api.twitter.com/*', '*ads-api.x.com/*', '*analytics.twitter.com/*'
+]
+
+# Perfil de Chrome persistente por defecto en modo ligero
+DEFAULT_LEAN_PROFILE_DIR = os.path.join('twitter_data', 'chrome_profile')
+
+# Página que se carga una vez para precalentar un perfil nuevo (caché HTTP del JS de X)
+PROFILE_WARMUP_URL = "https://x.com/"
+PROFILE_WARM_MARKER = '.precalentado'
+
+# Selector de los botones para cerrar la ventana emergente de inicio de sesión
+LOGIN_POPUP_CLOSE_SELECTOR = '[data-testid="modal-close"], [role="button"][aria-label*="Close"], button[aria-label*="Close"]'
+
+# Scrolls seguidos sin tweets nuevos antes de dar por terminado el timeline
+MAX_STALE_SCROLLS = 3
+
+# Pausa entre cuentas en segundos (mín., máx.) para evitar detección
+ACCOUNT_PAUSE_RANGE = (5, 8)
+
+# Reintentos de una cuenta cuando el navegador de un trabajador falla
+MAX_ACCOUNT_RETRIES = 2
+
+# Modo de historial profundo: celdas que se conservan intactas tras cada cosecha,
+# memoria del navegador (MB) a partir de la cual se recicla y cada cuántos scrolls se mide
+DEEP_LIVE_CELLS = 5
+DEEP_MEMORY_LIMIT_MB = 1500
+DEEP_MEMORY_CHECK_EVERY = 10
+
+# Selectores alternativos de cada campo, en el orden por defecto; StrategyRegistry
+# aprende cuál funciona y lo prueba primero
+PAGE_READY_SELECTORS = ['[data-testid="tweet"]', 'article', '[data-testid="cellInnerDiv"]']
+TWEET_SELECTORS = [
+    '[data-testid="tweet"]',
+    'article',
+    '[data-testid="cellInnerDiv"] div[data-testid]',
+    '[data-testid="cellInnerDiv"]'
+]
+CONTENT_SELECTORS = ['[data-testid="tweetText"]', 'div[lang]', 'div[dir="auto"]', 'div[role="group"] div[dir="auto"]']
+
+class AccountScrapeError(Exception):
+    """
+    La extracción de una cuenta falló (la página no cargó o hubo un error a
+    mitad de camino). tweets es cuántos tweets ya se habían enviado al sink;
+    scrape_account deja además esos tweets en records.
+    """
+
+    def __init__(self, account_url, tweets, reason, records=None):
+        super().__init__(f"{account_url}: {reason} ({tweets} tweets enviados antes del fallo)")
+        self.account_url = account_url
+        self.tweets = tweets
+        self.reason = reason
+        self.records = list(records or [])
+
 class TwitterScraper:
-    def __init__(self, headless=False):
-        """Inicializar el scraper de Twitter/X."""
+    def __init__(self, headless=False, batch_extraction=True, extraction_mode='live', snapshot_dir=None,
+                 wait_timeout=5, polite_floor=0.3, index_path=None, lean=False, profile_dir=None, verbose=True,
+                 account_pause=ACCOUNT_PAUSE_RANGE, rate_limiter=None, pacer=None, selector_registry=None,
+                 deep_history=False, tabs=1,
+                 memory_limit_mb=DEEP_MEMORY_LIMIT_MB, start_driver=True):
+        """
+        Inicializar el scraper de Twitter/X.
+
+        Con batch_extraction=True (por defecto) todos los tweets de la página se
+        extraen con una sola llamada a execute_script; los métodos extract_tweet_*
+        por elemento quedan como respaldo si el script falla.
+
+        extraction_mode='snapshot' descarga page_source una sola vez y lo parsea
+        fuera del navegador con snapshot_parser (lxml). Si se indica snapshot_dir,
+        cada instantánea se guarda ahí para poder re-extraerla más adelante.
+
+        extraction_mode='network' activa el log de rendimiento de Chrome y lee las
+        respuestas JSON del timeline (UserTweets) en lugar del DOM, con los
+        contadores exactos.
+
+        Las esperas se basan en eventos del DOM con un máximo de wait_timeout
+        segundos; polite_floor es la pausa mínima (con variación aleatoria) que se
+        mantiene después de cada espera para no parecer automatizado;
+        account_pause es el rango (mín., máx.) de la pausa entre cuentas.
+        rate_limiter (un rate_limit.HostRateLimiter, que puede compartirse entre
+        varios scrapers) limita las cargas de página y los scrolls por host.
+        pacer (un pacing.AdaptivePacer) reemplaza polite_floor y account_pause
+        por pausas que se ajustan a las señales de bloqueo (carga de página sin
+        tweets, ventana de inicio de sesión, scrolls sin celdas nuevas), con un
+        cortacircuitos que detiene las cargas si las señales se acumulan; se
+        comparte con los navegadores del modo paralelo.
+
+        Con tabs > 1, scrape_multiple_accounts abre ese número de ventanas en
+        este mismo Chrome e intercala las cuentas entre ellas (una carga o un
+        scroll avanza en una ventana mientras se extrae de otra; ver
+        tab_multiplexer.py) en lugar de abrir un navegador por cuenta.
+
+        Los campos con selectores o métodos alternativos (carga de la página,
+        tweets, contenido, estadísticas) prueban primero el que viene
+        funcionando según selector_registry (un selector_registry.StrategyRegistry,
+        compartible entre scrapers). Si se crea con una ruta, las tasas de
+        acierto se guardan al cerrar y la siguiente ejecución arranca con el
+        orden aprendido.
+
+        Con index_path se usa un índice SQLite de tweets ya vistos: cada cuenta se
+        raspa solo hasta su marca de agua (el tweet más reciente de la extracción
+        anterior) y las ejecuciones interrumpidas se pueden reanudar.
+
+        Con lean=True el navegador no descarga imágenes, video, fuentes ni
+        scripts de analítica (la detección de media usa solo atributos del DOM)
+        y reutiliza un perfil persistente en profile_dir (por defecto
+        twitter_data/chrome_profile), precalentado la primera vez. profile_dir
+        también se puede usar sin el modo ligero.
+
+        deep_history=True es el modo de historial profundo para extracciones de
+        miles de tweets: después de cada cosecha vacía del DOM las celdas ya
+        procesadas, y si la memoria del navegador supera memory_limit_mb lo
+        reinicia y continúa con una búsqueda from:cuenta max_id:... justo antes
+        del último tweet cosechado. Con índice, el avance queda guardado en cada
+        paso (también en scrape_account) y una extracción interrumpida se
+        reanuda en ese tweet; la marca de agua no detiene el modo profundo.
+
+        self.instrumentation acumula tiempos por fase, comandos WebDriver y rutas
+        de respaldo usadas (ver instrumentation.py). Con verbose=False se omiten
+        los mensajes por tweet y por scroll, que también tienen su costo.
+
+        Con start_driver=False no se abre ningún navegador: el objeto solo aporta
+        la lógica de extracción (índice, filtros, instrumentación) a quien maneja
+        el navegador por su cuenta, como las sesiones de async_scraper.
+        """
+        if extraction_mode not in ('live', 'snapshot', 'network'):
+            raise ValueError(f"Modo de extracción no válido: {extraction_mode}")
+        self.batch_extraction = batch_extraction
+        self.extraction_mode = extraction_mode
+        self.snapshot_dir = snapshot_dir
+        self._snapshot_index = 0
+        self.wait_timeout = wait_timeout
+        self.polite_floor = polite_floor
+        self.account_pause = account_pause
+        self.rate_limiter = rate_limiter
+        self.pacer = pacer
+        self.deep_history = deep_history
+        self.memory_limit_mb = memory_limit_mb
+        self.tabs = tabs
+        self.last_tab_report = None
+        self.strategies = selector_registry or StrategyRegistry()
+        self._current_url = None
+        self.wait_timings = {}
+        self._pending_responses = set()
+        self._harvest_context = {}
+        self.tweet_index = TweetIndex(index_path) if index_path else None
+        self.command_count = 0
+        self.last_extraction_stats = {}
+        self.verbose = verbose
+        self.instrumentation = Instrumentation(lambda: self.command_count)
+        self.lean = lean
+        self.profile_dir = profile_dir or (DEFAULT_LEAN_PROFILE_DIR if lean else None)
+        self.driver = None
+        # Configuración para crear trabajadores equivalentes en modo paralelo
+        self._init_kwargs = {
+            'headless': headless,
+            'batch_extraction': batch_extraction,
+            'extraction_mode': extraction_mode,
+            'snapshot_dir': snapshot_dir,
+            'wait_timeout': wait_timeout,
+            'polite_floor': polite_floor,
+            'index_path': index_path,
+            'lean': lean,
+            'profile_dir': self.profile_dir,
+            'verbose': verbose,
+            'account_pause': account_pause,
+            'rate_limiter': rate_limiter,
+            'pacer': pacer,
+            'selector_registry': self.strategies,
+            'deep_history': deep_history,
+            'memory_limit_mb': memory_limit_mb,
+            'tabs': tabs
+        }
+        if start_driver:
+            self._start_driver()
+
+    def _chrome_options(self):
+        """Opciones de Chrome anti-detección (también las usa async_scraper para sus sesiones)."""
+        headless = self._init_kwargs['headless']
         chrome_options = Options()
         if headless:
             chrome_options.add_argument("--headless=new")  # Modo headless más reciente
@@ -32,35 +441,313 @@ class TwitterScraper:
         
         # Agregar user-agent personalizado para reducir probabilidad de bloqueo
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
+
+        # En modo red se registran los eventos Network.* para leer las respuestas del timeline
+        if self.extraction_mode == 'network':
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+        if self.lean:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_argument("--mute-audio")
+            chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+            chrome_options.add_experimental_option("prefs", {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.default_content_setting_values.notifications': 2
+            })
+
+        if self.tabs > 1:
+            # Las ventanas que no tienen el foco siguen renderizando y cargando el timeline
+            chrome_options.add_argument("--disable-background-timer-throttling")
+            chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+            chrome_options.add_argument("--disable-renderer-backgrounding")
+
+        # Perfil persistente: cookies y caché HTTP sobreviven entre ejecuciones
+        if self.profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={os.path.abspath(self.profile_dir)}")
+        return chrome_options
+
+    def _cdp_setup_commands(self):
+        """Comandos CDP (comando, parámetros) que se envían al abrir el navegador."""
+        # El búfer por defecto (250 entradas) se llena en un timeline con scroll
+        commands = [('Page.addScriptToEvaluateOnNewDocument',
+                     {'source': 'performance.setResourceTimingBufferSize(100000);'})]
+        if self.lean:
+            commands.append(('Network.enable', {}))
+            commands.append(('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS}))
+        return commands
+
+    def _start_driver(self):
+        """Iniciar Chrome con las opciones anti-detección."""
+        new_profile = bool(self.profile_dir) and not os.path.exists(
+            os.path.join(os.path.abspath(self.profile_dir), PROFILE_WARM_MARKER))
+        self.driver = webdriver.Chrome(options=self._chrome_options())
+        self._install_command_counter()
+        # Las esperas asíncronas necesitan un margen sobre su propio tiempo máximo
+        self.driver.set_script_timeout(self.wait_timeout + 5)
         self.wait = WebDriverWait(self.driver, 15)
         self.actions = ActionChains(self.driver)
-        
+
+        try:
+            for command, params in self._cdp_setup_commands():
+                self.driver.execute_cdp_cmd(command, params)
+        except Exception as e:
+            print(f"No se pudo configurar el bloqueo de recursos: {e}")
+
+        if new_profile:
+            self.warm_profile()
+
+    def warm_profile(self, url=PROFILE_WARMUP_URL):
+        """Cargar una página una vez para llenar la caché del perfil persistente."""
+        if not self.profile_dir:
+            return
+        started = time.perf_counter()
+        try:
+            self.driver.get(url)
+            WebDriverWait(self.driver, 15).until(
+                lambda driver: driver.execute_script("return document.readyState") == 'complete')
+        except Exception as e:
+            print(f"No se pudo precalentar el perfil: {e}")
+            return
+        with open(os.path.join(os.path.abspath(self.profile_dir), PROFILE_WARM_MARKER), 'w') as f:
+            f.write(datetime.datetime.now().isoformat())
+        print(f"Perfil precalentado en {self.profile_dir} ({time.perf_counter() - started:.1f}s)")
+
+    def page_load_stats(self):
+        """Tiempo de carga y bytes transferidos de la página actual (incluye lo cargado con scroll)."""
+        try:
+            stats = self.driver.execute_script(PAGE_LOAD_STATS_SCRIPT) or {}
+        except Exception as e:
+            print(f"No se pudieron leer las métricas de carga: {e}")
+            return {}
+        stats['modo_ligero'] = self.lean
+        return stats
+
+    def _worker_kwargs(self, worker_id):
+        """Configuración de un trabajador adicional; Chrome no comparte un perfil entre procesos."""
+        kwargs = dict(self._init_kwargs)
+        if kwargs.get('profile_dir'):
+            kwargs['profile_dir'] = f"{kwargs['profile_dir']}_{worker_id}"
+        return kwargs
+
+    def _install_command_counter(self):
+        """Contar cada comando WebDriver (cada uno es un viaje de ida y vuelta HTTP)."""
+        original_execute = self.driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self.command_count += 1
+            return original_execute(driver_command, params)
+
+        # Los WebElement también pasan por driver.execute, así que se cuentan todos
+        self.driver.execute = counted_execute
+
+    def browser_memory(self):
+        """
+        Memoria residente (bytes) de chromedriver y todos los procesos de Chrome.
+        Usa psutil si está instalado, si no /proc (Linux) y, como último
+        recurso, el heap de JS vía CDP.
+        """
+        try:
+            root_pid = self.driver.service.process.pid
+        except AttributeError:
+            root_pid = None
+        if root_pid:
+            try:
+                import psutil
+                root = psutil.Process(root_pid)
+                return sum(p.memory_info().rss for p in [root] + root.children(recursive=True))
+            except ImportError:
+                pass
+            except Exception:
+                return 0
+            if os.path.exists('/proc'):
+                total, pending = 0, [root_pid]
+                while pending:
+                    pid = pending.pop()
+                    total += _proc_rss(pid)
+                    pending.extend(_proc_children(pid))
+                return total
+        try:
+            metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+            return int(next(m['value'] for m in metrics if m['name'] == 'JSHeapTotalSize'))
+        except Exception:
+            return 0
+
+    def close(self):
+        """Cerrar el navegador de forma explícita (se puede llamar varias veces)."""
+        if self.tweet_index is not None:
+            self.tweet_index.close()
+            self.tweet_index = None
+        self._quit_driver()
+
+    def _quit_driver(self):
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        try:
+            self.strategies.save()
+        except Exception as e:
+            print(f"Error al guardar el registro de selectores: {e}")
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def restart_driver(self):
+        """Reemplazar un navegador caído por uno nuevo con la misma configuración."""
+        print("Reiniciando el navegador")
+        # El índice de tweets sigue abierto: la cuenta en curso continúa con el navegador nuevo
+        self._quit_driver()
+        self._start_driver()
+
+    def is_alive(self):
+        """Comprobar si el navegador sigue respondiendo."""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_script("return 1;")
+            return True
+        except:
+            return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __del__(self):
         """Cerrar el navegador cuando se destruye el objeto."""
         try:
-            self.driver.quit()
+            self.close()
         except:
             pass
     
-    def scroll_down(self, num_scrolls=5, pause=2):
+    def _log(self, message):
+        """Mensaje de diagnóstico detallado; se omite con verbose=False."""
+        if self.verbose:
+            print(message)
+
+    def _record_wait(self, name, seconds):
+        """Registrar cuánto duró realmente una espera."""
+        self.wait_timings.setdefault(name, []).append(seconds)
+
+    def wait_summary(self):
+        """Resumen de las esperas registradas: cantidad, total, media y máximo en segundos."""
+        summary = {}
+        for name, durations in self.wait_timings.items():
+            summary[name] = {
+                'esperas': len(durations),
+                'total_s': round(sum(durations), 3),
+                'media_s': round(sum(durations) / len(durations), 3),
+                'max_s': round(max(durations), 3)
+            }
+        return summary
+
+    def _polite_pause(self):
+        """Pausa mínima con variación aleatoria para evitar detección."""
+        if self.pacer is not None:
+            self._record_wait('pausa_adaptativa', self.pacer.pause())
+            return
+        if self.polite_floor <= 0:
+            return
+        started = time.perf_counter()
+        time.sleep(random.uniform(self.polite_floor * 0.8, self.polite_floor * 1.2))
+        self._record_wait('pausa_cortesia', time.perf_counter() - started)
+
+    def _throttle(self, url=None):
+        """Esperar una ficha del limitador de tasa del host (si hay limitador)."""
+        url = url or self._current_url
+        if self.pacer is not None:
+            waited = self.pacer.gate()
+            if waited > 0:
+                self._record_wait('circuito_abierto', waited)
+        if self.rate_limiter is None or not url:
+            return
+        waited = self.rate_limiter.acquire(url)
+        if waited > 0:
+            self._record_wait('limite_tasa', waited)
+
+    def _run_wait_script(self, name, script, *args):
+        """Ejecutar un script de espera asíncrono y registrar su duración."""
+        started = time.perf_counter()
+        try:
+            result = self.driver.execute_async_script(script, *args)
+            changed = bool(result and result.get('changed'))
+        except Exception as e:
+            print(f"Error en la espera {name}: {e}")
+            changed = False
+        self._record_wait(name, time.perf_counter() - started)
+        return changed
+
+    def scroll_down(self, num_scrolls=5, pause=None):
         """Desplazar hacia abajo para cargar más tweets."""
         for i in range(num_scrolls):
-            print(f"Scroll {i+1}/{num_scrolls}")
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(pause * 0.8, pause * 1.2))  # Pausa aleatoria
-            
-            # Verificar si hay una ventana emergente de inicio de sesión y cerrarla
+            self._log(f"Scroll {i+1}/{num_scrolls}")
+            self._scroll_once(pause)
+
+    @timed('scroll')
+    def _scroll_once(self, pause=None):
+        """
+        Hacer un solo scroll hasta el final de la página y esperar a que aparezcan
+        celdas nuevas (como máximo pause o wait_timeout segundos).
+        """
+        timeout = pause if pause is not None else self.wait_timeout
+        self._throttle()
+        changed = self._run_wait_script('scroll', SCROLL_AND_WAIT_SCRIPT, int(timeout * 1000))
+        if not changed:
+            self._log("No se detectaron celdas nuevas tras el scroll")
+        
+        # Verificar si hay una ventana emergente de inicio de sesión y cerrarla
+        login_wall = self.close_login_popup()
+        self._report_pacing(changed, login_wall)
+        self._polite_pause()
+        return changed
+
+    def _report_pacing(self, changed, login_wall=False):
+        """Informar al controlador de ritmo del resultado de un scroll."""
+        if self.pacer is None:
+            return
+        if login_wall:
+            self.pacer.block('login')
+        elif not changed:
+            self.pacer.block('sin_celdas')
+        else:
+            self.pacer.success()
+
+    def pause_between_accounts(self):
+        """Pausa entre cuentas para evitar detección (adaptativa si hay controlador de ritmo)."""
+        if self.pacer is not None:
+            self.pacer.account_pause()
+        else:
+            time.sleep(random.uniform(*self.account_pause))
+
+    @timed('scroll_a_tweet')
+    def scroll_into_view_and_wait(self, tweet):
+        """Centrar un tweet y esperar a que su grupo de métricas esté cargado."""
+        return self._run_wait_script('metricas', SCROLL_INTO_VIEW_AND_WAIT_SCRIPT, tweet,
+                                     int(self.wait_timeout * 1000))
+
+    @timed('popup')
+    def close_login_popup(self):
+        """Cerrar la ventana emergente de inicio de sesión si aparece y esperar a que desaparezca."""
+        try:
+            close_buttons = self.driver.find_elements(By.CSS_SELECTOR, LOGIN_POPUP_CLOSE_SELECTOR)
+            if not close_buttons:
+                return False
+            close_buttons[0].click()
+            self._log("Ventana emergente cerrada")
+            started = time.perf_counter()
             try:
-                close_buttons = self.driver.find_elements(By.CSS_SELECTOR, '[data-testid="modal-close"], [role="button"][aria-label*="Close"], button[aria-label*="Close"]')
-                if close_buttons:
-                    close_buttons[0].click()
-                    print("Ventana emergente cerrada")
-                    time.sleep(1)
-            except:
-                pass
+                WebDriverWait(self.driver, self.wait_timeout, poll_frequency=0.1).until(
+                    EC.staleness_of(close_buttons[0]))
+            except TimeoutException:
+                print("La ventana emergente sigue visible")
+            self._record_wait('popup', time.perf_counter() - started)
+            return True
+        except:
+            return False
     
+    @timed('extract_stat_direct')
     def extract_stat_direct(self, tweet, data_testid):
         """Extraer estadística directamente usando data-testid."""
         try:
@@ -78,7 +765,7 @@ class TwitterScraper:
                 parent = group_element.find_element(By.XPATH, './..')
                 aria_label = parent.get_attribute('aria-label')
                 if aria_label:
-                    print(f"Aria-label encontrado para {data_testid}: {aria_label}")
+                    self._log(f"Aria-label encontrado para {data_testid}: {aria_label}")
                     return extract_number(aria_label)
                 
                 # Si no hay aria-label, intentar obtener del texto
@@ -86,7 +773,7 @@ class TwitterScraper:
                 for span in spans:
                     span_text = span.text.strip()
                     if span_text:
-                        print(f"Texto encontrado para {data_testid}: {span_text}")
+                        self._log(f"Texto encontrado para {data_testid}: {span_text}")
                         return extract_number(span_text)
                 
                 return 0
@@ -95,127 +782,137 @@ class TwitterScraper:
                 return 0
 
         except NoSuchElementException:
-            print(f"No se encontró elemento para {data_testid}")
+            self._log(f"No se encontró elemento para {data_testid}")
             return 0
         except Exception as e:
             print(f"Error general al buscar {data_testid}: {e}")
             return 0
     
+    @timed('extract_tweet_stats')
     def extract_tweet_stats(self, tweet):
-        """Extraer estadísticas de un tweet (me gusta, comentarios, retweets)."""
-        stats = {
-            'comentarios': 0,
-            'retweets': 0,
-            'me_gusta': 0,
-            'compartidos': 0
-        }
-        
+        """
+        Extraer estadísticas de un tweet (me gusta, comentarios, retweets).
+
+        Hay tres métodos, del más preciso al más genérico; se prueban en el
+        orden aprendido por self.strategies, así que el que viene funcionando
+        va primero y los demás solo se intentan si devuelve todo en cero.
+        """
         # Asegurarnos de que el tweet es visible y esperar a que se carguen las estadísticas
-        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", tweet)
-        time.sleep(1)  # Esperar más tiempo para que se carguen las estadísticas
-        
-        try:
-            # Método 1: Buscar directamente por data-testid
-            data_testids = {
-                'reply': 'comentarios',
-                'retweet': 'retweets',
-                'like': 'me_gusta',
-                'bookmark': 'compartidos'
-            }
-            
-            for testid, stat_key in data_testids.items():
-                value = self.extract_stat_direct(tweet, testid)
-                if value > 0:  # Solo actualizar si encontramos un valor positivo
-                    stats[stat_key] = value
-                    
-            # Si no encontramos nada, intentamos el método alternativo
-            if all(v == 0 for v in stats.values()):
-                print("Intentando método alternativo para extraer estadísticas...")
+        self.scroll_into_view_and_wait(tweet)
+        methods = {
+            'metodo_1': self._stats_by_testid,
+            'metodo_2': self._stats_by_group_buttons,
+            'metodo_3': self._stats_by_number_spans
+        }
+
+        def attempt(name):
+            try:
+                stats = methods[name](tweet)
+            except Exception as e:
+                print(f"Error general al extraer estadísticas ({name}): {e}")
+                return None
+            return stats if any(v > 0 for v in stats.values()) else None
+
+        method, stats = self.strategies.first('estadisticas', list(methods), attempt)
+        self.instrumentation.count(f"estadisticas_{method}" if method else "estadisticas_sin_datos")
+        if stats is None:
+            stats = {'comentarios': 0, 'retweets': 0, 'me_gusta': 0, 'compartidos': 0}
+
+        self._log(f"Estadísticas finales extraídas: {stats}")
+        return stats
+
+    def _stats_by_testid(self, tweet):
+        """Método 1: buscar directamente por data-testid."""
+        stats = {'comentarios': 0, 'retweets': 0, 'me_gusta': 0, 'compartidos': 0}
+        for testid, stat_key in STAT_TESTIDS.items():
+            value = self.extract_stat_direct(tweet, testid)
+            if value > 0:  # Solo actualizar si encontramos un valor positivo
+                stats[stat_key] = value
+        return stats
+
+    def _stats_by_group_buttons(self, tweet):
+        """Método 2: buscar todos los elementos con role="button" dentro de groups."""
+        stats = {'comentarios': 0, 'retweets': 0, 'me_gusta': 0, 'compartidos': 0}
+        self._log("Intentando método alternativo para extraer estadísticas...")
+        metrics_groups = tweet.find_elements(By.CSS_SELECTOR, '[role="group"] [role="button"]')
+        for metric in metrics_groups:
+            try:
+                # Obtener el texto y el aria-label
+                aria_text = metric.get_attribute('aria-label') or ""
+                inner_text = metric.text or ""
                 
-                # Método 2: Buscar todos los elementos con role="button" dentro de groups
-                metrics_groups = tweet.find_elements(By.CSS_SELECTOR, '[role="group"] [role="button"]')
-                for metric in metrics_groups:
-                    try:
-                        # Obtener el texto y el aria-label
-                        aria_text = metric.get_attribute('aria-label') or ""
-                        inner_text = metric.text or ""
-                        
-                        # Usar el texto que tenga información
-                        metric_text = aria_text if len(aria_text) > len(inner_text) else inner_text
-                        metric_text = metric_text.lower()
-                        
-                        print(f"Texto de métrica encontrado: {metric_text}")
-                        
-                        # Check que tipo de métrica es
-                        if any(keyword in metric_text for keyword in ["repl", "respuesta", "comment"]):
-                            stats['comentarios'] = extract_number(metric_text)
-                        elif any(keyword in metric_text for keyword in ["retweet", "retuit"]):
-                            stats['retweets'] = extract_number(metric_text)
-                        elif any(keyword in metric_text for keyword in ["like", "me gusta"]):
-                            stats['me_gusta'] = extract_number(metric_text)
-                        elif any(keyword in metric_text for keyword in ["bookmark", "guardar", "compartir"]):
-                            stats['compartidos'] = extract_number(metric_text)
-                    except StaleElementReferenceException:
-                        print("Elemento ya no está disponible (stale)")
-                        continue
-                    except Exception as e:
-                        print(f"Error al procesar métrica: {e}")
-                        continue
-            
-            # Método 3: Si aún tenemos ceros, intentemos extraer números directamente
-            if all(v == 0 for v in stats.values()):
-                print("Intentando extraer números directamente del tweet...")
-                all_spans = tweet.find_elements(By.CSS_SELECTOR, 'span')
-                for span in all_spans:
-                    try:
-                        span_text = span.text.strip()
-                        if span_text and re.match(r'^\d+$', span_text):  # Solo números
-                            # Intentar determinar el tipo de métrica por su posición o contexto
-                            parent = span.find_element(By.XPATH, './..')
-                            grandparent = parent.find_element(By.XPATH, './..')
-                            
-                            # Verificar si hay iconos cercanos que indiquen el tipo
-                            outer_html = grandparent.get_attribute('outerHTML').lower()
-                            if "comment" in outer_html or "reply" in outer_html:
-                                stats['comentarios'] = int(span_text)
-                            elif "retweet" in outer_html:
-                                stats['retweets'] = int(span_text)
-                            elif "like" in outer_html or "heart" in outer_html:
-                                stats['me_gusta'] = int(span_text)
-                            elif "bookmark" in outer_html or "share" in outer_html:
-                                stats['compartidos'] = int(span_text)
-                    except:
-                        continue
+                # Usar el texto que tenga información
+                metric_text = aria_text if len(aria_text) > len(inner_text) else inner_text
+                metric_text = metric_text.lower()
                 
-        except Exception as e:
-            print(f"Error general al extraer estadísticas: {e}")
+                self._log(f"Texto de métrica encontrado: {metric_text}")
+                
+                # Check que tipo de métrica es
+                stat_key = classify_metric_text(metric_text)
+                if stat_key:
+                    stats[stat_key] = extract_number(metric_text)
+            except StaleElementReferenceException:
+                print("Elemento ya no está disponible (stale)")
+                continue
+            except Exception as e:
+                print(f"Error al procesar métrica: {e}")
+                continue
+        return stats
 
-        print(f"Estadísticas finales extraídas: {stats}")
+    def _stats_by_number_spans(self, tweet):
+        """Método 3: extraer números directamente de los span del tweet."""
+        stats = {'comentarios': 0, 'retweets': 0, 'me_gusta': 0, 'compartidos': 0}
+        self._log("Intentando extraer números directamente del tweet...")
+        all_spans = tweet.find_elements(By.CSS_SELECTOR, 'span')
+        for span in all_spans:
+            try:
+                span_text = span.text.strip()
+                if span_text and re.match(r'^\d+$', span_text):  # Solo números
+                    # Intentar determinar el tipo de métrica por su posición o contexto
+                    parent = span.find_element(By.XPATH, './..')
+                    grandparent = parent.find_element(By.XPATH, './..')
+                    
+                    # Verificar si hay iconos cercanos que indiquen el tipo
+                    outer_html = grandparent.get_attribute('outerHTML').lower()
+                    if "comment" in outer_html or "reply" in outer_html:
+                        stats['comentarios'] = int(span_text)
+                    elif "retweet" in outer_html:
+                        stats['retweets'] = int(span_text)
+                    elif "like" in outer_html or "heart" in outer_html:
+                        stats['me_gusta'] = int(span_text)
+                    elif "bookmark" in outer_html or "share" in outer_html:
+                        stats['compartidos'] = int(span_text)
+            except:
+                continue
         return stats
     
+    @timed('extract_tweet_content')
     def extract_tweet_content(self, tweet):
-        """Extraer el contenido del tweet."""
-        try:
-            tweet_text_elements = tweet.find_elements(By.CSS_SELECTOR, '[data-testid="tweetText"]')
-            if tweet_text_elements:
-                return tweet_text_elements[0].text
-        except:
-            pass
-            
-        # Intentar selectores alternativos
-        selectors = ['div[lang]', 'div[dir="auto"]', 'div[role="group"] div[dir="auto"]']
-        for selector in selectors:
+        """Extraer el contenido del tweet, probando primero el selector que viene funcionando."""
+        def attempt(selector):
             try:
                 elements = tweet.find_elements(By.CSS_SELECTOR, selector)
-                for element in elements:
-                    text = element.text.strip()
-                    if text and len(text) > 5:  # Probablemente sea el texto del tweet
-                        return text
             except:
-                continue
-                
-        return ""
+                return None
+            if selector == CONTENT_SELECTORS[0]:
+                return elements[0].text if elements else None
+            for element in elements:
+                try:
+                    text = element.text.strip()
+                except:
+                    continue
+                if text and len(text) > 5:  # Probablemente sea el texto del tweet
+                    return text
+            return None
+
+        selector, text = self.strategies.first('contenido', CONTENT_SELECTORS, attempt)
+        if selector is None:
+            self.instrumentation.count("contenido_vacio")
+            return ""
+        self.instrumentation.count(f"contenido_selector_{CONTENT_SELECTORS.index(selector)}")
+        return text
 
+    @timed('extract_tweet_date')
     def extract_tweet_date(self, tweet):
         """Extraer la fecha del tweet."""
         try:
@@ -236,6 +933,7 @@ class TwitterScraper:
             
         return ""
     
+    @timed('extract_tweet_url')
     def extract_tweet_url(self, tweet):
         """Extraer la URL del tweet."""
         try:
@@ -268,6 +966,7 @@ class TwitterScraper:
             
         return ""
     
+    @timed('has_media')
     def has_media(self, tweet):
         """Verificar si el tweet tiene imágenes o videos."""
         try:
@@ -280,45 +979,23 @@ class TwitterScraper:
                 '[data-testid="mediaPreview"]'
             ]
             
-            for selector in media_selectors:
-                elements = tweet.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    return True
-            return False
+            # Un solo selector combinado: basta con los atributos, aunque el archivo no se descargue
+            return bool(tweet.find_elements(By.CSS_SELECTOR, ', '.join(media_selectors)))
         except:
             return False
+
+    @timed('extract_tweet_media')
+    def extract_tweet_media(self, tweet):
+        """URLs y tipos de las fotos y videos del tweet (lista de {'url', 'tipo'})."""
+        try:
+            return normalize_media(self.driver.execute_script(TWEET_MEDIA_SCRIPT, tweet))
+        except Exception as e:
+            self._log(f"No se pudieron leer los medios del tweet: {e}")
+            return []
     
     def is_tweet_less_than_two_years_old(self, date_str):
         """Verificar si un tweet tiene menos de dos años desde su publicación."""
-        if not date_str:
-            return False
-            
-        try:
-            # Parseamos la fecha del tweet (formato ISO)
-            # Manejar diferentes formatos posibles
-            if 'Z' in date_str:
-                date_str = date_str.replace('Z', '+00:00')
-                
-            tweet_date = datetime.datetime.fromisoformat(date_str)
-            
-            # Fecha actual
-            current_date = datetime.datetime.now(datetime.timezone.utc)
-            
-            # Asegurarnos que tweet_date tenga información de zona horaria
-            if tweet_date.tzinfo is None:
-                tweet_date = tweet_date.replace(tzinfo=datetime.timezone.utc)
-                
-            # Diferencia en días
-            days_difference = (current_date - tweet_date).days
-            
-            # Verificar si es menor a 2 años (730 días aproximadamente)
-            is_recent = days_difference < 730
-            
-            print(f"Fecha del tweet: {tweet_date}, Diferencia de días: {days_difference}, Es reciente: {is_recent}")
-            return is_recent
-        except Exception as e:
-            print(f"Error al verificar la antigüedad del tweet: {e}")
-            return False
+        return date_range_position(date_str, resolve_date_range()) == 0
     
     def get_account_name(self, account_url):
         """Obtener el nombre de usuario de la URL de cuenta."""
@@ -335,66 +1012,300 @@ class TwitterScraper:
         except:
             return "unknown"
             
-    def scrape_account(self, account_url, num_tweets=20):
-        """Raspar tweets de una cuenta específica de Twitter/X."""
+    @timed('extract_tweets_batch')
+    def extract_tweets_batch(self):
+        """
+        Extraer todos los tweets del DOM con una sola llamada a execute_script.
+        Devuelve una lista de registros crudos o None si el script falla.
+        """
         try:
-            self.driver.get(account_url)
-            print(f"Accediendo a: {account_url}")
-            
-            # Esperar a que cargue la página
-            selectors = ['[data-testid="tweet"]', 'article', '[data-testid="cellInnerDiv"]']
-            found = False
-            
-            for selector in selectors:
+            records = self.driver.execute_script(BATCH_EXTRACT_SCRIPT)
+        except Exception as e:
+            print(f"Error en la extracción por lotes: {e}")
+            return None
+        if not isinstance(records, list):
+            return None
+        return records
+
+    def _read_timeline_responses(self):
+        """
+        Leer el log de rendimiento y decodificar las respuestas del timeline que
+        terminaron de descargarse desde la última lectura.
+        """
+        from timeline_json import TIMELINE_URL_RE, decode_timeline_response
+
+        records = []
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params') or {}
+            if method == 'Network.responseReceived':
+                if TIMELINE_URL_RE.search((params.get('response') or {}).get('url', "")):
+                    self._pending_responses.add(params.get('requestId'))
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending_responses:
+                request_id = params['requestId']
+                self._pending_responses.discard(request_id)
                 try:
-                    self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                    print(f"Página cargada, encontrado selector: {selector}")
-                    found = True
-                    break
-                except TimeoutException:
+                    response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                except Exception as e:
+                    print(f"No se pudo leer la respuesta del timeline {request_id}: {e}")
                     continue
-                    
-            if not found:
-                print("No se pudo cargar la página correctamente")
-                return []
-                
-            # Verificar si hay un popup de inicio sesión y cerrarlo
-            try:
-                close_buttons = self.driver.find_elements(By.CSS_SELECTOR, '[data-testid="modal-close"], [role="button"][aria-label*="Close"], button[aria-label*="Close"]')
-                if close_buttons:
-                    close_buttons[0].click()
-                    print("Popup de inicio de sesión cerrado")
-                    time.sleep(1)
-            except:
-                pass
-            
-            # Scroll para cargar más tweets - aumentamos el número para conseguir suficientes tweets recientes
-            num_scrolls_needed = max(7, num_tweets // 2)  # Más scrolls para asegurar cargar suficientes tweets
-            self.scroll_down(num_scrolls_needed, pause=2)
-            
-            # Recolectar tweets con diferentes selectores
-            tweet_elements = []
-            selectors = [
-                '[data-testid="tweet"]',
-                'article',
-                '[data-testid="cellInnerDiv"] div[data-testid]',
-                '[data-testid="cellInnerDiv"]'
-            ]
-            
-            for selector in selectors:
-                tweet_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if len(tweet_elements) > 0:
-                    print(f"Encontrados {len(tweet_elements)} tweets con selector: {selector}")
-                    break
-            
-            if not tweet_elements:
-                print("No se encontraron tweets con ninguno de los selectores")
-                return []
-            
-            # Filtrar tweets que parezcan promocionados o repetidos
-            filtered_tweets = []
-            tweet_urls = set()
-            
+                body = response.get('body', "")
+                if response.get('base64Encoded'):
+                    body = base64.b64decode(body).decode('utf-8', errors='replace')
+                records.extend(decode_timeline_response(body))
+        return records
+
+    def _harvest_network_records(self, first):
+        """Registros de las respuestas del timeline; en la primera lectura se espera a que llegue una."""
+        records = self._read_timeline_responses()
+        deadline = time.perf_counter() + self.wait_timeout
+        started = time.perf_counter()
+        while first and not records and time.perf_counter() < deadline:
+            time.sleep(0.2)
+            records = self._read_timeline_responses()
+        if first:
+            self._record_wait('respuesta_timeline', time.perf_counter() - started)
+        return records
+
+    @timed('cosecha')
+    def _harvest_raw_records(self, account_handle, first=False):
+        """Obtener los registros crudos de los tweets renderizados en este momento en el DOM."""
+        if self.extraction_mode == 'network':
+            return self._harvest_network_records(first)
+        if self.extraction_mode == 'snapshot':
+            from snapshot_parser import extract_raw_records
+
+            page_source = self.driver.page_source
+            if self.snapshot_dir:
+                self.save_snapshot(page_source, account_handle)
+            return extract_raw_records(page_source)
+        if self.batch_extraction:
+            return self.extract_tweets_batch()
+        return None
+
+    def save_snapshot(self, page_source, account_handle):
+        """Guardar el HTML de la página para poder re-extraerlo sin volver al sitio."""
+        try:
+            if not os.path.exists(self.snapshot_dir):
+                os.makedirs(self.snapshot_dir)
+            # Una instantánea por scroll: el timeline virtualizado solo contiene parte de los tweets
+            self._snapshot_index += 1
+            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+            snapshot_file = os.path.join(self.snapshot_dir, f"{account_handle}_{timestamp}_{self._snapshot_index:03d}.html")
+            with open(snapshot_file, 'w', encoding='utf-8') as f:
+                f.write(page_source)
+            print(f"Instantánea guardada en {snapshot_file}")
+        except Exception as e:
+            print(f"Error al guardar la instantánea de {account_handle}: {e}")
+
+    @timed('filtrado')
+    def _process_raw_records(self, records, seen_ids, account_handle, date_range, remaining):
+        """
+        Convertir los registros crudos aún no vistos en tweets de salida.
+        Devuelve (tweets nuevos, registros nuevos vistos, si se alcanzó el corte de fecha).
+        """
+        new_tweets = []
+        new_records = 0
+
+        for record in records:
+            key = record.get('status_id') or record.get('url')
+            if not key or key in seen_ids:
+                continue
+            seen_ids.add(key)
+            new_records += 1
+
+            # Filtrar promocionados, igual que en la ruta por elemento
+            if record.get('promocionado'):
+                continue
+
+            # Los fijados y los reposts llevan el id y la fecha del tweet original:
+            # no siguen el orden cronológico inverso del timeline
+            out_of_order = record.get('fijado') or record.get('reposteado')
+
+            # Índice de tweets vistos: detenerse en la marca de agua y saltar lo ya guardado
+            status_id = int(record['status_id']) if str(record.get('status_id') or "").isdigit() else None
+            if status_id is not None and not out_of_order:
+                watermark = self._harvest_context.get('watermark')
+                if watermark is not None and status_id <= watermark:
+                    self._log(f"Tweet {key} ya está en el índice, se detiene la recolección")
+                    return new_tweets, new_records, True
+                resume_before = self._harvest_context.get('resume_before')
+                if resume_before is not None and status_id >= resume_before:
+                    continue
+
+            position = date_range_position(record.get('fecha'), date_range)
+            if position is None:
+                self._log(f"Advertencia en tweet {key}: no se pudo extraer la fecha, pero continuamos")
+            elif position < 0:
+                # El timeline es cronológico inverso: salvo fijados y reposts, todo lo que sigue es más antiguo
+                if out_of_order:
+                    kind = "fijado" if record.get('fijado') else "reposteado"
+                    self._log(f"Saltando tweet {kind} {key}: es anterior al rango de fechas")
+                    continue
+                print(f"Tweet {key} es anterior al rango de fechas, se detiene la recolección")
+                return new_tweets, new_records, True
+            elif position > 0:
+                self._log(f"Saltando tweet {key}: es posterior al rango de fechas")
+                continue
+
+            tweet_data = build_tweet_record(account_handle, record, self.instrumentation.count)
+            new_tweets.append(tweet_data)
+            tweet_text = tweet_data['texto']
+            self._log(f"Tweet {key} extraído: {tweet_text[:30]}..." if tweet_text else "Sin texto")
+
+            if len(new_tweets) >= remaining:
+                break
+
+        return new_tweets, new_records, False
+
+    @timed('escritura')
+    def _emit_tweets(self, sink, new_tweets):
+        """
+        Enviar los tweets recién extraídos al sink y, con índice, guardar la
+        posición alcanzada para poder reanudar la cuenta si se interrumpe.
+        """
+        if not new_tweets:
+            return
+        sink.write_many(new_tweets)
+        if self.tweet_index is None:
+            return
+        run_id = self._harvest_context.get('run_id')
+        if run_id:
+            # El sink se vacía antes de registrar el avance para no saltar tweets al reanudar
+            sink.flush()
+            self.tweet_index.save_progress(run_id, self._harvest_context['account_url'], new_tweets)
+        else:
+            self.tweet_index.upsert_tweets(new_tweets)
+
+    def _harvest_timeline(self, account_handle, num_tweets, date_range, max_scrolls, sink):
+        """
+        Extraer los tweets nuevos después de cada scroll, identificados por su status id.
+
+        X virtualiza el timeline y elimina del DOM los tweets que quedan fuera de
+        vista, así que se cosecha en cada paso en lugar de al final. Se detiene al
+        reunir num_tweets tweets únicos o al encontrar el primer tweet (ni fijado
+        ni reposteado) anterior al rango de fechas. Los tweets se envían al sink en cada paso;
+        devuelve cuántos se extrajeron o None si la extracción por lotes no está
+        disponible.
+        """
+        collected = 0
+        seen_ids = set()
+        stale_scrolls = 0
+        first = True
+
+        for scroll in range(max_scrolls + 1):
+            records = self._harvest_raw_records(account_handle, first=first)
+            if not records:
+                if scroll == 0:
+                    return None
+                records = []
+            first = False
+
+            new_tweets, new_records, reached_cutoff = self._process_raw_records(
+                records, seen_ids, account_handle, date_range, num_tweets - collected)
+            self._emit_tweets(sink, new_tweets)
+            collected += len(new_tweets)
+            self._log(f"Scroll {scroll}/{max_scrolls}: {new_records} tweets nuevos en el DOM, "
+                      f"{collected}/{num_tweets} recolectados")
+
+            if reached_cutoff:
+                # Marca de agua o corte de fecha: no queda nada por debajo sin raspar
+                self._harvest_context['complete'] = True
+                break
+            if collected >= num_tweets:
+                break
+
+            stale_scrolls = stale_scrolls + 1 if new_records == 0 else 0
+            if stale_scrolls >= MAX_STALE_SCROLLS:
+                print("No aparecen tweets nuevos al hacer scroll, fin del timeline")
+                self._harvest_context['complete'] = True
+                break
+
+            if self.deep_history:
+                self._track_oldest_status_id(records)
+                self._prune_harvested_cells()
+                if scroll and scroll % DEEP_MEMORY_CHECK_EVERY == 0 and self._memory_exceeded():
+                    if not self._recycle_driver(account_handle):
+                        break
+                    # La primera cosecha del navegador nuevo espera la respuesta del timeline
+                    first = True
+                    stale_scrolls = 0
+                    continue
+
+            if scroll < max_scrolls:
+                self._scroll_once()
+
+        return collected
+
+    def _track_oldest_status_id(self, records):
+        """Guardar el status id más antiguo cosechado (sin fijados, reposts ni promocionados) para reanudar ahí."""
+        ids = [int(record['status_id']) for record in records
+               if str(record.get('status_id') or "").isdigit()
+               and not record.get('fijado') and not record.get('reposteado') and not record.get('promocionado')]
+        if ids:
+            oldest = self._harvest_context.get('oldest_id')
+            self._harvest_context['oldest_id'] = min(ids) if oldest is None else min(oldest, min(ids))
+
+    @timed('poda_dom')
+    def _prune_harvested_cells(self):
+        """Vaciar del DOM las celdas ya cosechadas para que la memoria del navegador no crezca."""
+        try:
+            result = self.driver.execute_script(PRUNE_HARVESTED_CELLS_SCRIPT, DEEP_LIVE_CELLS) or {}
+        except Exception as e:
+            print(f"No se pudieron podar las celdas cosechadas: {e}")
+            return
+        self.instrumentation.count('celdas_vaciadas', result.get('vaciadas') or 0)
+        nodes = result.get('nodos') or 0
+        self._harvest_context['nodos_dom_max'] = max(self._harvest_context.get('nodos_dom_max', 0), nodes)
+
+    def _memory_exceeded(self):
+        memory_mb = self.browser_memory() / 2 ** 20
+        self._log(f"Memoria del navegador: {memory_mb:.0f} MB")
+        if memory_mb <= self.memory_limit_mb:
+            return False
+        print(f"La memoria del navegador ({memory_mb:.0f} MB) supera el límite de {self.memory_limit_mb} MB")
+        return True
+
+    def _recycle_driver(self, account_handle):
+        """
+        Reiniciar el navegador y continuar la cuenta antes del último tweet
+        cosechado. Devuelve False si no hay dónde reanudar o la página no carga.
+        """
+        oldest_id = self._harvest_context.get('oldest_id')
+        if oldest_id is None:
+            return False
+        self.restart_driver()
+        self._harvest_context['reciclajes'] = self._harvest_context.get('reciclajes', 0) + 1
+        self.instrumentation.count('reciclaje_navegador')
+        # Saltar lo ya cosechado aunque la búsqueda lo vuelva a mostrar
+        self._harvest_context['resume_before'] = oldest_id
+        url = resume_search_url(self._harvest_context['account_url'], account_handle, oldest_id)
+        return self._load_timeline(url)
+
+    def _extract_tweets_per_element(self, account_handle, num_tweets, date_range, sink):
+        """
+        Ruta de respaldo: extraer cada tweet con consultas WebElement individuales.
+        Devuelve cuántos tweets se enviaron al sink.
+        """
+        # Recolectar tweets con diferentes selectores, empezando por el que viene funcionando
+        selector, tweet_elements = self.strategies.first(
+            'tweets', TWEET_SELECTORS, lambda selector: self.driver.find_elements(By.CSS_SELECTOR, selector) or None)
+        if selector:
+            self._log(f"Encontrados {len(tweet_elements)} tweets con selector: {selector}")
+        
+        if not tweet_elements:
+            print("No se encontraron tweets con ninguno de los selectores")
+            return 0
+        
+        # Filtrar tweets que parezcan promocionados o repetidos
+        filtered_tweets = []
+        tweet_urls = set()
+        with self.instrumentation.timer('filtrado'):
+        
             for tweet in tweet_elements:
                 try:
                     # Verificar si parece un tweet promocionado
@@ -405,10 +1316,10 @@ class TwitterScraper:
                             is_promoted = True
                     except:
                         pass
-                    
+                
                     if is_promoted:
                         continue
-                    
+                
                     # Extraer URL para verificar duplicados
                     url = self.extract_tweet_url(tweet)
                     if url and url not in tweet_urls:
@@ -417,49 +1328,49 @@ class TwitterScraper:
                 except Exception as e:
                     print(f"Error al filtrar tweet: {e}")
                     continue
-                    
-            print(f"Después de filtrar: {len(filtered_tweets)} tweets únicos")
-            
-            # Extraer datos de los tweets
-            tweets_data = []
-            account_handle = self.get_account_name(account_url)
-            tweets_processed = 0
-            
-            for i, tweet in enumerate(filtered_tweets):
-                try:
-                    # Hacer scroll al tweet para asegurar que está en la vista
-                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", tweet)
-                    time.sleep(0.5)  # Esperar a que se carguen los contadores
-                    
+                
+        self._log(f"Después de filtrar: {len(filtered_tweets)} tweets únicos")
+        
+        # Extraer datos de los tweets
+        tweets_processed = 0
+        
+        for i, tweet in enumerate(filtered_tweets):
+            try:
+                with self.instrumentation.timer('tweet_por_elemento'):
+                    # Hacer scroll al tweet y esperar a que se carguen los contadores
+                    self.scroll_into_view_and_wait(tweet)
+                
                     # Extraer la fecha primero para filtrar por antigüedad
                     tweet_date = self.extract_tweet_date(tweet)
-                    
+                
                     # Si no pudimos extraer la fecha, intentamos seguir con el tweet
                     if not tweet_date:
-                        print(f"Advertencia en tweet {i+1}: no se pudo extraer la fecha, pero continuamos")
+                        self._log(f"Advertencia en tweet {i+1}: no se pudo extraer la fecha, pero continuamos")
                     else:
-                        # Verificar si el tweet tiene menos de dos años
-                        if not self.is_tweet_less_than_two_years_old(tweet_date):
-                            print(f"Saltando tweet {i+1}: es más antiguo que 2 años")
+                        # Verificar si el tweet está dentro del rango de fechas
+                        if date_range_position(tweet_date, date_range) != 0:
+                            self._log(f"Saltando tweet {i+1}: está fuera del rango de fechas")
                             continue
-                    
+                
                     # Continuar con la extracción de datos
                     tweet_text = self.extract_tweet_content(tweet)
                     tweet_url = self.extract_tweet_url(tweet)
                     has_media = self.has_media(tweet)
-                    
+                    media = self.extract_tweet_media(tweet) if has_media else []
+                
                     tweet_data = {
                         'cuenta': account_handle,
                         'texto': tweet_text or "",  # Asegurar que no sea None
                         'fecha': tweet_date or "",  # Asegurar que no sea None
                         'url': tweet_url or "",     # Asegurar que no sea None
                         'tiene_media': has_media,
+                        'media': media,
                         'comentarios': 0,
                         'retweets': 0,
                         'me_gusta': 0,
                         'compartidos': 0
                     }
-                    
+                
                     # Extraer estadísticas
                     try:
                         stats = self.extract_tweet_stats(tweet)
@@ -467,35 +1378,337 @@ class TwitterScraper:
                     except Exception as stat_error:
                         print(f"Error al extraer estadísticas: {stat_error}")
                         # Mantenemos los valores por defecto (ceros)
-                    
-                    # Agregar el tweet a nuestra colección
-                    tweets_data.append(tweet_data)
-                    print(f"Tweet {i+1} extraído: {tweet_text[:30]}..." if tweet_text else "Sin texto")
+                
+                    # Enviar el tweet al sink
+                    self._emit_tweets(sink, [tweet_data])
+                    self._log(f"Tweet {i+1} extraído: {tweet_text[:30]}..." if tweet_text else "Sin texto")
                     tweets_processed += 1
-                    
+                
                     # Si ya tenemos suficientes tweets, salimos
                     if tweets_processed >= num_tweets:
                         break
-                    
-                except StaleElementReferenceException:
-                    print(f"Error: Elemento ya no disponible (stale) para tweet {i+1}")
-                    continue
-                except Exception as e:
-                    print(f"Error general al extraer tweet {i+1}: {e}")
-                    continue
+                
+            except StaleElementReferenceException:
+                print(f"Error: Elemento ya no disponible (stale) para tweet {i+1}")
+                continue
+            except Exception as e:
+                print(f"Error general al extraer tweet {i+1}: {e}")
+                continue
+
+        return tweets_processed
+            
+    def _prepare_harvest_context(self, account_url, account_handle, run_id):
+        """
+        Preparar la marca de agua y la posición de reanudación de la cuenta.
+        Devuelve cuántos tweets ya se guardaron en una ejecución interrumpida.
+        """
+        self._harvest_context = {'run_id': run_id, 'account_url': account_url}
+        if self.tweet_index is None:
+            return 0
+        if not self.deep_history:
+            # Un relleno de historial profundo sigue más allá de lo que ya está en el índice
+            self._harvest_context['watermark'] = self.tweet_index.account_watermark(account_handle)
+        if not run_id:
+            return 0
+        already_saved, resume_before = self.tweet_index.account_progress(run_id, account_url)
+        self._harvest_context['resume_before'] = resume_before
+        if already_saved:
+            print(f"Reanudando {account_handle}: {already_saved} tweets ya guardados")
+        return already_saved
+
+    def _complete_indexed_account(self, account_url, account_handle, run_id):
+        """
+        Registrar la cuenta como terminada en el índice y mover su marca de agua.
+        La marca solo avanza si la cosecha llegó a la anterior, al corte de fecha
+        o al final del timeline: si se cortó antes (num_tweets, max_scrolls),
+        entre lo raspado y la marca anterior quedan tweets que la próxima
+        ejecución incremental tiene que recorrer.
+        """
+        advance = (self._harvest_context.get('complete')
+                   or self.tweet_index.account_watermark(account_handle) is None)
+        if not advance:
+            print(f"La extracción de {account_handle} no llegó a la marca de agua anterior; se conserva")
+        if run_id:
+            self.tweet_index.complete_run_account(run_id, account_url, account_handle, advance)
+        else:
+            self.tweet_index.complete_account(account_handle, advance)
+
+    def scrape_account(self, account_url, num_tweets=20, since=None, until=None, max_scrolls=None, run_id=None):
+        """
+        Raspar tweets de una cuenta específica de Twitter/X.
+
+        since/until delimitan el rango de fechas (por defecto, los últimos dos
+        años). max_scrolls limita cuántas veces se desplaza el timeline. Con el
+        índice activo, run_id identifica la ejecución para reanudar la cuenta en
+        la posición donde se interrumpió.
+
+        Devuelve la lista de tweets. Si la extracción falla lanza
+        AccountScrapeError con los tweets extraídos antes del fallo en records
+        (antes se devolvía una lista vacía y se perdían).
+        """
+        sink = ListSink()
+        try:
+            self.scrape_account_to_sink(account_url, sink, num_tweets, since, until, max_scrolls, run_id)
+        except AccountScrapeError as e:
+            e.records = sink.records
+            raise
+        return sink.records
+
+    def scrape_account_to_sink(self, account_url, sink, num_tweets=20, since=None, until=None, max_scrolls=None,
+                               run_id=None):
+        """
+        Igual que scrape_account, pero cada tweet se envía al sink en cuanto se
+        extrae en lugar de acumularse en memoria. Devuelve cuántos tweets se enviaron.
+        Si la página no carga o la extracción falla a mitad lanza AccountScrapeError
+        con los tweets que ya se habían enviado (el sink los conserva).
+        """
+        self.last_extraction_stats = {}
+        self.instrumentation.begin_account(self.get_account_name(account_url))
+        tweets_count = 0
+        try:
+            tweets_count = self._scrape_account_to_sink(account_url, sink, num_tweets, since, until, max_scrolls,
+                                                        run_id)
+            return tweets_count
+        except AccountScrapeError as e:
+            tweets_count = e.tweets
+            raise
+        finally:
+            self.instrumentation.end_account(tweets_count, self.last_extraction_stats.get('modo'))
+
+    def _scrape_account_to_sink(self, account_url, sink, num_tweets, since, until, max_scrolls, run_id):
+        # Lo enviado antes de un fallo ya está en el sink: se informa en el error
+        count_before = sink.count
+        try:
+            date_range = resolve_date_range(since, until)
+            if max_scrolls is None:
+                max_scrolls = max(7, num_tweets)
+            self.wait_timings = {}
+
+            account_handle = self.get_account_name(account_url)
+            own_run = self.deep_history and self.tweet_index is not None and not run_id
+            if own_run:
+                # Punto de control propio: un relleno profundo interrumpido se reanuda en el tweet donde quedó
+                run_id, _ = self.tweet_index.start_run(
+                    f"profundo_{account_handle}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}", [account_url])
+            already_saved = self._prepare_harvest_context(account_url, account_handle, run_id)
+            resume_before = self._harvest_context.get('resume_before')
+            if self.deep_history and resume_before:
+                # Ir directo al punto de reanudación en lugar de volver a recorrer el timeline
+                self._harvest_context['oldest_id'] = resume_before
+                page_url = resume_search_url(account_url, account_handle, resume_before)
+            else:
+                page_url = account_url
+
+            if not self._load_timeline(page_url):
+                raise AccountScrapeError(account_url, 0, "no se pudo cargar la página")
+
+            commands_before = self.command_count
+            self._snapshot_index = 0
+            extraction_mode = {'snapshot': "instantánea", 'network': "red"}.get(self.extraction_mode, "lotes")
+
+            # Cosechar los tweets mientras se hace scroll
+            if already_saved >= num_tweets:
+                tweets_count = 0
+            else:
+                tweets_count = self._harvest_timeline(account_handle, num_tweets - already_saved, date_range,
+                                                      max_scrolls, sink)
+
+            if tweets_count is None:
+                print("La extracción por lotes no devolvió tweets, usando extracción por elemento")
+                extraction_mode = "por elemento"
+                # Scroll para cargar más tweets - aumentamos el número para conseguir suficientes tweets recientes
+                num_scrolls_needed = max(7, num_tweets // 2)  # Más scrolls para asegurar cargar suficientes tweets
+                self.scroll_down(num_scrolls_needed)
+                tweets_count = self._extract_tweets_per_element(account_handle, num_tweets - already_saved,
+                                                                date_range, sink)
+
+            # Viajes de ida y vuelta a WebDriver usados solo en la fase de extracción
+            extraction_commands = self.command_count - commands_before
+            print(f"Comandos WebDriver en extracción ({extraction_mode}): {extraction_commands}")
+            self.last_extraction_stats = {
+                'modo': extraction_mode,
+                'comandos_webdriver': extraction_commands,
+                'tweets': tweets_count,
+                'esperas': self.wait_summary(),
+                'carga': self.page_load_stats()
+            }
+            if self.pacer is not None:
+                self.last_extraction_stats['ritmo'] = self.pacer.snapshot()
+                print(f"Ritmo actual: {self.last_extraction_stats['ritmo']['acciones_por_minuto']} acciones/min "
+                      f"(circuito {self.pacer.state})")
             
-            print(f"Total de tweets válidos extraídos: {len(tweets_data)}")
-            return tweets_data
+            if self.deep_history:
+                self.last_extraction_stats['reciclajes'] = self._harvest_context.get('reciclajes', 0)
+                self.last_extraction_stats['nodos_dom_max'] = self._harvest_context.get('nodos_dom_max', 0)
+
+            if self.tweet_index is not None:
+                self._complete_indexed_account(account_url, account_handle, run_id)
+                if own_run:
+                    self.tweet_index.finish_run(run_id)
+            
+            print(f"Total de tweets válidos extraídos: {tweets_count}")
+            return tweets_count
             
+        except AccountScrapeError:
+            raise
         except Exception as e:
             print(f"Error global al raspar cuenta {account_url}: {e}")
-            return []
+            raise AccountScrapeError(account_url, sink.count - count_before, e) from e
     
-    def scrape_multiple_accounts(self, account_urls, output_dir='twitter_data', num_tweets_per_account=20):
+    def _load_timeline(self, url):
+        """Cargar una página de timeline y esperar a que aparezcan tweets. Devuelve si se cargó."""
+        if self.extraction_mode == 'network':
+            # Descartar respuestas pendientes de la página anterior
+            self.driver.get_log('performance')
+            self._pending_responses = set()
+
+        self._current_url = url
+        self._throttle()
+        with self.instrumentation.timer('carga_pagina'):
+            self.driver.get(url)
+            print(f"Accediendo a: {url}")
+            
+            # Esperar a que cargue la página; cada selector que falla cuesta un timeout completo
+            load_started = time.perf_counter()
+
+            def page_ready(selector):
+                try:
+                    return self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+                except TimeoutException:
+                    return None
+
+            selector, _ = self.strategies.first('carga_pagina', PAGE_READY_SELECTORS, page_ready)
+            if selector is not None:
+                self._log(f"Página cargada, encontrado selector: {selector}")
+            self._record_wait('carga_pagina', time.perf_counter() - load_started)
+                
+        if selector is None:
+            print("No se pudo cargar la página correctamente")
+            if self.pacer is not None:
+                self.pacer.block('carga_pagina')
+            return False
+            
+        # Verificar si hay un popup de inicio sesión y cerrarlo
+        if self.close_login_popup() and self.pacer is not None:
+            self.pacer.block('login')
+        return True
+
+    def scrape_and_save_account(self, url, output_dir, timestamp, num_tweets, since=None, until=None, run_id=None,
+                                output_format='csv', media_downloader=None, enricher=None, retry=False):
+        """
+        Raspar una cuenta y guardar sus tweets en {cuenta}_{timestamp}.csv (o .jsonl),
+        o en el dataset Parquet de output_dir/dataset con output_format='parquet'.
+        Los tweets se escriben a medida que se extraen; con media_downloader (un
+        media.MediaDownloader) sus fotos y videos se descargan en segundo plano,
+        y con enricher (un enrichment.Enricher) se enriquecen por lotes antes de guardarse.
+        Devuelve (nombre de la cuenta, tweets extraídos). Si la extracción falla
+        lanza AccountScrapeError después de cerrar el archivo, que conserva los
+        tweets escritos antes del fallo. Con retry=True el archivo de un intento
+        anterior se vacía, salvo que el índice reanude la cuenta desde su posición.
+        """
+        print(f"\n{'='*50}\nRaspando cuenta: {url}\n{'='*50}")
+        
+        # Obtener el nombre de usuario de la URL
+        account_handle = self.get_account_name(url)
+        
+        # Raspar tweets de esta cuenta escribiéndolos directamente en el archivo
+        commands_before = self.command_count
+        # Con índice y run_id el reintento continúa tras lo ya guardado: se sigue agregando
+        fresh = retry and not (self.tweet_index is not None and run_id)
+        sink = self._open_account_sink(account_handle, output_dir, timestamp, output_format, media_downloader,
+                                       enricher, fresh=fresh)
+        try:
+            tweets_count = self.scrape_account_to_sink(url, sink, num_tweets, since=since, until=until, run_id=run_id)
+        finally:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Error al guardar el archivo para {account_handle}: {e}")
+        print(f"Comandos WebDriver para {account_handle}: {self.command_count - commands_before}")
+        account_metrics = self.instrumentation.accounts.get(account_handle)
+        if account_metrics and tweets_count:
+            print(f"Velocidad: {account_metrics['tweets_por_s']} tweets/s, "
+                  f"{account_metrics['comandos_por_tweet']} comandos WebDriver por tweet")
+        for name, timing in self.last_extraction_stats.get('esperas', {}).items():
+            print(f"Esperas '{name}': {timing['esperas']} en {timing['total_s']}s (máx. {timing['max_s']}s)")
+        load = self.last_extraction_stats.get('carga') or {}
+        if load.get('carga_s') is not None:
+            print(f"Carga de página: {load['carga_s']:.2f}s, {load['bytes_transferidos'] / 1024:.0f} KB en "
+                  f"{load['recursos']} recursos ({'modo ligero' if load['modo_ligero'] else 'modo completo'})")
+        
+        if tweets_count:
+            print(f"\nDatos de {account_handle} guardados en {sink.path}")
+            
+            # Mostrar ejemplos de métricas para esta cuenta
+            print("\nEjemplos de métricas encontradas:")
+            for i, tweet in enumerate(sink.preview):
+                print(f"\nEjemplo {i+1}:")
+                print(f"Fecha: {tweet.get('fecha', 'No disponible')}")
+                texto = tweet.get('texto', '')
+                print(f"Texto: {texto[:50]}..." if len(texto) > 50 else texto)
+                print(f"Comentarios: {tweet.get('comentarios', 0)}")
+                print(f"Retweets: {tweet.get('retweets', 0)}")
+                print(f"Me gusta: {tweet.get('me_gusta', 0)}")
+                print(f"Compartidos: {tweet.get('compartidos', 0)}")
+        else:
+            print(f"No se pudieron extraer tweets de la cuenta {account_handle}")
+
+        return account_handle, tweets_count
+
+    def _open_account_sink(self, account_handle, output_dir, timestamp, output_format='csv', media_downloader=None,
+                           enricher=None, fresh=False):
+        """
+        Sink de salida de una cuenta, con enriquecimiento y descarga de medios si se piden.
+        Con fresh=True se borra el archivo de un intento anterior en lugar de
+        agregar a él (el dataset Parquet ya deduplica al compactar).
+        """
+        if output_format == 'parquet':
+            # pyarrow solo se importa si se pide esta salida
+            from tweet_dataset import ParquetDatasetSink, DATASET_DIRNAME
+            sink = ParquetDatasetSink(os.path.join(output_dir, DATASET_DIRNAME), run_id=timestamp)
+        else:
+            # Crear nombre de archivo para esta cuenta
+            path = os.path.join(output_dir, f"{account_handle}_{timestamp}")
+            if fresh and os.path.exists(f"{path}.{output_format}"):
+                os.remove(f"{path}.{output_format}")
+            sink = open_sink(output_format, path)
+        if enricher is not None:
+            from enrichment import EnrichmentSink
+            sink = EnrichmentSink(sink, enricher)
+        if media_downloader is not None:
+            from media import MediaDownloadSink
+            sink = MediaDownloadSink(sink, media_downloader)
+        return sink
+
+    def scrape_multiple_accounts(self, account_urls, output_dir='twitter_data', num_tweets_per_account=20,
+                                 since=None, until=None, max_workers=1, resume=True, output_format='csv',
+                                 metrics_file=None, download_media=False, enrich=False, update_analytics=False):
         """
         Raspar múltiples cuentas de Twitter/X y guardar los resultados en archivos CSV separados.
         Cada extracción genera un nuevo archivo con marca de tiempo en el directorio especificado.
+        El rango de fechas since/until se resuelve una sola vez para todas las cuentas.
+        Con max_workers > 1 las cuentas se reparten entre varios navegadores en paralelo;
+        si el scraper se creó con tabs > 1 se intercalan en ventanas de este
+        navegador y el informe incluye el rendimiento por ventana y la memoria.
+        Con el índice activo y resume=True, una ejecución interrumpida con la misma
+        lista de cuentas se reanuda en la cuenta y posición donde se detuvo.
+        output_format elige el archivo por cuenta: 'csv' (por defecto) o 'jsonl'.
+        Con 'parquet' todas las cuentas se escriben en un dataset columnar en
+        output_dir/dataset, particionado por cuenta y mes, que se compacta al
+        terminar la ejecución (ver tweet_dataset.load_dataset para leerlo).
+        Al final se guarda el informe de instrumentación informe_{timestamp}.json
+        y, si se indica metrics_file, las métricas en formato de Prometheus.
+        Con download_media=True las fotos y videos de los tweets se descargan
+        mientras se raspa a output_dir/media, una sola vez por contenido (ver media.py).
+        Con enrich=True cada tweet lleva hashtags, menciones, enlaces, precios,
+        códigos promocionales, idioma y duplicado_de (casi duplicados entre cuentas
+        y ejecuciones, con el índice output_dir/casi_duplicados.sqlite; ver enrichment.py).
+        Con update_analytics=True, al terminar se suman los archivos nuevos a la
+        analítica de output_dir y se reescriben los informes analitica_*.csv (ver analytics.py).
         """
+        since, until = resolve_date_range(since, until)
+        self.instrumentation.reset()
+
         # Crear directorio de salida si no existe
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -504,78 +1717,84 @@ class TwitterScraper:
         # Generar un timestamp para esta extracción
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Estadísticas generales
-        all_tweets_count = 0
-        accounts_stats = {}
+        # Con índice, el timestamp identifica la ejecución (y se reutiliza al reanudar)
+        run_id = None
+        pending_urls = list(account_urls)
+        if self.tweet_index is not None:
+            run_id, pending_urls = self.tweet_index.start_run(timestamp, account_urls, resume)
+            timestamp = run_id
         
-        # Procesamos cada cuenta por separado
-        for url in account_urls:
-            print(f"\n{'='*50}\nRaspando cuenta: {url}\n{'='*50}")
-            
-            # Obtener el nombre de usuario de la URL
-            account_handle = self.get_account_name(url)
-            
-            # Crear nombre de archivo para esta cuenta
-            filename = f"{account_handle}_{timestamp}.csv"
-            output_file = os.path.join(output_dir, filename)
-            
-            # Raspar tweets de esta cuenta
-            tweets = self.scrape_account(url, num_tweets_per_account)
-            
-            # Guardar resultados en CSV específico para esta cuenta
-            if tweets:
-                fieldnames = ['cuenta', 'texto', 'fecha', 'url', 'comentarios', 'retweets', 'me_gusta', 'compartidos', 'tiene_media']
-                
-                # Asegurar que todos los tweets tienen todos los campos
-                for tweet in tweets:
-                    for field in fieldnames:
-                        if field not in tweet:
-                            tweet[field] = ""
-                
-                try:
-                    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-                        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                        writer.writeheader()
-                        writer.writerows(tweets)
-                    
-                    print(f"\nDatos de {account_handle} guardados en {output_file}")
-                except Exception as e:
-                    print(f"Error al guardar el archivo CSV para {account_handle}: {e}")
-                
-                # Actualizar estadísticas
-                all_tweets_count += len(tweets)
-                accounts_stats[account_handle] = len(tweets)
-                
-                # Mostrar ejemplos de métricas para esta cuenta
-                if tweets:
-                    print("\nEjemplos de métricas encontradas:")
-                    for i, tweet in enumerate(tweets[:3]):
-                        print(f"\nEjemplo {i+1}:")
-                        print(f"Fecha: {tweet.get('fecha', 'No disponible')}")
-                        texto = tweet.get('texto', '')
-                        print(f"Texto: {texto[:50]}..." if len(texto) > 50 else texto)
-                        print(f"Comentarios: {tweet.get('comentarios', 0)}")
-                        print(f"Retweets: {tweet.get('retweets', 0)}")
-                        print(f"Me gusta: {tweet.get('me_gusta', 0)}")
-                        print(f"Compartidos: {tweet.get('compartidos', 0)}")
+        media_downloader = None
+        if download_media:
+            from media import MediaDownloader
+            media_downloader = MediaDownloader(os.path.join(output_dir, 'media'))
+        enricher = None
+        if enrich:
+            from enrichment import Enricher, NearDuplicateIndex, DUPLICATE_INDEX_NAME
+            enricher = Enricher(NearDuplicateIndex(os.path.join(output_dir, DUPLICATE_INDEX_NAME)))
+
+        # Estadísticas generales
+        try:
+            if self.tabs > 1:
+                if max_workers > 1:
+                    print("Con varias ventanas se usa un solo navegador: se ignora max_workers")
+                accounts_stats = self._scrape_accounts_in_tabs(pending_urls, output_dir, timestamp,
+                                                               num_tweets_per_account, since, until, run_id,
+                                                               output_format, media_downloader, enricher)
+            elif max_workers > 1:
+                accounts_stats = self._scrape_accounts_parallel(pending_urls, output_dir, timestamp,
+                                                                num_tweets_per_account, since, until, max_workers,
+                                                                run_id, output_format, media_downloader, enricher)
             else:
-                print(f"No se pudieron extraer tweets de la cuenta {account_handle}")
-            
-            # Pausa entre cuentas para evitar detección
-            time.sleep(random.uniform(5, 8))
+                accounts_stats = {}
+                # Procesamos cada cuenta por separado
+                for url in pending_urls:
+                    try:
+                        account_handle, tweets_count = self.scrape_and_save_account(
+                            url, output_dir, timestamp, num_tweets_per_account, since, until, run_id, output_format,
+                            media_downloader, enricher)
+                    except AccountScrapeError as e:
+                        # El archivo de la cuenta conserva lo escrito antes del fallo
+                        print(f"Fallo al raspar {e}")
+                        account_handle, tweets_count = self.get_account_name(url), e.tweets
+                    if tweets_count:
+                        accounts_stats[account_handle] = tweets_count
+                    
+                    self.pause_between_accounts()
+        finally:
+            if media_downloader is not None:
+                # Esperar las descargas que siguen en curso
+                media_downloader.close()
+                stats = media_downloader.stats
+                print(f"Medios: {stats['descargados']} descargados ({stats['bytes'] / 2 ** 20:.1f} MB), "
+                      f"{stats['en_cache']} ya en caché, {stats['duplicados']} duplicados, {stats['errores']} errores")
+            if enricher is not None:
+                from enrichment import print_stats
+                enricher.close()
+                print_stats(enricher.stats)
+
+        if run_id:
+            # Incluir las cuentas terminadas antes de una interrupción
+            run_stats = self.tweet_index.run_stats(run_id)
+            accounts_stats = {}
+            for url in account_urls:
+                account_handle = self.get_account_name(url)
+                if run_stats.get(account_handle):
+                    accounts_stats[account_handle] = run_stats[account_handle]
+            if not self.tweet_index.pending_accounts(run_id):
+                self.tweet_index.finish_run(run_id)
+        if output_format == 'parquet':
+            from tweet_dataset import compact_dataset, DATASET_DIRNAME
+            compact_dataset(os.path.join(output_dir, DATASET_DIRNAME),
+                            accounts=[self.get_account_name(url) for url in account_urls])
+        all_tweets_count = sum(accounts_stats.values())
         
         # Guardar también un resumen general de esta extracción
-        try:
-            summary_file = os.path.join(output_dir, f"resumen_extraccion_{timestamp}.csv")
-            with open(summary_file, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Cuenta', 'Tweets Extraídos', 'Fecha Extracción'])
-                for account, count in accounts_stats.items():
-                    writer.writerow([account, count, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
-            
-            print(f"\nResumen de la extracción guardado en {summary_file}")
-        except Exception as e:
-            print(f"Error al guardar el archivo de resumen: {e}")
+        write_summary(output_dir, timestamp, accounts_stats)
+        self.write_run_report(output_dir, timestamp, metrics_file)
+        if update_analytics:
+            from analytics import summarize
+            summarize(output_dir)
         
         print(f"\n{'='*50}")
         print(f"Total de tweets recolectados: {all_tweets_count}")
@@ -584,57 +1803,156 @@ class TwitterScraper:
             print(f"- {account}: {count} tweets")
         print(f"{'='*50}")
 
-def extract_number(text):
-    """Extraer número de texto como '5 respuestas' o '10.2K Me gusta'."""
-    if not text:
-        return 0
-        
-    # Primero, intentemos encontrar patrones comunes de Twitter con K/M
-    k_pattern = re.search(r'(\d+(?:[.,]\d+)?)[kK]', text)
-    m_pattern = re.search(r'(\d+(?:[.,]\d+)?)[mM]', text)
-    
-    if k_pattern:
-        return int(float(k_pattern.group(1).replace(',', '.')) * 1000)
-    if m_pattern:
-        return int(float(m_pattern.group(1).replace(',', '.')) * 1000000)
-    
-    # Buscar patrones como "mil" o "millones"
-    if 'mil' in text.lower():
-        mil_pattern = re.search(r'(\d+(?:[.,]\d+)?)\s*mil', text.lower())
-        if mil_pattern:
-            return int(float(mil_pattern.group(1).replace(',', '.')) * 1000)
-    
-    if 'millon' in text.lower() or 'millones' in text.lower():
-        mill_pattern = re.search(r'(\d+(?:[.,]\d+)?)\s*millon(?:es)?', text.lower())
-        if mill_pattern:
-            return int(float(mill_pattern.group(1).replace(',', '.')) * 1000000)
-    
-    # Finalmente, buscar cualquier número
-    number_pattern = re.search(r'(\d+(?:[.,]\d+)?)', text)
-    if number_pattern:
-        # Manejar delimitadores decimales
-        return int(float(number_pattern.group(1).replace(',', '.')))
-    
+    def write_run_report(self, output_dir, timestamp, metrics_file=None):
+        """Guardar el informe de instrumentación en JSON y, opcionalmente, para Prometheus."""
+        try:
+            extra = {'selectores': self.strategies.report()}
+            if self.pacer is not None:
+                extra['ritmo'] = self.pacer.snapshot()
+            if self.last_tab_report is not None:
+                extra['ventanas'] = self.last_tab_report
+            report_file = self.instrumentation.write_json(os.path.join(output_dir, f"informe_{timestamp}.json"),
+                                                          extra)
+            self.strategies.save()
+            if self.verbose:
+                self.strategies.print_report()
+            print(f"Informe de rendimiento guardado en {report_file}")
+            if metrics_file:
+                self.instrumentation.write_prometheus(metrics_file)
+                print(f"Métricas de Prometheus guardadas en {metrics_file}")
+        except Exception as e:
+            print(f"Error al guardar el informe de rendimiento: {e}")
+
+    def _scrape_accounts_in_tabs(self, account_urls, output_dir, timestamp, num_tweets, since, until, run_id=None,
+                                 output_format='csv', media_downloader=None, enricher=None):
+        """Intercalar las cuentas entre self.tabs ventanas de este navegador (ver tab_multiplexer.py)."""
+        from tab_multiplexer import TabMultiplexer, print_report
+
+        multiplexer = TabMultiplexer(self, self.tabs)
+        try:
+            results = multiplexer.run(
+                account_urls,
+                lambda handle: self._open_account_sink(handle, output_dir, timestamp, output_format,
+                                                       media_downloader, enricher),
+                num_tweets, since, until, run_id=run_id)
+        finally:
+            self.last_tab_report = multiplexer.report
+        if multiplexer.report is not None:
+            print_report(multiplexer.report)
+        ordered_stats = {}
+        for url in account_urls:
+            account_handle = self.get_account_name(url)
+            if results.get(account_handle):
+                ordered_stats[account_handle] = results[account_handle]
+        return ordered_stats
+
+    def _scrape_accounts_parallel(self, account_urls, output_dir, timestamp, num_tweets, since, until, max_workers,
+                                  run_id=None, output_format='csv', media_downloader=None, enricher=None):
+        """
+        Repartir las cuentas entre un pool de navegadores alimentado por una cola compartida.
+
+        Este scraper es el primer trabajador; los demás se crean con la misma
+        configuración y se cierran al terminar. Si una cuenta falla vuelve a la
+        cola (hasta MAX_ACCOUNT_RETRIES veces) y el reintento rehace su archivo;
+        después de cada cuenta, si el navegador dejó de responder se reemplaza.
+        """
+        account_queue = queue.Queue()
+        for url in account_urls:
+            account_queue.put((url, 0))
+
+        accounts_stats = {}
+        stats_lock = threading.Lock()
+        workers = [self]
+
+        def worker_loop(scraper, worker_id):
+            while True:
+                try:
+                    url, attempt = account_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    account_handle, tweets_count = scraper.scrape_and_save_account(
+                        url, output_dir, timestamp, num_tweets, since, until, run_id, output_format, media_downloader,
+                        enricher, retry=attempt > 0)
+                    if tweets_count:
+                        with stats_lock:
+                            accounts_stats[account_handle] = tweets_count
+                except Exception as e:
+                    print(f"[Trabajador {worker_id}] Fallo al raspar {url}: {e}")
+                    if attempt < MAX_ACCOUNT_RETRIES:
+                        account_queue.put((url, attempt + 1))
+                    else:
+                        print(f"[Trabajador {worker_id}] Se descarta {url} tras {attempt + 1} intentos")
+                        if isinstance(e, AccountScrapeError) and e.tweets:
+                            # El archivo conserva lo escrito en el último intento
+                            with stats_lock:
+                                accounts_stats[self.get_account_name(url)] = e.tweets
+
+                # Un navegador caído tras resultados parciales no se nota en tweets_count
+                if not scraper.is_alive():
+                    print(f"[Trabajador {worker_id}] El navegador no responde; reiniciándolo")
+                    try:
+                        scraper.restart_driver()
+                    except Exception as restart_error:
+                        print(f"[Trabajador {worker_id}] No se pudo reiniciar el navegador: {restart_error}")
+                        return
+
+                scraper.pause_between_accounts()
+
+        try:
+            for _ in range(min(max_workers, len(account_urls)) - 1):
+                try:
+                    workers.append(TwitterScraper(**self._worker_kwargs(len(workers) + 1)))
+                except Exception as e:
+                    print(f"No se pudo iniciar un navegador adicional: {e}")
+                    break
+            print(f"Raspando {len(account_urls)} cuentas con {len(workers)} navegadores")
+
+            threads = [threading.Thread(target=worker_loop, args=(scraper, i + 1), daemon=True)
+                       for i, scraper in enumerate(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for scraper in workers[1:]:
+                self.instrumentation.merge(scraper.instrumentation)
+                scraper.close()
+
+        if not account_queue.empty():
+            print(f"Quedaron {account_queue.qsize()} cuentas sin procesar: todos los navegadores fallaron")
+
+        # Mantener el orden de la lista de cuentas en el resumen
+        ordered_stats = {}
+        for url in account_urls:
+            account_handle = self.get_account_name(url)
+            if account_handle in accounts_stats:
+                ordered_stats[account_handle] = accounts_stats[account_handle]
+        return ordered_stats
+
+def _proc_rss(pid):
+    """RSS en bytes de un proceso según /proc (Linux)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
     return 0
 
-# Ejemplo de uso
-if __name__ == "__main__":  
-    # Lista de cuentas a raspar
-    accounts = [
-        "https://x.com/BurgerKingMX",
-        "https://x.com/KFC_MEXICO",
-        "https://x.com/littlecaesarsmx"
-    ]
-    
-    # Iniciar el scraper (False para ver el navegador, True para modo headless)
-    scraper = TwitterScraper(headless=False)
-    
+def _proc_children(pid):
+    children = []
     try:
-        # Directorio donde se guardarán los archivos CSV
-        output_directory = "twitter_extracciones"
-        
-        # Raspar tweets por cuenta (20 tweets por cuenta, menos de 2 años de antigüedad)
-        scraper.scrape_multiple_accounts(accounts, output_directory, 20)
-    finally:
-        # Asegurar que el navegador se cierre correctamente
-        del scraper
\ No newline at end of file
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+# Uso desde la línea de comandos: ver cli.py (python twitter_scraper.py scrape --help)
+if __name__ == "__main__":
+    from cli import main
+
+    raise SystemExit(main())
@@ -0,0 +1,599 @@
+"""
+Cola de trabajo compartida para repartir un barrido de cuentas entre varias máquinas.
+
+Un coordinador crea el barrido (la lista de cuentas y los parámetros de
+extracción) en un almacén compartido y cada máquina ejecuta uno o varios
+trabajadores que toman cuentas en préstamo por un tiempo limitado. Mientras
+raspa, el trabajador renueva el préstamo; si muere, el préstamo vence y otro
+trabajador reintenta la cuenta (hasta max_attempts veces).
+
+Cada cuenta se escribe en un archivo temporal y solo se mueve a su nombre
+final ({cuenta}_{barrido}.csv) al confirmar el trabajo, dentro de la misma
+transacción que lo marca como completado, así que en el directorio de salida
+nunca queda un archivo a medias ni dos versiones de una cuenta. En formato
+parquet cada intento escribe en un directorio oculto dentro del dataset y sus
+archivos se mueven a las particiones al confirmar. Al terminar el
+barrido, el trabajador que confirma la última cuenta escribe el resumen
+combinado resumen_extraccion_{barrido}.csv.
+
+Almacenes: SqliteWorkQueue (un archivo SQLite en un volumen compartido) y
+MemoryWorkQueue (en memoria, para un solo proceso o pruebas). Otros almacenes
+pueden implementar la interfaz de WorkQueue.
+
+    # Coordinador
+    queue = SqliteWorkQueue('/compartido/cola.sqlite')
+    sweep_id = queue.create_sweep(urls, num_tweets=50)
+    # En cada máquina
+    run_worker(TwitterScraper(headless=True), queue, sweep_id, '/compartido/salida')
+    # Estado
+    print_status(queue.status(sweep_id))
+
+También se puede usar desde la línea de comandos (python work_queue.py --help).
+"""
+import os
+import csv
+import json
+import time
+import uuid
+import shutil
+import socket
+import sqlite3
+import datetime
+import argparse
+import threading
+
+from sinks import open_sink
+
+# Segundos que dura un préstamo; el trabajador lo renueva cada LEASE_SECONDS / 3
+LEASE_SECONDS = 600
+
+# Intentos de una cuenta antes de darla por fallida
+MAX_ATTEMPTS = 3
+
+# Segundos entre consultas cuando no hay cuentas libres pero el barrido no terminó
+POLL_INTERVAL = 15
+
+# Ventana (segundos) con la que se calcula el ritmo en la vista de estado
+THROUGHPUT_WINDOW = 600
+
+PENDING = 'pendiente'
+LEASED = 'asignada'
+DONE = 'completada'
+FAILED = 'fallida'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    sweep_id TEXT PRIMARY KEY,
+    config TEXT,
+    created REAL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    sweep_id TEXT NOT NULL,
+    account_url TEXT NOT NULL,
+    position INTEGER,
+    status TEXT NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    started REAL,
+    finished REAL,
+    tweets INTEGER,
+    output_path TEXT,
+    error TEXT,
+    PRIMARY KEY (sweep_id, account_url)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (sweep_id, status, position);
+"""
+
+def default_worker_id():
+    """Identificador del trabajador: máquina, proceso y un sufijo aleatorio."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+
+def _timestamp(value):
+    return datetime.datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S') if value else ""
+
+class LeaseLost(Exception):
+    """El préstamo venció y la cuenta pasó a otro trabajador."""
+
+class WorkQueue:
+    """
+    Interfaz de los almacenes. Un trabajo es un dict con sweep_id, account_url,
+    status, attempts, worker, lease_expires, tweets, output_path, etc.
+    commit recibe una función que publica la salida y que debe ejecutarse
+    dentro de la misma operación atómica que marca el trabajo como completado.
+    """
+
+    def create_sweep(self, account_urls, sweep_id=None, **config):
+        raise NotImplementedError
+
+    def sweep_config(self, sweep_id):
+        raise NotImplementedError
+
+    def lease(self, sweep_id, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        raise NotImplementedError
+
+    def renew(self, job, lease_seconds=LEASE_SECONDS):
+        raise NotImplementedError
+
+    def commit(self, job, tweets, output_path, publish=None):
+        raise NotImplementedError
+
+    def fail(self, job, error, max_attempts=MAX_ATTEMPTS):
+        raise NotImplementedError
+
+    def jobs(self, sweep_id):
+        raise NotImplementedError
+
+    def mark_finished(self, sweep_id):
+        """Marcar el barrido como terminado. Devuelve True solo la primera vez."""
+        raise NotImplementedError
+
+    def is_done(self, sweep_id):
+        """No queda nada pendiente ni asignado (las fallidas agotaron sus intentos)."""
+        return all(job['status'] in (DONE, FAILED) for job in self.jobs(sweep_id))
+
+    def status(self, sweep_id, now=None):
+        """Vista de estado: avance, atraso, ritmo reciente, préstamos activos y tiempo estimado."""
+        now = now or time.time()
+        jobs = self.jobs(sweep_id)
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for job in jobs:
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+        expired = [job for job in jobs if job['status'] == LEASED and (job['lease_expires'] or 0) < now]
+        recent = [job for job in jobs if job['status'] == DONE and (job['finished'] or 0) >= now - THROUGHPUT_WINDOW]
+        window = min(THROUGHPUT_WINDOW, now - min((job['started'] or now) for job in recent)) if recent else 0
+        accounts_per_min = len(recent) / (window / 60) if window > 0 else 0.0
+        backlog = counts[PENDING] + counts[LEASED]
+        return {
+            'barrido': sweep_id,
+            'cuentas': len(jobs),
+            'estados': counts,
+            'atraso': backlog,
+            'prestamos_vencidos': len(expired),
+            'tweets': sum(job['tweets'] or 0 for job in jobs if job['status'] == DONE),
+            'cuentas_por_min': round(accounts_per_min, 2),
+            'tweets_por_min': round(sum(job['tweets'] or 0 for job in recent) / (window / 60), 1) if window > 0 else 0.0,
+            'eta_min': round(backlog / accounts_per_min, 1) if accounts_per_min else None,
+            'trabajadores': sorted({job['worker'] for job in jobs if job['status'] == LEASED and job['worker']}),
+            'asignadas': [
+                {'cuenta': job['account_url'], 'trabajador': job['worker'],
+                 'vence_en_s': round((job['lease_expires'] or now) - now)}
+                for job in jobs if job['status'] == LEASED
+            ]
+        }
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    Almacén en un archivo SQLite, compartible entre máquinas a través de un
+    volumen de red. Cada operación es una transacción BEGIN IMMEDIATE, así que
+    dos trabajadores nunca toman la misma cuenta. No se usa WAL porque no
+    funciona sobre sistemas de archivos de red.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _transaction(self):
+        queue = self
+
+        class Transaction:
+            def __enter__(self):
+                queue._lock.acquire()
+                queue.conn.execute("BEGIN IMMEDIATE")
+                return queue.conn
+
+            def __exit__(self, exc_type, exc_value, traceback):
+                try:
+                    queue.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+                finally:
+                    queue._lock.release()
+
+        return Transaction()
+
+    def create_sweep(self, account_urls, sweep_id=None, **config):
+        """Encolar las cuentas de un barrido con sus parámetros de extracción. Devuelve el sweep_id."""
+        sweep_id = sweep_id or datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO sweeps (sweep_id, config, created) VALUES (?, ?, ?)",
+                         (sweep_id, json.dumps(config), now))
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (sweep_id, account_url, position, status) VALUES (?, ?, ?, ?)",
+                [(sweep_id, url, position, PENDING) for position, url in enumerate(account_urls)])
+        return sweep_id
+
+    def sweep_config(self, sweep_id):
+        row = self.conn.execute("SELECT config FROM sweeps WHERE sweep_id = ?", (sweep_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No existe el barrido {sweep_id}")
+        return json.loads(row['config'] or '{}')
+
+    def lease(self, sweep_id, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Tomar la siguiente cuenta libre o con el préstamo vencido. Devuelve el trabajo o None."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Los préstamos vencidos que ya agotaron sus intentos se dan por fallidos
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'préstamo vencido', worker = NULL "
+                "WHERE sweep_id = ? AND status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, sweep_id, LEASED, now, max_attempts))
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE sweep_id = ? AND (status = ? OR (status = ? AND lease_expires < ?)) "
+                "ORDER BY position LIMIT 1",
+                (sweep_id, PENDING, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, started = ? "
+                "WHERE sweep_id = ? AND account_url = ?",
+                (LEASED, worker, now + lease_seconds, now, sweep_id, row['account_url']))
+        job = dict(row)
+        job.update(status=LEASED, worker=worker, lease_expires=now + lease_seconds, attempts=row['attempts'] + 1,
+                   started=now)
+        return job
+
+    def renew(self, job, lease_seconds=LEASE_SECONDS):
+        """Extender el préstamo. Lanza LeaseLost si la cuenta ya no es de este trabajador."""
+        expires = time.time() + lease_seconds
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE sweep_id = ? AND account_url = ? AND status = ? AND worker = ?",
+                (expires, job['sweep_id'], job['account_url'], LEASED, job['worker']))
+            if not cursor.rowcount:
+                raise LeaseLost(job['account_url'])
+        job['lease_expires'] = expires
+
+    def commit(self, job, tweets, output_path, publish=None):
+        """
+        Confirmar el trabajo: publish() (mover la salida a su nombre final) se
+        ejecuta dentro de la transacción. Devuelve False si el préstamo ya no es
+        de este trabajador; en ese caso no se publica nada.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status, worker FROM jobs WHERE sweep_id = ? AND account_url = ?",
+                               (job['sweep_id'], job['account_url'])).fetchone()
+            if row is None or row['status'] != LEASED or row['worker'] != job['worker']:
+                return False
+            if publish is not None:
+                publish()
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, tweets = ?, output_path = ?, error = NULL, "
+                "lease_expires = NULL WHERE sweep_id = ? AND account_url = ?",
+                (DONE, time.time(), tweets, output_path, job['sweep_id'], job['account_url']))
+        return True
+
+    def fail(self, job, error, max_attempts=MAX_ATTEMPTS):
+        """Devolver la cuenta a la cola, o darla por fallida si agotó sus intentos."""
+        status = FAILED if job['attempts'] >= max_attempts else PENDING
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, worker = NULL "
+                "WHERE sweep_id = ? AND account_url = ? AND worker = ?",
+                (status, str(error)[:500], job['sweep_id'], job['account_url'], job['worker']))
+        return status
+
+    def jobs(self, sweep_id):
+        rows = self.conn.execute("SELECT * FROM jobs WHERE sweep_id = ? ORDER BY position", (sweep_id,))
+        return [dict(row) for row in rows]
+
+    def mark_finished(self, sweep_id):
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE sweeps SET finished = ? WHERE sweep_id = ? AND finished IS NULL",
+                                  (time.time(), sweep_id))
+            return bool(cursor.rowcount)
+
+class MemoryWorkQueue(WorkQueue):
+    """Almacén en memoria con la misma semántica, para un solo proceso (varios hilos) o pruebas."""
+
+    def __init__(self):
+        self._sweeps = {}
+        self._jobs = {}
+        self._lock = threading.RLock()
+
+    def create_sweep(self, account_urls, sweep_id=None, **config):
+        sweep_id = sweep_id or datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        with self._lock:
+            self._sweeps.setdefault(sweep_id, {'config': config, 'created': time.time(), 'finished': None})
+            jobs = self._jobs.setdefault(sweep_id, {})
+            for position, url in enumerate(account_urls):
+                jobs.setdefault(url, {
+                    'sweep_id': sweep_id, 'account_url': url, 'position': position, 'status': PENDING,
+                    'attempts': 0, 'worker': None, 'lease_expires': None, 'started': None, 'finished': None,
+                    'tweets': None, 'output_path': None, 'error': None
+                })
+        return sweep_id
+
+    def sweep_config(self, sweep_id):
+        return dict(self._sweeps[sweep_id]['config'])
+
+    def lease(self, sweep_id, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        now = time.time()
+        with self._lock:
+            for job in sorted(self._jobs.get(sweep_id, {}).values(), key=lambda j: j['position']):
+                expired = job['status'] == LEASED and job['lease_expires'] < now
+                if expired and job['attempts'] >= max_attempts:
+                    job.update(status=FAILED, error='préstamo vencido', worker=None)
+                    continue
+                if job['status'] == PENDING or expired:
+                    job.update(status=LEASED, worker=worker, lease_expires=now + lease_seconds,
+                               attempts=job['attempts'] + 1, started=now)
+                    return dict(job)
+        return None
+
+    def renew(self, job, lease_seconds=LEASE_SECONDS):
+        with self._lock:
+            stored = self._jobs[job['sweep_id']][job['account_url']]
+            if stored['status'] != LEASED or stored['worker'] != job['worker']:
+                raise LeaseLost(job['account_url'])
+            stored['lease_expires'] = job['lease_expires'] = time.time() + lease_seconds
+
+    def commit(self, job, tweets, output_path, publish=None):
+        with self._lock:
+            stored = self._jobs[job['sweep_id']][job['account_url']]
+            if stored['status'] != LEASED or stored['worker'] != job['worker']:
+                return False
+            if publish is not None:
+                publish()
+            stored.update(status=DONE, finished=time.time(), tweets=tweets, output_path=output_path, error=None,
+                          lease_expires=None)
+        return True
+
+    def fail(self, job, error, max_attempts=MAX_ATTEMPTS):
+        status = FAILED if job['attempts'] >= max_attempts else PENDING
+        with self._lock:
+            stored = self._jobs[job['sweep_id']][job['account_url']]
+            if stored['worker'] == job['worker']:
+                stored.update(status=status, error=str(error)[:500], lease_expires=None, worker=None)
+        return status
+
+    def jobs(self, sweep_id):
+        with self._lock:
+            return sorted((dict(job) for job in self._jobs.get(sweep_id, {}).values()), key=lambda j: j['position'])
+
+    def mark_finished(self, sweep_id):
+        with self._lock:
+            sweep = self._sweeps[sweep_id]
+            if sweep['finished'] is not None:
+                return False
+            sweep['finished'] = time.time()
+            return True
+
+class LeaseHeartbeat:
+    """Renovar el préstamo en segundo plano mientras se raspa la cuenta."""
+
+    def __init__(self, queue, job, lease_seconds):
+        self.queue = queue
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self.queue.renew(self.job, self.lease_seconds)
+            except LeaseLost:
+                self.lost = True
+                return
+            except Exception as e:
+                print(f"No se pudo renovar el préstamo de {self.job['account_url']}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+
+def write_sweep_summary(queue, sweep_id, output_dir):
+    """
+    Escribir resumen_extraccion_{barrido}.csv con todas las cuentas del barrido
+    (las mismas columnas que write_summary más trabajador, intentos y estado).
+    """
+    summary_file = os.path.join(output_dir, f"resumen_extraccion_{sweep_id}.csv")
+    tmp_path = f"{summary_file}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Cuenta', 'Tweets Extraídos', 'Fecha Extracción', 'Trabajador', 'Intentos', 'Estado', 'Archivo'])
+        for job in queue.jobs(sweep_id):
+            account = job['account_url'].rstrip('/').split('/')[-1]
+            writer.writerow([account, job['tweets'] or 0, _timestamp(job['finished']), job['worker'] or "",
+                             job['attempts'], job['status'], os.path.basename(job['output_path'] or "")])
+    os.replace(tmp_path, summary_file)
+    print(f"\nResumen del barrido guardado en {summary_file}")
+    return summary_file
+
+def _remove_temp(path):
+    """Borrar el temporal de un intento: un archivo o el directorio de staging del dataset."""
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _publish_staging(staging_dir, dataset_dir):
+    """Mover los archivos del staging a las mismas particiones del dataset y borrarlo."""
+    for directory, _, names in os.walk(staging_dir):
+        target = os.path.join(dataset_dir, os.path.relpath(directory, staging_dir))
+        for name in names:
+            if name.endswith('.parquet') and not name.startswith('.'):
+                os.makedirs(target, exist_ok=True)
+                os.replace(os.path.join(directory, name), os.path.join(target, name))
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+def _scrape_job(scraper, job, output_dir, config, worker):
+    """
+    Raspar una cuenta a un archivo temporal (o, en parquet, a un directorio de
+    staging). Devuelve (tweets, ruta final, función que la publica, ruta del
+    temporal). Si la extracción falla se borra el temporal y se propaga el
+    error (AccountScrapeError).
+    """
+    account_handle = scraper.get_account_name(job['account_url'])
+    sweep_id = job['sweep_id']
+    output_format = config.get('output_format', 'csv')
+    if output_format == 'parquet':
+        from tweet_dataset import ParquetDatasetSink, DATASET_DIRNAME
+        final_path = os.path.join(output_dir, DATASET_DIRNAME)
+        # Oculto para load_dataset y compact_dataset hasta que commit lo mueve a las particiones
+        staging_dir = os.path.join(final_path, f".staging-{account_handle}_{sweep_id}_{worker}")
+        _remove_temp(staging_dir)
+        sink = ParquetDatasetSink(staging_dir, run_id=f"{sweep_id}_{worker}")
+
+        def publish():
+            _publish_staging(staging_dir, final_path)
+    else:
+        final_path = os.path.join(output_dir, f"{account_handle}_{sweep_id}.{output_format}")
+        # El temporal empieza por '.' y lleva el trabajador: nunca choca con otro intento
+        temp_base = os.path.join(output_dir, f".{account_handle}_{sweep_id}_{worker}")
+        # Restos de un intento anterior de este trabajador que no llegó a limpiar
+        stale_path = f"{temp_base}.{output_format}"
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+        sink = open_sink(output_format, temp_base)
+
+        def publish():
+            if os.path.exists(sink.path):
+                os.replace(sink.path, final_path)
+
+    try:
+        tweets = scraper.scrape_account_to_sink(job['account_url'], sink, config.get('num_tweets', 20),
+                                                since=config.get('since'), until=config.get('until'))
+    except Exception:
+        sink.close()
+        _remove_temp(sink.path)
+        raise
+    sink.close()
+    return tweets, final_path, publish, sink.path
+
+def run_worker(scraper, queue, sweep_id, output_dir, worker=None, lease_seconds=LEASE_SECONDS,
+               max_attempts=MAX_ATTEMPTS, poll_interval=POLL_INTERVAL, wait=True, max_jobs=None):
+    """
+    Tomar cuentas del barrido hasta que no quede ninguna. Con wait=True, si no
+    hay cuentas libres pero otras están asignadas, se espera por si algún
+    préstamo vence. Devuelve cuántas cuentas confirmó este trabajador.
+    """
+    worker = worker or default_worker_id()
+    config = queue.sweep_config(sweep_id)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    committed = 0
+    attempted = 0
+    while max_jobs is None or committed < max_jobs:
+        job = queue.lease(sweep_id, worker, lease_seconds, max_attempts)
+        if job is None:
+            if queue.is_done(sweep_id) or not wait:
+                break
+            time.sleep(poll_interval)
+            continue
+        print(f"[{worker}] Cuenta {job['account_url']} (intento {job['attempts']})")
+        temp_path = None
+        try:
+            with LeaseHeartbeat(queue, job, lease_seconds) as heartbeat:
+                # La misma pausa entre cuentas que scrape_multiple_accounts, con el préstamo renovándose
+                if attempted:
+                    scraper.pause_between_accounts()
+                attempted += 1
+                tweets, final_path, publish, temp_path = _scrape_job(scraper, job, output_dir, config, worker)
+            if heartbeat.lost:
+                raise LeaseLost(job['account_url'])
+            if queue.commit(job, tweets, final_path, publish):
+                committed += 1
+                print(f"[{worker}] {job['account_url']}: {tweets} tweets confirmados en {final_path}")
+            else:
+                print(f"[{worker}] El préstamo de {job['account_url']} venció; se descarta el resultado")
+        except LeaseLost:
+            print(f"[{worker}] El préstamo de {job['account_url']} pasó a otro trabajador; se descarta el resultado")
+        except Exception as e:
+            # Una extracción fallida (AccountScrapeError) nunca se confirma: se
+            # reintenta hasta max_attempts aunque ya hubiera escrito tweets
+            status = queue.fail(job, e, max_attempts)
+            print(f"[{worker}] Fallo en {job['account_url']}: {e} ({status})")
+        finally:
+            if temp_path and os.path.basename(temp_path).startswith('.'):
+                _remove_temp(temp_path)
+        if not scraper.is_alive():
+            print(f"[{worker}] El navegador no responde; reiniciándolo")
+            try:
+                scraper.restart_driver()
+            except Exception as restart_error:
+                print(f"[{worker}] No se pudo reiniciar el navegador: {restart_error}")
+                break
+    if queue.is_done(sweep_id) and queue.mark_finished(sweep_id):
+        write_sweep_summary(queue, sweep_id, output_dir)
+    return committed
+
+def print_status(status):
+    """Imprimir la vista de estado de un barrido."""
+    counts = status['estados']
+    print(f"Barrido {status['barrido']}: {counts[DONE]}/{status['cuentas']} completadas, "
+          f"{counts[LEASED]} asignadas, {counts[PENDING]} pendientes, {counts[FAILED]} fallidas")
+    eta = f", fin estimado en {status['eta_min']} min" if status['eta_min'] is not None else ""
+    print(f"Atraso: {status['atraso']} cuentas; ritmo: {status['cuentas_por_min']} cuentas/min, "
+          f"{status['tweets_por_min']} tweets/min{eta}; {status['tweets']} tweets en total")
+    if status['prestamos_vencidos']:
+        print(f"{status['prestamos_vencidos']} préstamos vencidos se reintentarán")
+    for lease in status['asignadas']:
+        print(f"  {lease['cuenta']}: {lease['trabajador']} (vence en {lease['vence_en_s']}s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Cola compartida para repartir un barrido de cuentas")
+    parser.add_argument('--db', required=True, help="Archivo SQLite compartido de la cola")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create = subparsers.add_parser('crear', help="Encolar un barrido")
+    create.add_argument('accounts', nargs='+', help="URLs de las cuentas")
+    create.add_argument('--barrido', help="Identificador del barrido (por defecto, la fecha y hora)")
+    create.add_argument('--tweets', type=int, default=20)
+    create.add_argument('--since')
+    create.add_argument('--until')
+    create.add_argument('--formato', default='csv', choices=['csv', 'jsonl', 'parquet'])
+
+    worker = subparsers.add_parser('trabajar', help="Ejecutar un trabajador")
+    worker.add_argument('barrido')
+    worker.add_argument('--salida', default='twitter_data')
+    worker.add_argument('--prestamo', type=int, default=LEASE_SECONDS, help="Segundos de cada préstamo")
+    worker.add_argument('--headless', action='store_true')
+    worker.add_argument('--ritmo-adaptativo', action='store_true',
+                        help="Ajustar las pausas a las señales de bloqueo (ver pacing.py)")
+
+    status = subparsers.add_parser('estado', help="Ver el avance de un barrido")
+    status.add_argument('barrido')
+    status.add_argument('--json', action='store_true')
+
+    args = parser.parse_args()
+    queue = SqliteWorkQueue(args.db)
+    try:
+        if args.command == 'crear':
+            sweep_id = queue.create_sweep(args.accounts, args.barrido, num_tweets=args.tweets, since=args.since,
+                                          until=args.until, output_format=args.formato)
+            print(f"Barrido {sweep_id} creado con {len(args.accounts)} cuentas")
+        elif args.command == 'trabajar':
+            from twitter_scraper import TwitterScraper
+            from pacing import AdaptivePacer
+
+            pacer = AdaptivePacer() if args.ritmo_adaptativo else None
+            with TwitterScraper(headless=args.headless, pacer=pacer) as scraper:
+                run_worker(scraper, queue, args.barrido, args.salida, lease_seconds=args.prestamo)
+        else:
+            if args.json:
+                print(json.dumps(queue.status(args.barrido), ensure_ascii=False, indent=2))
+            else:
+                print_status(queue.status(args.barrido))
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    main()